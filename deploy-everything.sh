@@ -41,6 +41,29 @@ echo ""
 # Track start time
 START_TIME=$(date +%s)
 
+# Timing spans from every step and provisioning script go to one JSONL trace
+TRACE_TOOL="$PWD/modules/app-delta-tables/provisioning_trace.py"
+export PROVISIONING_TRACE_FILE="${PROVISIONING_TRACE_FILE:-$PWD/.provisioning-trace.jsonl}"
+export PROVISIONING_TRACE_ID="deploy-$START_TIME-$$"
+STEP_NAME=""
+STEP_START=""
+
+step_end() {
+  if [ -n "$STEP_NAME" ]; then
+    python3 "$TRACE_TOOL" record "$STEP_NAME" "$STEP_START" "$(date +%s)" > /dev/null 2>&1 || true
+    STEP_NAME=""
+  fi
+}
+
+step_begin() {
+  step_end
+  STEP_NAME="$1"
+  STEP_START=$(date +%s)
+}
+
+# Record the step that was running even if the deploy fails part-way
+trap step_end EXIT
+
 # ============================================
 # STEP 0: Generate Configuration Files
 # ============================================
@@ -49,6 +72,8 @@ echo -e "${GREEN}🔧 STEP 0/7: Generating Configuration Files${NC}"
 echo -e "${BLUE}═══════════════════════════════════════════════════════════════${NC}"
 echo ""
 
+step_begin "0 Generating Configuration Files"
+
 if [ ! -f "config.yaml" ]; then
     echo -e "${RED}❌ Error: config.yaml not found!${NC}"
     echo ""
@@ -74,6 +99,8 @@ echo -e "${GREEN}📦 STEP 1/7: Loading Credentials from AWS Secrets Manager${NC
 echo -e "${BLUE}═══════════════════════════════════════════════════════════════${NC}"
 echo ""
 
+step_begin "1 Loading Credentials from AWS Secrets Manager"
+
 # Load Terraform credentials (account-level SP)
 echo "🔐 Loading Terraform Service Principal credentials..."
 SECRET_JSON=$(aws secretsmanager get-secret-value \
@@ -116,6 +143,8 @@ echo -e "${GREEN}🏗️  STEP 2/7: Deploying Infrastructure with Terraform${NC}
 echo -e "${BLUE}═══════════════════════════════════════════════════════════════${NC}"
 echo ""
 
+step_begin "2 Deploying Infrastructure with Terraform"
+
 terraform init
 terraform plan -out=tfplan
 terraform apply tfplan
@@ -144,6 +173,8 @@ echo -e "${GREEN}🔧 STEP 3/7: Configuring Databricks CLI${NC}"
 echo -e "${BLUE}═══════════════════════════════════════════════════════════════${NC}"
 echo ""
 
+step_begin "3 Configuring Databricks CLI"
+
 cat > ~/.databrickscfg << EOF
 [DEFAULT]
 host          = $WORKSPACE_URL
@@ -162,6 +193,8 @@ echo -e "${GREEN}⏳ STEP 4/7: Waiting for Lakebase Instance to be Ready${NC}"
 echo -e "${BLUE}═══════════════════════════════════════════════════════════════${NC}"
 echo ""
 
+step_begin "4 Waiting for Lakebase Instance to be Ready"
+
 echo "⏳ Lakebase instances can take 3-5 minutes to become fully available..."
 echo "   Waiting 60 seconds before database setup..."
 sleep 60
@@ -177,6 +210,8 @@ echo -e "${GREEN}🗄️  STEP 5/7: Setting up Lakebase (app_users)${NC}"
 echo -e "${BLUE}═══════════════════════════════════════════════════════════════${NC}"
 echo ""
 
+step_begin "5 Setting up Lakebase (app_users)"
+
 echo "✅ Lakebase PostgreSQL instance created by Terraform"
 echo "   Host: $LAKEBASE_DNS"
 echo "   Database: fraud_detection_db"
@@ -190,7 +225,11 @@ export DATABRICKS_CLIENT_ID="$TF_VAR_workspace_sp_client_id"
 export DATABRICKS_CLIENT_SECRET="$TF_VAR_workspace_sp_client_secret"
 export DATABRICKS_HOST="https://one-env-som-workspace.cloud.databricks.com"
 
-if python3 modules/lakebase/create-lakebase-app-users.py; then
+# Same runner the Delta provisioning uses: one process, shared token and pools
+if python3 modules/app-delta-tables/provisioning_runner.py \
+    "$DATABRICKS_HOST" "$(terraform output -raw sql_warehouse_id)" \
+    --steps lakebase \
+    --lakebase-host "$LAKEBASE_DNS"; then
   echo "✅ app_users table created (empty - ready for application use)"
   echo ""
   echo "ℹ️  Note: Operational fraud data is stored in Unity Catalog Delta tables"
@@ -209,6 +248,8 @@ echo -e "${GREEN}🚀 STEP 6/7: Deploying Fraud Case Management Application${NC}
 echo -e "${BLUE}═══════════════════════════════════════════════════════════════${NC}"
 echo ""
 
+step_begin "6 Deploying Fraud Case Management Application"
+
 # Build frontend
 echo "📦 Building frontend..."
 cd frontend
@@ -254,6 +295,7 @@ echo ""
 # ============================================
 # DEPLOYMENT COMPLETE
 # ============================================
+step_end
 END_TIME=$(date +%s)
 DURATION=$((END_TIME - START_TIME))
 MINUTES=$((DURATION / 60))
@@ -265,6 +307,9 @@ echo -e "${GREEN}╚════════════════════
 echo ""
 echo -e "${BLUE}⏱️  Total deployment time: ${MINUTES}m ${SECONDS}s${NC}"
 echo ""
+python3 "$TRACE_TOOL" summary "$PROVISIONING_TRACE_FILE" || true
+echo "   Full trace: $PROVISIONING_TRACE_FILE (trace id $PROVISIONING_TRACE_ID)"
+echo ""
 echo -e "${GREEN}🌐 Your Fraud Case Management Application:${NC}"
 echo -e "${YELLOW}   $APP_URL${NC}"
 echo ""
@@ -733,12 +733,17 @@ module "app_delta_tables" {
 # ============================================
 # Delta to Lakebase Sync Module
 # Syncs Unity Catalog Delta tables to Lakebase PostgreSQL
-# Schedule: Daily at 23:00 UTC
+# Schedule: the module's case-summaries-refresh job (summary_refresh_cron,
+# daily at 22:30 UTC by default)
 # ============================================
 
 module "delta_to_lakebase_sync" {
   source = "./modules/delta-to-lakebase-sync"
 
+  workspace_url            = databricks_mws_workspaces.this.workspace_url
+  databricks_client_id     = var.workspace_sp_client_id
+  databricks_client_secret = var.workspace_sp_client_secret
+
   source_catalog        = "afc-mvp"
   source_schema         = "fraud-investigation"
   lakebase_catalog_name = "afc_lakebase_catalog"
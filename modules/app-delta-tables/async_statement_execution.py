@@ -0,0 +1,320 @@
+"""
+Asyncio counterpart of statement_execution for the Delta REST scripts.
+Hundreds of statements can be submitted from one event loop with at most
+`max_in_flight` running on the warehouse at once. Statements still running
+when the run is interrupted (Ctrl-C, SIGTERM) or times out are cancelled
+through the API instead of being left orphaned on the warehouse.
+
+Requires aiohttp.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import threading
+import time
+
+from databricks_http_client import IDEMPOTENT_METHODS, RETRY_STATUS_CODES, get_client
+from oauth_token_provider import resolve_token
+from provisioning_trace import span
+from statement_execution import PollingPolicy, _check_state, _observe
+
+DEFAULT_MAX_IN_FLIGHT = 32
+
+# (loop, task) of every run_with_cancellation() in progress, on any thread
+_active_runs = set()
+_active_runs_lock = threading.Lock()
+
+
+def _require_aiohttp():
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        print("❌ The async statement executor requires aiohttp (pip install aiohttp)")
+        raise
+
+
+class AsyncStatementExecutor:
+    """Runs statements on one warehouse from an event loop, `max_in_flight` at a time.
+
+    Use as `async with AsyncStatementExecutor(...) as executor:`. Leaving the
+    block cancels the executor's unfinished tasks and, through the API, every
+    statement that is still running.
+
+    Statements are submitted without an inline wait (wait_timeout 0) unless a
+    policy says otherwise: the statement id comes back at once, so it is
+    always known when the statement has to be cancelled, and polling costs no
+    thread.
+    """
+
+    def __init__(self, host, token, warehouse_id, max_in_flight=None, policy=None):
+        _require_aiohttp()
+        if max_in_flight is None:
+            max_in_flight = int(os.environ.get('DATABRICKS_SQL_MAX_IN_FLIGHT', DEFAULT_MAX_IN_FLIGHT))
+        self.host = host
+        self.token = token
+        self.warehouse_id = warehouse_id
+        self.max_in_flight = max(1, max_in_flight)
+        self.policy = policy or PollingPolicy.from_env(wait_timeout_seconds=0)
+
+        self._session = None
+        self._semaphore = None
+        self._tasks = set()
+        # statement_id -> table name of statements submitted but not yet finished
+        self._running = {}
+
+    async def __aenter__(self):
+        import aiohttp
+
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        # A few connections beyond the in-flight cap for cancels
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_in_flight + 4)
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            pending = [task for task in self._tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            await self.cancel_running()
+        finally:
+            await self._session.close()
+
+    def create_task(self, coro):
+        """Schedule `coro` as a task that is cancelled (with its statement) if the executor exits first."""
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _headers(self):
+        # Resolved per request so a long run outlives its token. A provider may
+        # block on an OAuth refresh (or on another thread's), so it is asked
+        # from a worker thread instead of stalling every in-flight statement.
+        if isinstance(self.token, str):
+            token = self.token
+        else:
+            token = await asyncio.get_running_loop().run_in_executor(None, resolve_token, self.token)
+        return {"Authorization": f"Bearer {token}"}
+
+    async def _request(self, method, url, label, timeout=30, idempotent=None, **kwargs):
+        """Send a request, retrying on 429/503 and dropped connections; returns (status, body text).
+
+        Like DatabricksHttpClient.request(), a non-idempotent request is only
+        retried when the connection could not be opened, and a 401 invalidates
+        the token provider's token and resends the request once.
+        """
+        import aiohttp
+
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        retry_errors = aiohttp.ClientConnectionError if idempotent else aiohttp.ClientConnectorError
+
+        client = get_client()
+        start = time.perf_counter()
+        attempt = 0
+        status = None
+        reauthenticated = False
+        try:
+            while True:
+                try:
+                    headers = await self._headers()
+                    async with self._session.request(
+                        method, url, headers=headers,
+                        timeout=aiohttp.ClientTimeout(total=timeout), **kwargs
+                    ) as response:
+                        status = response.status
+                        if status == 401 and hasattr(self.token, 'invalidate') and not reauthenticated:
+                            self.token.invalidate()
+                            reauthenticated = True
+                            attempt += 1
+                            continue
+                        if status not in RETRY_STATUS_CODES or attempt >= client.max_retries:
+                            return status, await response.text()
+                        delay = client.backoff(attempt, response)
+                except aiohttp.ClientConnectionError as e:
+                    if attempt >= client.max_retries or not isinstance(e, retry_errors):
+                        raise
+                    delay = client.backoff(attempt)
+                await asyncio.sleep(delay)
+                attempt += 1
+        finally:
+            client.record(label, time.perf_counter() - start, attempt, status is not None and status < 400)
+
+    async def execute(self, statement, table_name=None, verbose=False):
+        """Run one statement; True once it SUCCEEDED, False on failure or timeout.
+
+        `table_name` only labels the statement's trace span.
+        """
+        async with self._semaphore:
+            kind = statement.split(None, 1)[0].upper() if statement.strip() else None
+            with span('statement', table=table_name, kind=kind, executor='async') as trace:
+                ok = await self._execute(statement, table_name, verbose, trace)
+                trace.set(ok=ok)
+                return ok
+
+    async def _execute(self, statement, table_name, verbose, trace):
+        if verbose:
+            print(f"Executing: {statement[:100]}...")
+
+        policy = self.policy
+        payload = {
+            "statement": statement,
+            "warehouse_id": self.warehouse_id,
+            "wait_timeout": f"{policy.wait_timeout_seconds}s",
+        }
+        if policy.wait_timeout_seconds:
+            payload["on_wait_timeout"] = "CONTINUE"
+
+        start_time = time.time()
+        statement_id = None
+        try:
+            with span('statement.submit', table=table_name):
+                submit = asyncio.ensure_future(self._request(
+                    'POST', f"{self.host}/api/2.0/sql/statements", 'submit',
+                    timeout=policy.wait_timeout_seconds + 30, json=payload
+                ))
+                try:
+                    status, body = await asyncio.shield(submit)
+                except asyncio.CancelledError:
+                    # Let the submit finish so the statement it started can be cancelled
+                    status, body = await submit
+                    if status == 200:
+                        statement_id = json.loads(body).get('statement_id')
+                        if statement_id:
+                            self._running[statement_id] = table_name
+                    raise
+
+            if status != 200:
+                print(f"❌ HTTP {status}: {body}")
+                return False
+
+            result = json.loads(body)
+            statement_id = result.get('statement_id')
+            if not statement_id:
+                print(f"❌ No statement_id in response")
+                return False
+            trace.set(statement_id=statement_id)
+            _observe(trace, result, start_time)
+
+            state = _check_state(result, time.time() - start_time)
+            if state is not None:
+                return state
+
+            self._running[statement_id] = table_name
+            return await self._poll(statement_id, start_time, trace)
+
+        except asyncio.TimeoutError:
+            print(f"❌ Timeout submitting statement")
+            return False
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            return False
+        finally:
+            # Interrupted, timed out or lost track of: don't leave it running
+            if statement_id in self._running:
+                await asyncio.shield(self._cancel(statement_id))
+
+    async def _poll(self, statement_id, start_time, trace):
+        """Poll with backoff until the statement finishes or the policy's max wait passes."""
+        policy = self.policy
+        api_url = f"{self.host}/api/2.0/sql/statements/{statement_id}"
+
+        for interval in policy.intervals():
+            elapsed = time.time() - start_time
+            if elapsed > policy.max_wait_seconds:
+                print(f"❌ Timeout after {elapsed:.0f}s")
+                return False
+
+            # Don't sleep past the deadline
+            delay = min(interval, max(0, policy.max_wait_seconds - elapsed))
+            await asyncio.sleep(delay)
+            trace.add('poll_count')
+            trace.add('poll_sleep_seconds', delay)
+            trace.set(last_poll_gap_seconds=round(delay, 3))
+
+            status, body = await self._request('GET', api_url, 'poll')
+            if status != 200:
+                print(f"❌ Error polling status: HTTP {status}: {body}")
+                return False
+            result = json.loads(body)
+            _observe(trace, result, start_time)
+            state = _check_state(result, time.time() - start_time)
+            if state is not None:
+                self._running.pop(statement_id, None)
+                return state
+
+    async def _cancel(self, statement_id):
+        """Cancel a statement this executor started, if it is still running."""
+        if statement_id not in self._running:
+            return
+        table_name = self._running.pop(statement_id)
+        label = f" ({table_name})" if table_name else ""
+        print(f"🛑 Cancelling statement {statement_id}{label}")
+        with span('statement.cancel', table=table_name, statement_id=statement_id) as trace:
+            try:
+                status, body = await self._request(
+                    'POST', f"{self.host}/api/2.0/sql/statements/{statement_id}/cancel", 'cancel',
+                    idempotent=True
+                )
+                trace.set(ok=status == 200)
+                if status != 200:
+                    print(f"⚠️  Could not cancel statement {statement_id}: HTTP {status}: {body}")
+            except Exception as e:
+                trace.set(ok=False)
+                print(f"⚠️  Could not cancel statement {statement_id}: {e}")
+
+    async def cancel_running(self):
+        """Cancel every statement that is still running on the warehouse."""
+        if self._running:
+            await asyncio.gather(*(self._cancel(statement_id) for statement_id in list(self._running)))
+
+
+def run_with_cancellation(coro):
+    """asyncio.run() that also turns SIGTERM into a cancellation, like Ctrl-C.
+
+    Either way the running executor cancels its statements before
+    KeyboardInterrupt is raised to the caller.
+    """
+    async def main():
+        loop = asyncio.get_running_loop()
+        run = (loop, asyncio.current_task())
+        try:
+            loop.add_signal_handler(signal.SIGTERM, run[1].cancel)
+        except (NotImplementedError, RuntimeError):
+            # Not the main thread: cancel_active_runs() is how it gets interrupted
+            pass
+        with _active_runs_lock:
+            _active_runs.add(run)
+        try:
+            return await coro
+        finally:
+            with _active_runs_lock:
+                _active_runs.discard(run)
+
+    try:
+        return asyncio.run(main())
+    except asyncio.CancelledError:
+        raise KeyboardInterrupt from None
+
+
+def cancel_active_runs():
+    """Cancel every run_with_cancellation() in progress, whichever thread it runs on.
+
+    Signals only reach the main thread, so a caller running steps on worker
+    threads calls this on Ctrl-C to have their statements cancelled too.
+    """
+    with _active_runs_lock:
+        runs = list(_active_runs)
+    for loop, task in runs:
+        try:
+            loop.call_soon_threadsafe(task.cancel)
+        except RuntimeError:
+            # The loop closed in the meantime
+            pass
+    return len(runs)
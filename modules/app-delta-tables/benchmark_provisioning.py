@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the Delta provisioning scripts.
+Starts a local stand-in for the workspace (/oidc/v1/token, the SQL Statement
+Execution API and the Files API), runs create_delta_tables_rest.py and
+seed_delta_tables_rest.py against it and reports wall time, request counts,
+p50/p95 statement latency and throughput. Results are written as JSON so
+changes to polling, batching or concurrency can be compared run to run.
+Startup cost is measured separately: each script's --check mode is timed
+and profiled with `python -X importtime`.
+
+Usage:
+    benchmark_provisioning.py [--latency 0.5] [--queue-slots 4] [--error-rate 0.05] ...
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(MODULE_DIR, '..', '..'))
+
+SCRIPTS = {
+    'create': ('create_delta_tables_rest.py', os.path.join(REPO_ROOT, 'sql', 'app_delta_schema.sql')),
+    'seed': ('seed_delta_tables_rest.py', os.path.join(REPO_ROOT, 'sql', 'app_delta_seed.sql')),
+}
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+STATEMENTS_PATH = re.compile(r'^/api/2\.0/sql/statements/?$')
+STATEMENT_PATH = re.compile(r'^/api/2\.0/sql/statements/([\w-]+)$')
+CANCEL_PATH = re.compile(r'^/api/2\.0/sql/statements/([\w-]+)/cancel$')
+WAREHOUSE_PATH = re.compile(r'^/api/2\.0/sql/warehouses/([\w-]+)(/start)?$')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile (None for no values)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class MockWorkspace:
+    """State of the simulated workspace: a warehouse with a fixed number of slots.
+
+    Each statement queues (PENDING) until a slot frees up, then runs (RUNNING)
+    for `latency` +/- `jitter` seconds before it SUCCEEDED (or FAILED, at
+    `failure_rate`). Any request can be answered with an injected 429/503 at
+    `error_rate`. With `cold_start` > 0 the warehouse starts out STOPPED and
+    takes that long to reach RUNNING once started.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.2, queue_slots=4, error_rate=0.0,
+                 error_codes=(429, 503), retry_after=None, failure_rate=0.0, seed=0,
+                 cold_start=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.queue_slots = queue_slots
+        self.error_rate = error_rate
+        self.error_codes = error_codes
+        self.retry_after = retry_after
+        self.failure_rate = failure_rate
+        self.cold_start = cold_start
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.statements = {}
+            self.requests = {}
+            self.responses = {}
+            # Times at which each warehouse slot becomes free
+            self._slots = [0.0] * self.queue_slots
+            heapq.heapify(self._slots)
+            # None = stopped; otherwise the time the warehouse is (or was) up
+            self._running_at = None if self.cold_start else 0.0
+
+    def count(self, kind, status):
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+            self.responses[str(status)] = self.responses.get(str(status), 0) + 1
+
+    def inject_error(self):
+        with self._lock:
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self._random.choice(self.error_codes)
+        return None
+
+    def warehouse_state(self):
+        with self._lock:
+            if self._running_at is None:
+                return 'STOPPED'
+            return 'RUNNING' if time.time() >= self._running_at else 'STARTING'
+
+    def start_warehouse(self):
+        with self._lock:
+            if self._running_at is None:
+                self._running_at = time.time() + self.cold_start
+
+    def submit(self, statement):
+        self.start_warehouse()
+        now = time.time()
+        with self._lock:
+            duration = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            # Statements on a cold warehouse wait for it to come up
+            start = max(now, self._running_at, heapq.heappop(self._slots))
+            end = start + duration
+            heapq.heappush(self._slots, end)
+            failed = bool(self.failure_rate) and self._random.random() < self.failure_rate
+            statement_id = str(uuid.uuid4())
+            self.statements[statement_id] = {
+                'text': statement,
+                'submitted': now,
+                'start': start,
+                'end': end,
+                'failed': failed,
+                'canceled': False,
+                'observed': None,
+            }
+        return statement_id
+
+    def state(self, statement_id):
+        """Current status payload; records when the client first saw a terminal state."""
+        now = time.time()
+        with self._lock:
+            info = self.statements.get(statement_id)
+            if info is None:
+                return None
+            if now < info['start']:
+                state = 'PENDING'
+            elif now < info['end']:
+                state = 'RUNNING'
+            elif info['canceled']:
+                state = 'CANCELED'
+            else:
+                state = 'FAILED' if info['failed'] else 'SUCCEEDED'
+                if info['observed'] is None:
+                    info['observed'] = now
+        status = {'state': state}
+        if state == 'FAILED':
+            status['error'] = {'message': 'Injected statement failure'}
+        return {'statement_id': statement_id, 'status': status}
+
+    def cancel(self, statement_id):
+        """Cancel a statement that hasn't finished (its warehouse slot stays taken)."""
+        now = time.time()
+        with self._lock:
+            info = self.statements.get(statement_id)
+            if info is None:
+                return False
+            if now < info['end']:
+                info['canceled'] = True
+                info['end'] = now
+            return True
+
+    def wait_for(self, statement_id, wait_seconds):
+        """Hold a submit request open like the server-side wait_timeout does."""
+        with self._lock:
+            end = self.statements[statement_id]['end']
+        remaining = end - time.time()
+        if remaining <= wait_seconds:
+            time.sleep(max(0.0, remaining))
+        else:
+            time.sleep(wait_seconds)
+
+    def summary(self):
+        with self._lock:
+            latencies = [
+                info['observed'] - info['submitted']
+                for info in self.statements.values() if info['observed'] is not None
+            ]
+            queue_waits = [max(0.0, info['start'] - info['submitted']) for info in self.statements.values()]
+            return {
+                'statements': len(self.statements),
+                'completed': len(latencies),
+                'requests': dict(self.requests),
+                'responses': dict(self.responses),
+                'latency_p50': percentile(latencies, 50),
+                'latency_p95': percentile(latencies, 95),
+                'latency_max': max(latencies) if latencies else None,
+                'canceled': sum(1 for info in self.statements.values() if info['canceled']),
+                'queue_wait_p95': percentile(queue_waits, 95),
+            }
+
+
+def make_handler(workspace):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return self.rfile.read(length) if length else b''
+
+        def _send(self, kind, status, payload=None, headers=None):
+            workspace.count(kind, status)
+            body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _maybe_error(self, kind):
+            code = workspace.inject_error()
+            if code is None:
+                return False
+            headers = {}
+            if workspace.retry_after is not None:
+                headers['Retry-After'] = str(workspace.retry_after)
+            self._send(kind, code, {'error_code': 'TEMPORARILY_UNAVAILABLE', 'message': 'Injected error'}, headers)
+            return True
+
+        def do_POST(self):
+            body = self._body()
+            if self.path == '/oidc/v1/token':
+                if not self._maybe_error('token'):
+                    self._send('token', 200, {'access_token': 'mock-token', 'token_type': 'Bearer', 'expires_in': 3600})
+                return
+
+            match = WAREHOUSE_PATH.match(self.path)
+            if match and match.group(2):
+                if not self._maybe_error('warehouse'):
+                    workspace.start_warehouse()
+                    self._send('warehouse', 200, {})
+                return
+
+            match = CANCEL_PATH.match(self.path)
+            if match:
+                if not self._maybe_error('cancel'):
+                    if workspace.cancel(match.group(1)):
+                        self._send('cancel', 200, {})
+                    else:
+                        self._send('cancel', 404, {'message': 'Unknown statement'})
+                return
+
+            if STATEMENTS_PATH.match(self.path):
+                if self._maybe_error('submit'):
+                    return
+                request = json.loads(body or b'{}')
+                statement_id = workspace.submit(request.get('statement', ''))
+                wait = int(str(request.get('wait_timeout', '10s')).rstrip('s') or 0)
+                if wait:
+                    workspace.wait_for(statement_id, wait)
+                self._send('submit', 200, workspace.state(statement_id))
+                return
+
+            self._send('unknown', 404, {'message': f'No mock for POST {self.path}'})
+
+        def do_GET(self):
+            match = WAREHOUSE_PATH.match(self.path)
+            if match and not match.group(2):
+                if not self._maybe_error('warehouse'):
+                    self._send('warehouse', 200, {'id': match.group(1), 'state': workspace.warehouse_state()})
+                return
+            match = STATEMENT_PATH.match(self.path)
+            if match:
+                if self._maybe_error('poll'):
+                    return
+                state = workspace.state(match.group(1))
+                if state is None:
+                    self._send('poll', 404, {'message': 'Unknown statement'})
+                else:
+                    self._send('poll', 200, state)
+                return
+            self._send('unknown', 404, {'message': f'No mock for GET {self.path}'})
+
+        def do_PUT(self):
+            self._body()
+            if self.path.startswith('/api/2.0/fs/files/'):
+                if not self._maybe_error('upload'):
+                    self._send('upload', 204)
+                return
+            self._send('unknown', 404, {'message': f'No mock for PUT {self.path}'})
+
+    return Handler
+
+
+def run_script(name, host, workers, env_overrides, verbose=False):
+    script, sql_file = SCRIPTS[name]
+    env = dict(os.environ)
+    env.update({
+        'DATABRICKS_CLIENT_ID': 'benchmark-client',
+        'DATABRICKS_CLIENT_SECRET': 'benchmark-secret',
+        'DATABRICKS_TOKEN_CACHE': 'memory',
+        # Never skip statements: every run must send the full workload
+        'PROVISIONING_LEDGER_FILE': '',
+    })
+    env.pop('DATABRICKS_TOKEN_CACHE_FILE', None)
+    env.update(env_overrides)
+
+    command = [sys.executable, os.path.join(MODULE_DIR, script), host, 'mock-warehouse', sql_file, str(workers)]
+    start = time.time()
+    result = subprocess.run(command, env=env, capture_output=True, text=True)
+    elapsed = time.time() - start
+    if verbose or result.returncode != 0:
+        print(result.stdout[-4000:])
+        print(result.stderr[-4000:], file=sys.stderr)
+    return result.returncode, elapsed
+
+
+def top_level_imports(importtime_output):
+    """{module: cumulative seconds} for the top-level imports in -X importtime output."""
+    imports = {}
+    for line in importtime_output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match and not match.group(3):
+            imports[match.group(4)] = int(match.group(2)) / 1e6
+    return imports
+
+
+def startup_commands(workers):
+    """--check invocations whose startup is measured (no workspace needed)."""
+    commands = {
+        name: [os.path.join(MODULE_DIR, script), 'https://mock', 'mock-warehouse', sql_file, str(workers), '--check']
+        for name, (script, sql_file) in SCRIPTS.items()
+    }
+    commands['runner'] = [os.path.join(MODULE_DIR, 'provisioning_runner.py'), 'https://mock', 'mock-warehouse', '--check']
+    return commands
+
+
+def measure_startup(command, repeat):
+    """Best wall time of `repeat` plain runs plus an -X importtime profile of one more."""
+    env = dict(os.environ, PROVISIONING_TRACE_FILE='')
+    walls = []
+    exit_code = 0
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable] + command, env=env, capture_output=True, text=True)
+        walls.append(time.perf_counter() - start)
+        exit_code = exit_code or result.returncode
+
+    baseline = top_level_imports(subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'pass'], capture_output=True, text=True
+    ).stderr)
+    profile = subprocess.run([sys.executable, '-X', 'importtime'] + command, env=env, capture_output=True, text=True)
+    # Interpreter startup imports (site, encodings...) are the same for any script
+    imports = {
+        module: seconds for module, seconds in top_level_imports(profile.stderr).items()
+        if module not in baseline
+    }
+    heaviest = sorted(imports.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        'exit_code': exit_code,
+        'wall_seconds': round(min(walls), 4),
+        'import_seconds': round(sum(imports.values()), 4),
+        'heaviest_imports': [[module, round(seconds, 4)] for module, seconds in heaviest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the provisioning scripts against a local mock workspace")
+    parser.add_argument('--scripts', nargs='+', choices=sorted(SCRIPTS), default=['create', 'seed'])
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per script")
+    parser.add_argument('--workers', type=int, default=6, help="Worker count passed to each script")
+    parser.add_argument('--latency', type=float, default=0.5, help="Statement execution time in seconds")
+    parser.add_argument('--jitter', type=float, default=0.2, help="+/- random variation of --latency")
+    parser.add_argument('--queue-slots', type=int, default=4, help="Statements the mock warehouse runs at once")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 429/503")
+    parser.add_argument('--error-codes', default='429,503')
+    parser.add_argument('--retry-after', type=float, help="Retry-After seconds sent with injected errors")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="Fraction of statements that end FAILED")
+    parser.add_argument('--cold-start', type=float, default=0.0,
+                        help="Seconds a stopped warehouse takes to start (0 = already running)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for latency and fault injection")
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help="Extra environment for the scripts, e.g. DATABRICKS_SQL_WAIT_TIMEOUT=5")
+    parser.add_argument('--skip-startup', action='store_true', help="Don't measure --check startup time")
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--verbose', action='store_true', help="Show script output")
+    args = parser.parse_args()
+
+    env_overrides = dict(item.split('=', 1) for item in args.env)
+    workspace = MockWorkspace(
+        latency=args.latency,
+        jitter=args.jitter,
+        queue_slots=args.queue_slots,
+        error_rate=args.error_rate,
+        error_codes=tuple(int(code) for code in args.error_codes.split(',')),
+        retry_after=args.retry_after,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+        cold_start=args.cold_start,
+    )
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(workspace))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"🧪 Mock workspace at {host} (latency {args.latency}s ±{args.jitter}, "
+          f"{args.queue_slots} slots, error rate {args.error_rate})")
+
+    startup = {}
+    if not args.skip_startup:
+        for name, command in startup_commands(args.workers).items():
+            startup[name] = measure_startup(command, args.repeat)
+            result = startup[name]
+            status = "✅" if result['exit_code'] == 0 else f"❌ exit {result['exit_code']}"
+            heaviest = ', '.join(f"{module} {seconds * 1000:.0f}ms" for module, seconds in result['heaviest_imports'][:3])
+            print(f"{status} {name} --check: {result['wall_seconds'] * 1000:.0f}ms wall, "
+                  f"{result['import_seconds'] * 1000:.0f}ms imports ({heaviest})")
+
+    runs = []
+    try:
+        for name in args.scripts:
+            for attempt in range(1, args.repeat + 1):
+                workspace.reset()
+                exit_code, elapsed = run_script(name, host, args.workers, env_overrides, args.verbose)
+                summary = workspace.summary()
+                summary.update({
+                    'script': name,
+                    'run': attempt,
+                    'exit_code': exit_code,
+                    'wall_seconds': round(elapsed, 3),
+                    'statements_per_second': round(summary['statements'] / elapsed, 2) if elapsed else None,
+                })
+                runs.append(summary)
+                status = "✅" if exit_code == 0 else f"❌ exit {exit_code}"
+                p50 = summary['latency_p50']
+                p95 = summary['latency_p95']
+                print(f"{status} {name} #{attempt}: {elapsed:.2f}s wall, {summary['statements']} statements, "
+                      f"p50 {p50 if p50 is None else round(p50, 3)}s, p95 {p95 if p95 is None else round(p95, 3)}s, "
+                      f"requests {summary['requests']}")
+    finally:
+        server.shutdown()
+
+    results = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'verbose')},
+        'startup': startup,
+        'runs': runs,
+        'summary': {
+            name: {
+                'wall_seconds_median': percentile([r['wall_seconds'] for r in runs if r['script'] == name], 50),
+                'wall_seconds_max': max((r['wall_seconds'] for r in runs if r['script'] == name), default=None),
+            }
+            for name in args.scripts
+        },
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📄 Results written to {args.output}")
+
+    if any(run['exit_code'] != 0 for run in runs) or any(s['exit_code'] != 0 for s in startup.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
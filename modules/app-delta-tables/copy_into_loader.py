@@ -0,0 +1,419 @@
+"""
+Bulk seed loading through a Unity Catalog volume and COPY INTO.
+Seed rows (from the seed SQL file, or <table>.csv / <table>.parquet files
+next to it, or a <table>/ directory of chunked part files) are written as
+Parquet, uploaded with the Files API, and each table is loaded with a
+single COPY INTO statement.
+
+Requires pyarrow.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from databricks_http_client import get_client
+from insert_batching import parse_insert, split_row_values
+from provisioning_trace import span
+from sql_script_parser import column_definitions, parse_sql_file
+from statement_execution import execute_sql_statement
+from statement_plan import plan_target
+
+# Volume (in the target schema) seed files are staged in by default
+DEFAULT_VOLUME_NAME = "seed_staging"
+
+# COPY INTO accepts at most 1000 names in a FILES list
+MAX_COPY_FILES = 1000
+
+# Seed columns holding a parent's natural key instead of its identity value,
+# as {seed column: (table column, parent table, parent key column)}. Identity
+# values aren't known before the parent rows are loaded, so such tables are
+# copied into <table>_seed_staging and inserted with the key resolved by a join.
+REFERENCE_COLUMNS = {
+    'case_claim_id': ('case_id', 'siu_cases', 'claim_id'),
+}
+STAGING_SUFFIX = '_seed_staging'
+
+NOW_FUNCTIONS = ('CURRENT_TIMESTAMP()', 'CURRENT_TIMESTAMP', 'NOW()', 'CURRENT_DATE()', 'CURRENT_DATE')
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("❌ COPY INTO seed mode requires pyarrow (pip install pyarrow)")
+        raise
+
+
+def literal_to_text(expr, load_time):
+    """Turn a SQL literal from a VALUES tuple into its string value (None for NULL).
+
+    Values are staged as strings and cast to the column type by COPY INTO, so
+    TIMESTAMP('...') keeps its inner literal and CURRENT_TIMESTAMP() becomes
+    the load time, which is what the INSERT would have produced.
+    """
+    expr = expr.strip()
+    upper = expr.upper()
+    if upper == 'NULL':
+        return None
+    if upper in NOW_FUNCTIONS:
+        return load_time
+    func = re.match(r"^\w+\(\s*('(?:[^'\\]|\\.|'')*')\s*\)$", expr)
+    if func:
+        expr = func.group(1)
+    if len(expr) >= 2 and expr[0] == expr[-1] and expr[0] in ("'", '"'):
+        quote = expr[0]
+        inner = expr[1:-1].replace(quote * 2, quote)
+        return re.sub(r'\\(.)', r'\1', inner)
+    return expr
+
+
+def parse_schema_types(schema_file):
+    """Read column types per table from the CREATE TABLE statements in the schema SQL."""
+    if not schema_file or not os.path.exists(schema_file):
+        return {}
+
+    return {
+        stmt.target_table: {column.name: column.data_type for column in column_definitions(stmt)}
+        for stmt in parse_sql_file(schema_file)
+        if stmt.kind == 'CREATE_TABLE'
+    }
+
+
+def collect_sql_rows(sql_file):
+    """Parse the seed SQL into {table: (columns, [row values...], source digest)}.
+
+    The digest covers the literal row text, so it only changes when the seed
+    file does (not when CURRENT_TIMESTAMP() evaluates differently).
+    """
+    load_time = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    tables = {}
+    for stmt in parse_sql_file(sql_file):
+        if stmt.kind != 'INSERT':
+            continue
+        parsed = parse_insert(stmt.text)
+        if parsed is None:
+            print(f"⚠️  Skipping INSERT that isn't a plain VALUES list: {stmt.text[:80]}...")
+            continue
+        table_name, columns_text, rows = parsed
+        if '.' in table_name:
+            # Tables are loaded into the target schema by name; a qualified one may live elsewhere
+            print(f"⚠️  Skipping INSERT into qualified table {table_name}: COPY INTO mode loads the target schema only")
+            continue
+        columns = [c.strip().strip('`') for c in columns_text.strip('()').split(',') if c.strip()]
+        entry = tables.setdefault(table_name, (columns, [], hashlib.sha256()))
+        if entry[0] != columns:
+            print(f"⚠️  Skipping INSERT into {table_name} with a different column list")
+            continue
+        for row in rows:
+            entry[2].update(row.encode('utf-8'))
+            entry[1].append([literal_to_text(v, load_time) for v in split_row_values(row)])
+    return {
+        table_name: (columns, rows, sha.hexdigest())
+        for table_name, (columns, rows, sha) in tables.items()
+    }
+
+
+def find_seed_files(seed_dir):
+    """Map table name -> sorted list of CSV/Parquet seed files found in seed_dir.
+
+    A table is either one <table>.csv / <table>.parquet file or a <table>/
+    directory of part files (as written by synthetic_data_generator.py).
+    """
+    files = {}
+    for name in sorted(os.listdir(seed_dir)):
+        path = os.path.join(seed_dir, name)
+        if os.path.isdir(path):
+            parts = [
+                os.path.join(path, part) for part in sorted(os.listdir(path))
+                if os.path.splitext(part)[1].lower() in ('.csv', '.parquet')
+            ]
+            if parts:
+                files[name] = parts
+            continue
+        stem, ext = os.path.splitext(name)
+        if ext.lower() in ('.csv', '.parquet'):
+            files[stem] = [path]
+    return files
+
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def write_rows_parquet(path, columns, rows):
+    """Write string-typed rows to a Parquet file."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrays = [pa.array([row[i] for row in rows], type=pa.string()) for i in range(len(columns))]
+    pq.write_table(pa.Table.from_arrays(arrays, names=columns), path)
+
+
+def csv_to_parquet(csv_path, parquet_path):
+    """Stream a CSV into Parquet batch by batch, keeping every column as a string."""
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+
+    reader = pacsv.open_csv(csv_path)
+    # Re-open with all columns forced to string so COPY INTO does the casting
+    string_types = {field.name: pa.string() for field in reader.schema}
+    reader = pacsv.open_csv(
+        csv_path,
+        convert_options=pacsv.ConvertOptions(column_types=string_types)
+    )
+    writer = None
+    try:
+        for batch in reader:
+            if writer is None:
+                writer = pq.ParquetWriter(parquet_path, batch.schema)
+            writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return [field.name for field in reader.schema]
+
+
+def parquet_columns(path):
+    import pyarrow.parquet as pq
+    return list(pq.ParquetFile(path).schema_arrow.names)
+
+
+def stage_file(host, token, local_path, volume_file_path):
+    """Upload a local file into a UC volume with the Files API."""
+    api_url = f"{host}/api/2.0/fs/files{volume_file_path}"
+    headers = {
+        "Content-Type": "application/octet-stream"
+    }
+    with open(local_path, 'rb') as f, span('upload', path=volume_file_path, bytes=os.path.getsize(local_path)):
+        response = get_client().request(
+            'PUT',
+            api_url,
+            label="upload",
+            token=token,
+            headers=headers,
+            params={"overwrite": "true"},
+            data=f,
+            timeout=300
+        )
+    if response.status_code not in (200, 201, 204):
+        print(f"❌ Upload of {volume_file_path} failed: HTTP {response.status_code}: {response.text}")
+        return False
+    return True
+
+
+def copy_into_statement(table_ref, volume_dir, file_names, columns, column_types, source_file_column=None):
+    """COPY INTO from staged Parquet files, casting each column to the table's type.
+
+    With `source_file_column`, each row also gets the name of the file it came from.
+    """
+    select_list = []
+    for column in columns:
+        column_type = column_types.get(column)
+        if column_type:
+            select_list.append(f"CAST(`{column}` AS {column_type}) AS `{column}`")
+        else:
+            select_list.append(f"`{column}`")
+    if source_file_column:
+        select_list.append(f"_metadata.file_name AS `{source_file_column}`")
+    files = ', '.join(f"'{name}'" for name in file_names)
+    return (
+        f"COPY INTO {table_ref} "
+        f"FROM (SELECT {', '.join(select_list)} FROM '{volume_dir}') "
+        f"FILEFORMAT = PARQUET "
+        f"FILES = ({files})"
+    )
+
+
+def staging_table_statement(staging_ref, columns, column_types):
+    """CREATE TABLE IF NOT EXISTS for the staging table of a table with REFERENCE_COLUMNS.
+
+    The table keeps COPY INTO's load history, so it is never dropped: files
+    already copied are skipped on the next run.
+    """
+    definitions = [f"`{column}` {column_types.get(column, 'STRING')}" for column in columns]
+    definitions.append("`_seed_file` STRING")
+    return f"CREATE TABLE IF NOT EXISTS {staging_ref} ({', '.join(definitions)}) USING DELTA"
+
+
+def resolve_reference_statements(table_ref, staging_ref, columns, qualify):
+    """INSERT the staged rows whose parents exist, with natural keys resolved to ids, then DELETE them.
+
+    The INSERT and the DELETE are separate commits, so a run that stops in
+    between (or whose DELETE fails) leaves rows staged that are already in
+    the table. The INSERT skips those: each resolved row is keyed by its
+    values plus its occurrence among identical rows, and rows whose key is
+    already in the table are anti-joined away, so the move can be re-run
+    any number of times without duplicating rows.
+
+    Rows whose parent isn't loaded yet stay staged and are resolved by a
+    later run. Should several parents share a natural key (seed files
+    generated with different --seed values), the lowest id wins.
+    """
+    references = [c for c in columns if c in REFERENCE_COLUMNS]
+    plain = [c for c in columns if c not in REFERENCE_COLUMNS]
+    target_columns = plain + [REFERENCE_COLUMNS[c][0] for c in references]
+    select_list = [f"s.`{c}`" for c in plain]
+    joins = []
+    found = []
+    for index, column in enumerate(references):
+        id_column, parent, key = REFERENCE_COLUMNS[column]
+        alias = f"p{index}"
+        select_list.append(f"{alias}.`{id_column}`")
+        joins.append(
+            f"JOIN (SELECT `{key}`, min(`{id_column}`) AS `{id_column}` FROM {qualify(parent)} "
+            f"GROUP BY `{key}`) {alias} ON {alias}.`{key}` = s.`{column}`"
+        )
+        found.append(f"`{column}` IN (SELECT `{key}` FROM {qualify(parent)})")
+    quoted = ', '.join(f"`{c}`" for c in target_columns)
+    # Identical rows are told apart by their occurrence number, so n staged
+    # copies of a row insert only as many as the table is missing
+    occurrence = f"row_number() OVER (PARTITION BY {quoted} ORDER BY `{target_columns[0]}`) AS `_seed_copy`"
+    same_key = ' AND '.join(f"t.`{c}` <=> n.`{c}`" for c in target_columns + ['_seed_copy'])
+    insert = (
+        f"INSERT INTO {table_ref} ({quoted}) "
+        f"SELECT {', '.join(f'n.`{c}`' for c in target_columns)} FROM ("
+        f"SELECT *, {occurrence} FROM ("
+        f"SELECT {', '.join(f'{e} AS `{c}`' for e, c in zip(select_list, target_columns))} "
+        f"FROM {staging_ref} s {' '.join(joins)})) n "
+        f"LEFT ANTI JOIN (SELECT {quoted}, {occurrence} FROM {table_ref}) t ON {same_key}"
+    )
+    delete = f"DELETE FROM {staging_ref} WHERE {' AND '.join(found)}"
+    return insert, delete
+
+
+def default_volume_path(catalog=None, schema=None):
+    """Staging volume path in `catalog`.`schema` (default: plan_target())."""
+    default_catalog, default_schema = plan_target()
+    return f"/Volumes/{catalog or default_catalog}/{schema or default_schema}/{DEFAULT_VOLUME_NAME}"
+
+
+def _volume_name_sql(volume_path):
+    parts = volume_path.strip('/').split('/')
+    if len(parts) < 4 or parts[0] != 'Volumes':
+        raise ValueError(f"Volume path must look like /Volumes/<catalog>/<schema>/<volume>: {volume_path}")
+    return f"`{parts[1]}`.`{parts[2]}`.`{parts[3]}`"
+
+
+def load_with_copy_into(host, token, warehouse_id, sql_file, qualify,
+                        volume_path=None, schema_file=None, workers=6,
+                        seed_dir=None, ready=None):
+    """Stage seed data as Parquet in a volume and COPY INTO each table.
+
+    Files are staged in `volume_path` (default: default_volume_path()).
+    Returns (tables_loaded, tables_total). Staged files are named after the
+    hash of their source, so re-running with unchanged seed data lets COPY INTO
+    skip files it has already loaded instead of duplicating rows. Seed files
+    are looked up in `seed_dir` (default: the directory of `sql_file`).
+    Tables with REFERENCE_COLUMNS are loaded after the other tables, through
+    their staging table.
+    `ready`, if given, is called once the local Parquet files are built and
+    must return True before anything is sent to the warehouse.
+    """
+    _require_pyarrow()
+
+    volume_path = volume_path or default_volume_path()
+    sql_dir = os.path.dirname(os.path.abspath(sql_file))
+    seed_dir = seed_dir or sql_dir
+    if schema_file is None:
+        schema_file = os.path.join(sql_dir, 'app_delta_schema.sql')
+    column_types = parse_schema_types(schema_file)
+
+    seed_files = find_seed_files(seed_dir)
+    sql_tables = collect_sql_rows(sql_file)
+    table_names = list(sql_tables) + [t for t in seed_files if t not in sql_tables]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Build the Parquet files per table: (columns, [(local_path, digest)])
+        staged = {}
+        for table_name in table_names:
+            if table_name in seed_files:
+                columns = None
+                parts = []
+                for index, source in enumerate(seed_files[table_name]):
+                    digest = file_digest(source)
+                    if source.lower().endswith('.csv'):
+                        local_path = os.path.join(tmp_dir, f"{table_name}-{index:05d}.parquet")
+                        part_columns = csv_to_parquet(source, local_path)
+                    else:
+                        local_path = source
+                        part_columns = parquet_columns(source)
+                    if columns is None:
+                        columns = part_columns
+                    elif part_columns != columns:
+                        raise ValueError(f"{source}: columns differ from the other {table_name} parts")
+                    parts.append((local_path, digest))
+            else:
+                local_path = os.path.join(tmp_dir, f"{table_name}.parquet")
+                columns, rows, digest = sql_tables[table_name]
+                write_rows_parquet(local_path, columns, rows)
+                parts = [(local_path, digest)]
+            staged[table_name] = (columns, parts)
+
+        if ready is not None and not ready():
+            return 0, len(table_names)
+
+        print(f"📦 Staging seed data in {volume_path}")
+        if not execute_sql_statement(
+            host, token, warehouse_id,
+            f"CREATE VOLUME IF NOT EXISTS {_volume_name_sql(volume_path)}"
+        ):
+            print("❌ Failed to create staging volume")
+            return 0, len(table_names)
+
+        def load_table(table_name):
+            columns, parts = staged[table_name]
+            volume_dir = f"{volume_path.rstrip('/')}/{table_name}"
+            file_names = []
+            for local_path, digest in parts:
+                file_name = f"{table_name}-{digest[:16]}.parquet"
+                if not stage_file(host, token, local_path, f"{volume_dir}/{file_name}"):
+                    return False
+                file_names.append(file_name)
+            types = column_types.get(table_name, {})
+            references = any(c in REFERENCE_COLUMNS for c in columns)
+            copy_target = qualify(table_name + STAGING_SUFFIX) if references else qualify(table_name)
+            if references and not execute_sql_statement(
+                host, token, warehouse_id, staging_table_statement(copy_target, columns, types),
+                table_name=table_name
+            ):
+                return False
+            for start in range(0, len(file_names), MAX_COPY_FILES):
+                statement = copy_into_statement(
+                    copy_target, volume_dir, file_names[start:start + MAX_COPY_FILES],
+                    columns, types, source_file_column='_seed_file' if references else None
+                )
+                if not execute_sql_statement(host, token, warehouse_id, statement, table_name=table_name):
+                    return False
+            if references:
+                for statement in resolve_reference_statements(qualify(table_name), copy_target, columns, qualify):
+                    if not execute_sql_statement(host, token, warehouse_id, statement, table_name=table_name):
+                        return False
+            return True
+
+        # Tables that reference a parent by natural key wait for the parents to be loaded
+        referencing = {t for t in table_names if any(c in REFERENCE_COLUMNS for c in staged[t][0])}
+        waves = [[t for t in table_names if t not in referencing], [t for t in table_names if t in referencing]]
+        loaded = 0
+        done = 0
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(table_names)))) as executor:
+            for wave in waves:
+                futures = {executor.submit(load_table, t): t for t in wave}
+                for future in as_completed(futures):
+                    table_name = futures[future]
+                    done += 1
+                    if future.result():
+                        loaded += 1
+                        print(f"[{done}/{len(table_names)}] Loaded table: {table_name}")
+                    else:
+                        print(f"[{done}/{len(table_names)}] ⚠️  Failed to load {table_name}, continuing...")
+
+    return loaded, len(table_names)
@@ -2,213 +2,352 @@
 """
 Create Unity Catalog Delta tables using Databricks REST API directly.
 More reliable than SDK for headless execution in Terraform provisioners.
+
+The SQL file is compiled once into a statement plan (qualified statements
+and their dependency waves, see statement_plan.py) for the catalog/schema
+in DATABRICKS_CATALOG / DATABRICKS_SCHEMA. With --check, the arguments are
+validated and the plan is compiled without contacting the workspace (or
+importing requests).
 """
 
 import sys
 import os
 import re
-import time
-import requests
-import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from databricks_http_client import get_client, normalize_host
+from oauth_token_provider import get_token_provider
+from provisioning_trace import span
+from sql_script_parser import parse_sql_file
+from statement_ledger import open_ledger
+from statement_execution import execute_sql_statement, use_async_executor
+from statement_plan import open_plan, plan_target
+from warehouse_readiness import start_warehouse_warmup
 
 def get_oauth_token(host, client_id, client_secret):
-    """Get OAuth M2M token from Databricks."""
+    """Get a cached, auto-refreshing OAuth M2M token provider for Databricks."""
     print("🔐 Obtaining OAuth token...")
     
-    token_url = f"{host}/oidc/v1/token"
-    data = {
-        "grant_type": "client_credentials",
-        "scope": "all-apis"
-    }
-    
     try:
-        response = requests.post(
-            token_url,
-            auth=(client_id, client_secret),
-            data=data,
-            timeout=30
-        )
-        response.raise_for_status()
-        token_data = response.json()
+        provider = get_token_provider(host, client_id, client_secret)
+        # Fetch (or load from cache) now so bad credentials fail fast
+        provider.token()
         print("✅ OAuth token obtained")
-        return token_data['access_token']
+        return provider
     except Exception as e:
         print(f"❌ Failed to get OAuth token: {e}")
         sys.exit(1)
 
-def poll_statement_status(host, token, statement_id, max_wait_seconds=120):
-    """Poll statement status until completion."""
-    api_url = f"{host}/api/2.0/sql/statements/{statement_id}"
-    headers = {
-        "Authorization": f"Bearer {token}"
-    }
-    
-    start_time = time.time()
-    while True:
-        elapsed = time.time() - start_time
-        if elapsed > max_wait_seconds:
-            print(f"❌ Timeout after {elapsed:.0f}s")
-            return False
-        
-        try:
-            response = requests.get(api_url, headers=headers, timeout=30)
-            response.raise_for_status()
-            result = response.json()
-            
-            status = result.get('status', {}).get('state', 'UNKNOWN')
-            
-            if status == 'SUCCEEDED':
-                print(f"✅ Success (took {elapsed:.1f}s)")
-                return True
-            elif status in ['FAILED', 'CANCELED', 'CLOSED']:
-                error_info = result.get('status', {}).get('error', {})
-                error_msg = error_info.get('message', f'Statement {status}')
-                print(f"❌ {error_msg}")
-                return False
-            elif status in ['PENDING', 'RUNNING']:
-                # Still executing, wait and poll again
-                time.sleep(2)
-                continue
-            else:
-                print(f"❌ Unknown status: {status}")
-                return False
-                
-        except Exception as e:
-            print(f"❌ Error polling status: {e}")
-            return False
+def prepare_create_statements(create_statements, catalog, schema):
+    """Qualify parsed CREATE / ALTER TABLE statements, returning (table_name, statement) pairs."""
+    return [
+        (stmt.target_table or f"table_{i}", stmt.qualified(catalog, schema) + ';')
+        for i, stmt in enumerate(create_statements, 1)
+    ]
 
-def execute_sql_statement(host, token, warehouse_id, statement, timeout_seconds=120):
-    """Execute SQL statement using SQL Statement Execution API."""
-    print(f"Executing: {statement[:100]}...")
-    
-    api_url = f"{host}/api/2.0/sql/statements"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "statement": statement,
-        "warehouse_id": warehouse_id,
-        "wait_timeout": "0s"  # Don't wait, return immediately
-    }
+def schedule_waves(table_statements):
+    """Group statements into waves; a statement only runs after the tables it reads from.
     
-    try:
-        # Submit statement
-        response = requests.post(
-            api_url,
-            headers=headers,
-            json=payload,
-            timeout=30
+    A table depends on another table from this file when it references it after
+    FROM/JOIN/LIKE/REFERENCES (CTAS, CREATE TABLE LIKE, foreign keys). Plain
+    CREATE TABLE definitions have no dependencies and all land in the first wave.
+    """
+    names = {name for name, _ in table_statements}
+    dependencies = {}
+    for name, stmt in table_statements:
+        referenced = re.findall(
+            r'\b(?:FROM|JOIN|LIKE|REFERENCES)\s+(?:`[^`]+`\.)*`?(\w+)`?',
+            stmt,
+            re.IGNORECASE
         )
-        
-        if response.status_code != 200:
-            error_details = response.text
-            print(f"❌ HTTP {response.status_code}: {error_details}")
-            return False
-            
-        result = response.json()
-        statement_id = result.get('statement_id')
-        
-        if not statement_id:
-            print(f"❌ No statement_id in response")
-            return False
-        
-        # Poll for completion
-        return poll_statement_status(host, token, statement_id, timeout_seconds)
+        dependencies[name] = {ref for ref in referenced if ref in names and ref != name}
+    
+    waves = []
+    done = set()
+    remaining = list(table_statements)
+    while remaining:
+        wave = [(name, stmt) for name, stmt in remaining if dependencies[name] <= done]
+        if not wave:
+            # Circular reference - fall back to running the rest in file order
+            wave = remaining
+        waves.append(wave)
+        done.update(name for name, _ in wave)
+        remaining = [item for item in remaining if item not in wave]
+    
+    return waves
+
+def compile_create_plan(sql_file, catalog, schema):
+    """Plan records for `sql_file`: {'table', 'sql', 'wave'} per CREATE TABLE, in file order,
+    then per ALTER TABLE.
+    
+    ALTER TABLE statements bring tables that already existed (and so were
+    left alone by CREATE TABLE IF NOT EXISTS) up to date. They run after
+    every table has been created, a table's ALTERs one wave at a time so
+    they never race on its metadata.
+    """
+    create_statements = []
+    alter_statements = []
+    for stmt in parse_sql_file(sql_file):
+        if stmt.kind == 'CREATE_TABLE':
+            create_statements.append(stmt)
+        elif stmt.kind == 'ALTER_TABLE':
+            alter_statements.append(stmt)
+    table_statements = prepare_create_statements(create_statements, catalog, schema)
+    waves = schedule_waves(table_statements)
+    wave_of = {}
+    for i, wave in enumerate(waves):
+        for name, stmt in wave:
+            wave_of[(name, stmt)] = i
+    for name, stmt in table_statements:
+        yield {'table': name, 'sql': stmt, 'wave': wave_of[(name, stmt)]}
+    alters_seen = {}
+    for name, stmt in prepare_create_statements(alter_statements, catalog, schema):
+        yield {'table': name, 'sql': stmt, 'wave': len(waves) + alters_seen.get(name, 0)}
+        alters_seen[name] = alters_seen.get(name, 0) + 1
+
+def open_create_plan(sql_file, catalog, schema):
+    """The (cached) compiled plan of `sql_file` for `catalog`.`schema`."""
+    return open_plan(
+        'create', sql_file, lambda: compile_create_plan(sql_file, catalog, schema), catalog, schema
+    )
+
+def group_waves(planned):
+    """Group (table_name, statement, wave) tuples into waves of (table_name, statement)."""
+    waves = {}
+    for name, stmt, wave in planned:
+        waves.setdefault(wave, []).append((name, stmt))
+    return [waves[wave] for wave in sorted(waves)]
+
+def run_create_statements_parallel(host, token, warehouse_id, waves, workers,
+                                   on_success=None):
+    """Run CREATE TABLE statements concurrently, one dependency wave at a time."""
+    total = sum(len(wave) for wave in waves)
+    print(f"⚡ Running {total} statements in {len(waves)} wave(s) with {workers} workers\n")
+    
+    success_count = 0
+    completed = 0
+    for wave in waves:
+        with ThreadPoolExecutor(max_workers=min(workers, len(wave))) as executor:
+            futures = {
+                executor.submit(
+                    execute_sql_statement, host, token, warehouse_id, stmt, verbose=True,
+                    table_name=name
+                ): (name, stmt)
+                for name, stmt in wave
+            }
+            for future in as_completed(futures):
+                table_name, stmt = futures[future]
+                completed += 1
+                if future.result():
+                    success_count += 1
+                    if on_success:
+                        on_success(table_name, stmt)
+                    print(f"[{completed}/{total}] Created table: {table_name}")
+                else:
+                    print(f"[{completed}/{total}] ⚠️  Failed to create {table_name}, continuing...")
+    
+    return success_count
+
+def run_create_statements_async(host, token, warehouse_id, waves, max_in_flight,
+                                on_success=None):
+    """Like run_create_statements_parallel, but every statement of a wave is
+    submitted from one event loop instead of a thread each."""
+    import asyncio
+    from async_statement_execution import AsyncStatementExecutor, run_with_cancellation
+    
+    total = sum(len(wave) for wave in waves)
+    print(f"⚡ Running {total} statements in {len(waves)} wave(s), up to {max_in_flight} in flight\n")
+    
+    async def run_waves():
+        success_count = 0
+        completed = 0
+        async with AsyncStatementExecutor(host, token, warehouse_id, max_in_flight) as executor:
+            async def create(name, stmt):
+                return name, stmt, await executor.execute(stmt, table_name=name, verbose=True)
             
-    except requests.Timeout:
-        print(f"❌ Timeout submitting statement")
+            for wave in waves:
+                tasks = [executor.create_task(create(name, stmt)) for name, stmt in wave]
+                for next_done in asyncio.as_completed(tasks):
+                    table_name, stmt, ok = await next_done
+                    completed += 1
+                    if ok:
+                        success_count += 1
+                        if on_success:
+                            on_success(table_name, stmt)
+                        print(f"[{completed}/{total}] Created table: {table_name}")
+                    else:
+                        print(f"[{completed}/{total}] ⚠️  Failed to create {table_name}, continuing...")
+        return success_count
+    
+    return run_with_cancellation(run_waves())
+
+def check_create_delta_tables(sql_file, catalog=None, schema=None):
+    """Compile the plan of `sql_file` without contacting the workspace; True if there is something to create."""
+    if not os.path.isfile(sql_file):
+        print(f"❌ SQL file not found: {sql_file}")
         return False
-    except Exception as e:
-        print(f"❌ Error: {e}")
+    
+    default_catalog, default_schema = plan_target()
+    catalog, schema = catalog or default_catalog, schema or default_schema
+    with open_create_plan(sql_file, catalog, schema) as plan:
+        planned = [(record['table'], record['sql'], record['wave']) for record in plan.records()]
+    if not planned:
+        print(f"❌ No CREATE TABLE statements in {sql_file}")
+        return False
+    
+    waves = group_waves(planned)
+    print(f"✅ {len(planned)} CREATE / ALTER TABLE statements in {sql_file} for `{catalog}`.`{schema}`, "
+          f"{len(waves)} wave(s)")
+    for i, wave in enumerate(waves, 1):
+        print(f"   wave {i}: {', '.join(name for name, _ in wave)}")
+    return True
+
+def create_delta_tables(host, token, warehouse_id, sql_file, workers, ready=None,
+                        catalog=None, schema=None):
+    """Create the schema and every table in `sql_file`; True if all of them exist afterwards.
+    
+    Tables go to `catalog`.`schema` (default: plan_target()). `ready`, if
+    given, is called once the plan is loaded and must return True (e.g. the
+    warehouse has started) before anything is submitted. KeyboardInterrupt
+    propagates after the ledger is saved.
+    """
+    default_catalog, default_schema = plan_target()
+    catalog, schema = catalog or default_catalog, schema or default_schema
+    
+    # Load the compiled plan, parsing the SQL file only if it changed
+    print(f"\n📖 Reading SQL file...")
+    with open_create_plan(sql_file, catalog, schema) as plan:
+        planned = [(record['table'], record['sql'], record['wave']) for record in plan.records()]
+    
+    if ready is not None and not ready():
+        print("❌ SQL warehouse is not available")
+        return False
+    
+    print(f"\n🔨 Creating Delta tables from {sql_file}...\n")
+    
+    # Statements recorded in the ledger by an earlier run are skipped
+    ledger = open_ledger(host)
+    fingerprints = {}
+    
+    def record_applied(table_name, stmt):
+        ledger.record(fingerprints[stmt], stmt)
+    
+    # Create schema first
+    print("[0/6] Creating schema...")
+    schema_stmt = f"CREATE SCHEMA IF NOT EXISTS `{catalog}`.`{schema}`"
+    schema_fingerprint = ledger.next_fingerprint(schema_stmt)
+    if ledger.is_applied(schema_fingerprint):
+        print("⏭️  Schema already created (ledger)")
+    elif execute_sql_statement(host, token, warehouse_id, schema_stmt, verbose=True):
+        ledger.record(schema_fingerprint, schema_stmt)
+    else:
+        print("❌ Failed to create schema")
+        return False
+    
+    print(f"\nFound {len(planned)} CREATE / ALTER TABLE statements\n")
+    
+    pending = []
+    skipped_count = 0
+    for table_name, qualified_stmt, wave in planned:
+        fingerprint = ledger.next_fingerprint(qualified_stmt)
+        if ledger.is_applied(fingerprint):
+            skipped_count += 1
+            continue
+        fingerprints[qualified_stmt] = fingerprint
+        pending.append((table_name, qualified_stmt, wave))
+    waves = group_waves(pending)
+    table_statements = [item for wave in waves for item in wave]
+    
+    if skipped_count:
+        print(f"⏭️  Skipping {skipped_count} unchanged CREATE / ALTER TABLE statements (ledger)\n")
+    
+    try:
+        if use_async_executor() and table_statements:
+            success_count = run_create_statements_async(
+                host, token, warehouse_id, waves, workers,
+                on_success=record_applied
+            )
+        elif workers > 1 and table_statements:
+            success_count = run_create_statements_parallel(
+                host, token, warehouse_id, waves, workers,
+                on_success=record_applied
+            )
+        else:
+            success_count = 0
+            for i, (table_name, qualified_stmt) in enumerate(table_statements, 1):
+                print(f"[{i}/{len(table_statements)}] Creating table: {table_name}")
+                if execute_sql_statement(host, token, warehouse_id, qualified_stmt, verbose=True,
+                                         table_name=table_name):
+                    success_count += 1
+                    record_applied(table_name, qualified_stmt)
+                else:
+                    print(f"⚠️  Failed to create {table_name}, continuing...")
+    finally:
+        ledger.save()
+    success_count += skipped_count
+    
+    print(f"\n{'='*60}")
+    print(f"✅ Applied {success_count}/{len(planned)} CREATE / ALTER TABLE statements successfully")
+    
+    if success_count < len(planned):
+        print(f"⚠️  {len(planned) - success_count} statements failed")
         return False
+    
+    print("🎉 All tables created successfully!")
+    return True
 
 def main():
-    if len(sys.argv) < 4:
-        print("Usage: create_delta_tables_rest.py <workspace_url> <warehouse_id> <sql_file>")
+    args = [arg for arg in sys.argv[1:] if arg != '--check']
+    check = len(args) < len(sys.argv) - 1
+    if len(args) < 3:
+        print("Usage: create_delta_tables_rest.py <workspace_url> <warehouse_id> <sql_file> [workers] [--check]")
         sys.exit(1)
     
-    workspace_url = sys.argv[1]
-    warehouse_id = sys.argv[2]
-    sql_file = sys.argv[3]
+    workspace_url = args[0]
+    warehouse_id = args[1]
+    sql_file = args[2]
+    
+    # Number of concurrent CREATE TABLE statements (1 = sequential)
+    workers = int(args[3]) if len(args) > 3 else int(os.environ.get('DELTA_DDL_WORKERS', '6'))
     
     # Get credentials from environment
     client_id = os.environ.get('DATABRICKS_CLIENT_ID')
     client_secret = os.environ.get('DATABRICKS_CLIENT_SECRET')
     
+    if check:
+        print(f"🔎 Checking {normalize_host(workspace_url)} / warehouse {warehouse_id} with {workers} workers")
+        if not client_id or not client_secret:
+            print("⚠️  DATABRICKS_CLIENT_ID or DATABRICKS_CLIENT_SECRET not set (needed for a real run)")
+        sys.exit(0 if check_create_delta_tables(sql_file) else 1)
+    
     if not client_id or not client_secret:
         print("❌ Missing DATABRICKS_CLIENT_ID or DATABRICKS_CLIENT_SECRET")
         sys.exit(1)
     
-    # Normalize host URL
-    host = workspace_url.rstrip('/')
-    if not host.startswith('http'):
-        host = f"https://{host}"
+    host = normalize_host(workspace_url)
     
     print(f"🔗 Connecting to {host}")
     print(f"   Warehouse ID: {warehouse_id}")
     print(f"   Service Principal: {client_id[:20]}...")
     
+    # Wake the warehouse (fetching the token on the way) while the SQL file is parsed
+    warmup = start_warehouse_warmup(
+        host, get_token_provider(host, client_id, client_secret), warehouse_id
+    )
+    
     # Get OAuth token
     token = get_oauth_token(host, client_id, client_secret)
     
-    print(f"\n🔨 Creating Delta tables from {sql_file}...\n")
-    
-    # Create schema first
-    print("[0/6] Creating schema...")
-    if not execute_sql_statement(
-        host, token, warehouse_id,
-        "CREATE SCHEMA IF NOT EXISTS `afc-mvp`.`fraud-investigation`"
-    ):
-        print("❌ Failed to create schema")
-        sys.exit(1)
-    
-    # Read and parse SQL file
-    print(f"\n📖 Reading SQL file...")
-    with open(sql_file, 'r') as f:
-        sql_content = f.read()
-    
-    # Split by semicolon, filter CREATE TABLE statements
-    statements = [stmt.strip() for stmt in sql_content.split(';') if stmt.strip()]
-    create_statements = [stmt for stmt in statements if 'CREATE TABLE' in stmt.upper()]
-    
-    print(f"Found {len(create_statements)} CREATE TABLE statements\n")
-    
-    success_count = 0
-    for i, stmt in enumerate(create_statements, 1):
-        # Remove comments and normalize whitespace
-        clean_stmt = re.sub(r'--.*$', '', stmt, flags=re.MULTILINE)
-        clean_stmt = re.sub(r'\s+', ' ', clean_stmt).strip()
-        
-        if clean_stmt:
-            # Extract table name for logging
-            table_match = re.search(r'CREATE TABLE[^`]*`?(\w+)`?', clean_stmt, re.IGNORECASE)
-            table_name = table_match.group(1) if table_match else f"table_{i}"
-            
-            # Replace "CREATE TABLE table_name" with fully qualified name
-            # Pattern: CREATE TABLE IF NOT EXISTS table_name -> CREATE TABLE IF NOT EXISTS `catalog`.`schema`.`table_name`
-            qualified_stmt = re.sub(
-                r'(CREATE TABLE\s+(?:IF NOT EXISTS\s+)?)`?(\w+)`?',
-                r'\1`afc-mvp`.`fraud-investigation`.`\2`',
-                clean_stmt,
-                flags=re.IGNORECASE
-            )
-            
-            print(f"[{i}/{len(create_statements)}] Creating table: {table_name}")
-            if execute_sql_statement(host, token, warehouse_id, qualified_stmt + ';'):
-                success_count += 1
-            else:
-                print(f"⚠️  Failed to create {table_name}, continuing...")
-    
-    print(f"\n{'='*60}")
-    print(f"✅ Created {success_count}/{len(create_statements)} Delta tables successfully")
+    try:
+        ok = create_delta_tables(host, token, warehouse_id, sql_file, workers, ready=warmup.wait)
+    except KeyboardInterrupt:
+        print("\n❌ Interrupted")
+        sys.exit(130)
     
-    if success_count < len(create_statements):
-        print(f"⚠️  {len(create_statements) - success_count} tables failed")
+    get_client().print_stats()
+    if not ok:
         sys.exit(1)
-    
-    print("🎉 All tables created successfully!")
 
 if __name__ == "__main__":
-    main()
-
+    with span('script.create_delta_tables'):
+        main()
@@ -0,0 +1,222 @@
+"""
+Shared HTTP client for the Databricks REST provisioning scripts.
+Keeps one pooled keep-alive session per process so token, submit and poll
+calls reuse the same TLS connection to the workspace. requests is only
+imported when the first client is created, so argument checks and SQL
+parsing start without it.
+"""
+
+import os
+import random
+import threading
+import time
+
+# Status codes the workspace returns when it wants us to slow down
+RETRY_STATUS_CODES = (429, 503)
+# Methods that are safe to send twice; any other request is only retried
+# when it provably never reached the server (see request())
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 30.0
+DEFAULT_TIMEOUT_SECONDS = 30
+
+
+def normalize_host(workspace_url):
+    """Workspace URL without a trailing slash, https:// added if no scheme was given."""
+    host = workspace_url.rstrip('/')
+    if not host.startswith('http'):
+        host = f"https://{host}"
+    return host
+
+
+class CallStats:
+    """Running timing totals for one kind of call (token, submit, poll...)."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self.min_seconds = None
+        self.max_seconds = 0.0
+
+    def record(self, elapsed, retries, ok):
+        self.count += 1
+        self.retries += retries
+        if not ok:
+            self.errors += 1
+        self.total_seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+        if self.min_seconds is None or elapsed < self.min_seconds:
+            self.min_seconds = elapsed
+
+    @property
+    def avg_seconds(self):
+        return self.total_seconds / self.count if self.count else 0.0
+
+
+class DatabricksHttpClient:
+    """Pooled requests.Session with 429/503 retries and per-call timing stats."""
+
+    def __init__(self, pool_size=None, max_retries=None,
+                 backoff_seconds=DEFAULT_BACKOFF_SECONDS,
+                 max_backoff_seconds=MAX_BACKOFF_SECONDS,
+                 timeout=DEFAULT_TIMEOUT_SECONDS):
+        if pool_size is None:
+            pool_size = int(os.environ.get('DATABRICKS_HTTP_POOL_SIZE', DEFAULT_POOL_SIZE))
+        if max_retries is None:
+            max_retries = int(os.environ.get('DATABRICKS_HTTP_MAX_RETRIES', DEFAULT_MAX_RETRIES))
+
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.timeout = timeout
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        # Retries are handled in request() so they can be timed and jittered
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=0
+        )
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._connection_error = requests.ConnectionError
+        self._connect_timeout = requests.ConnectTimeout
+        from urllib3.exceptions import NewConnectionError
+        self._new_connection_error = NewConnectionError
+
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    def backoff(self, attempt, response=None):
+        """Seconds to sleep before retry `attempt` (full jitter, honours Retry-After)."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.max_backoff_seconds)
+        ceiling = min(self.max_backoff_seconds, self.backoff_seconds * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def is_connect_failure(self, error):
+        """True if a ConnectionError happened before the request was sent
+        (connect timeout, connection refused, DNS failure)."""
+        if isinstance(error, self._connect_timeout):
+            return True
+        reason = error.args[0] if error.args else None
+        # requests wraps urllib3's MaxRetryError, whose .reason is the real cause
+        return isinstance(getattr(reason, 'reason', reason), self._new_connection_error)
+
+    def request(self, method, url, label=None, idempotent=None, token=None, **kwargs):
+        """Send a request, retrying on 429/503 and dropped keep-alive connections.
+
+        A dropped connection may have lost the request after the server acted
+        on it, so a non-idempotent request (by default any POST) is retried
+        only after connect-phase failures. Pass idempotent=True for POSTs that
+        are safe to repeat.
+
+        `token` (a raw access token or a TokenProvider) is sent as the bearer
+        token. If the workspace rejects a provider's token with 401 (revoked,
+        or a stale cached token), it is invalidated and the request is sent
+        once more with a freshly fetched one.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        label = label or method.upper()
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        headers = dict(kwargs.pop('headers', None) or {})
+        reauthenticated = False
+
+        # Rewind file-like bodies (Files API uploads) before each retry
+        body = kwargs.get('data')
+        body_start = body.tell() if hasattr(body, 'seek') else None
+
+        start = time.perf_counter()
+        attempt = 0
+        response = None
+        try:
+            while True:
+                if attempt and body_start is not None:
+                    body.seek(body_start)
+                if token is not None:
+                    # Resolved per attempt so a retry picks up a refreshed token
+                    access_token = token.token() if hasattr(token, 'token') else token
+                    headers['Authorization'] = f"Bearer {access_token}"
+                try:
+                    response = self.session.request(method, url, headers=headers, **kwargs)
+                except self._connection_error as e:
+                    if attempt >= self.max_retries or not (idempotent or self.is_connect_failure(e)):
+                        raise
+                    time.sleep(self.backoff(attempt))
+                    attempt += 1
+                    continue
+
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    time.sleep(self.backoff(attempt, response))
+                    attempt += 1
+                    continue
+
+                # A rejected request was never acted on, so it is safe to resend
+                if response.status_code == 401 and hasattr(token, 'invalidate') and not reauthenticated:
+                    token.invalidate()
+                    reauthenticated = True
+                    attempt += 1
+                    continue
+
+                return response
+        finally:
+            ok = response is not None and response.status_code < 400
+            self.record(label, time.perf_counter() - start, attempt, ok)
+
+    def get(self, url, label=None, **kwargs):
+        return self.request('GET', url, label=label, **kwargs)
+
+    def post(self, url, label=None, **kwargs):
+        return self.request('POST', url, label=label, **kwargs)
+
+    def record(self, label, elapsed, retries, ok):
+        """Add one call to the per-label stats (also used by the asyncio executor)."""
+        with self._stats_lock:
+            stats = self._stats.setdefault(label, CallStats())
+            stats.record(elapsed, retries, ok)
+
+    def stats(self):
+        """Snapshot of per-label call statistics."""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def print_stats(self):
+        """Print a short per-label timing summary."""
+        stats = self.stats()
+        if not stats:
+            return
+        print("\n⏱️  HTTP call stats:")
+        for label, s in sorted(stats.items()):
+            print(
+                f"   {label:<8} calls={s.count:<5} avg={s.avg_seconds * 1000:.0f}ms "
+                f"min={(s.min_seconds or 0) * 1000:.0f}ms max={s.max_seconds * 1000:.0f}ms "
+                f"total={s.total_seconds:.1f}s retries={s.retries} errors={s.errors}"
+            )
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide shared client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = DatabricksHttpClient()
+        return _client
@@ -0,0 +1,210 @@
+"""
+Coalesce seed INSERT statements into size-bounded multi-row INSERTs.
+Rows are grouped per target table (and column list) so each table needs
+only a handful of warehouse round-trips instead of one per statement.
+"""
+
+import os
+import re
+
+DEFAULT_MAX_ROWS = 1000
+# Well under the Statement Execution API's 16 MiB statement limit
+DEFAULT_MAX_BYTES = 1024 * 1024
+
+INSERT_INTO_PATTERN = re.compile(r'^\s*INSERT\s+INTO\s', re.IGNORECASE)
+# What follows the target table of a plain INSERT ... VALUES
+VALUES_PATTERN = re.compile(r'^\s*(\([^)]*\))?\s*VALUES\s*(.*)$', re.IGNORECASE | re.DOTALL)
+
+
+class InsertBatch:
+    """One multi-row INSERT for a single table.
+
+    `sources` holds the ordinals of the input statements whose rows it carries.
+    """
+
+    def __init__(self, table_name, statement, row_count, sources=()):
+        self.table_name = table_name
+        self.statement = statement
+        self.row_count = row_count
+        self.sources = set(sources)
+
+
+def split_values_tuples(values_text):
+    """Yield each top-level `( ... )` tuple from a VALUES list.
+
+    Commas and parentheses inside string literals and nested function calls
+    such as TIMESTAMP('...') are left alone.
+    """
+    depth = 0
+    start = None
+    quote = None
+    i = 0
+    while i < len(values_text):
+        ch = values_text[i]
+        if quote:
+            if ch == '\\':
+                i += 1
+            elif ch == quote:
+                # '' is an escaped quote inside a literal
+                if i + 1 < len(values_text) and values_text[i + 1] == quote:
+                    i += 1
+                else:
+                    quote = None
+        elif ch in ("'", '"'):
+            quote = ch
+        elif ch == '(':
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+            if depth == 0 and start is not None:
+                yield values_text[start:i + 1]
+                start = None
+        i += 1
+
+    if quote or depth:
+        raise ValueError("Unbalanced quotes or parentheses in VALUES list")
+
+
+def split_row_values(row_text):
+    """Split one `(a, 'b, c', f(x, y))` tuple into its top-level value expressions."""
+    inner = row_text.strip()
+    if inner.startswith('(') and inner.endswith(')'):
+        inner = inner[1:-1]
+
+    values = []
+    depth = 0
+    quote = None
+    start = 0
+    i = 0
+    while i < len(inner):
+        ch = inner[i]
+        if quote:
+            if ch == '\\':
+                i += 1
+            elif ch == quote:
+                if i + 1 < len(inner) and inner[i + 1] == quote:
+                    i += 1
+                else:
+                    quote = None
+        elif ch in ("'", '"'):
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            values.append(inner[start:i].strip())
+            start = i + 1
+        i += 1
+    values.append(inner[start:].strip())
+    return values
+
+
+def parse_insert(statement):
+    """Split `INSERT INTO t (cols) VALUES (...), (...)` into (table, columns, rows).
+
+    `table` is the target as written, its name parts joined with dots:
+    `claims`, or `afc-mvp.fraud-investigation.claims` for a qualified one.
+    Returns None for INSERTs that aren't a plain VALUES list (INSERT ... SELECT).
+    """
+    parsed = _parse_values_insert(statement)
+    if parsed is None:
+        return None
+    stmt, columns, rows = parsed
+    return '.'.join(stmt.target_parts), columns, rows
+
+
+def _parse_values_insert(statement):
+    # (SqlStatement, columns, rows) or None; imported here as sql_script_parser imports this module
+    from sql_script_parser import classify
+
+    stmt = classify(statement.strip().rstrip(';'))
+    if stmt.kind != 'INSERT' or stmt.target_span is None or not INSERT_INTO_PATTERN.match(stmt.text):
+        return None
+    match = VALUES_PATTERN.match(stmt.text[stmt.target_span[1]:])
+    if not match:
+        return None
+    columns = match.group(1) or ''
+    try:
+        rows = list(split_values_tuples(match.group(2)))
+    except ValueError:
+        return None
+    if not rows:
+        return None
+    return stmt, columns, rows
+
+
+def batch_limits_from_env():
+    """Read SEED_BATCH_MAX_ROWS / SEED_BATCH_MAX_BYTES, falling back to defaults."""
+    max_rows = int(os.environ.get('SEED_BATCH_MAX_ROWS', DEFAULT_MAX_ROWS))
+    max_bytes = int(os.environ.get('SEED_BATCH_MAX_BYTES', DEFAULT_MAX_BYTES))
+    return max_rows, max_bytes
+
+
+def _emit(table_ref, columns, rows):
+    head = f"INSERT INTO {table_ref} {columns} VALUES " if columns else f"INSERT INTO {table_ref} VALUES "
+    return head + ", ".join(rows) + ";"
+
+
+def _table_reference(stmt, catalog, schema):
+    """Reference to a statement's target: bare names are qualified, qualified ones kept as written."""
+    parts = stmt.target_parts
+    if len(parts) == 1:
+        return f"`{catalog}`.`{schema}`.`{parts[0]}`"
+    start, end = stmt.target_span
+    return stmt.text[start:end]
+
+
+def iter_batches(statements, catalog, schema, max_rows=DEFAULT_MAX_ROWS, max_bytes=DEFAULT_MAX_BYTES):
+    """Stream INSERT statements into bounded multi-row INSERTs, grouped per table.
+
+    Bare table names are qualified with `catalog`.`schema`; names that are
+    already qualified are kept. A batch is yielded as soon as its table's
+    buffer reaches the row or byte limit, so only one partial batch per
+    table is held in memory; leftovers are flushed at the end. Batches for a
+    table keep the original row order. A statement's rows are never split
+    across batches (a statement over the limits becomes a batch of its own),
+    so a failed batch leaves no statement partly applied. Statements that
+    can't be parsed are passed through with only their target qualified.
+    """
+    from sql_script_parser import classify
+
+    # (table, columns) -> [rows, bytes, sources, reference], so differing column lists never get merged
+    buffers = {}
+
+    def flush(key):
+        table_name, columns = key
+        rows, _, sources, reference = buffers[key]
+        buffers[key] = [[], 0, set(), reference]
+        return InsertBatch(table_name, _emit(reference, columns, rows), len(rows), sources)
+
+    for ordinal, statement in enumerate(statements):
+        parsed = _parse_values_insert(statement)
+        if parsed is None:
+            stmt = classify(statement.strip().rstrip(';'))
+            table_name = '.'.join(stmt.target_parts) if stmt.target_span else 'unknown'
+            # Keep row order: anything buffered for this table goes first
+            for key in [k for k in buffers if k[0] == table_name and buffers[k][0]]:
+                yield flush(key)
+            yield InsertBatch(table_name, stmt.qualified(catalog, schema) + ';', 0, {ordinal})
+            continue
+
+        stmt, columns, rows = parsed
+        table_name = '.'.join(stmt.target_parts)
+        key = (table_name, columns)
+        if key not in buffers:
+            buffers[key] = [[], 0, set(), _table_reference(stmt, catalog, schema)]
+        overhead = len(_emit(buffers[key][3], columns, []))
+        statement_bytes = sum(len(row.encode('utf-8')) + 2 for row in rows)
+        buffered, size = buffers[key][:2]
+        if buffered and (len(buffered) + len(rows) > max_rows or overhead + size + statement_bytes > max_bytes):
+            yield flush(key)
+        buffers[key][0].extend(rows)
+        buffers[key][1] += statement_bytes
+        buffers[key][2].add(ordinal)
+
+    for key in list(buffers):
+        if buffers[key][0]:
+            yield flush(key)
@@ -1,13 +1,31 @@
 # Terraform module to create operational Delta tables in Unity Catalog
 # Used by the fraud case management application for CRUD operations
 
+locals {
+  # Seed files are staged in a volume of the target schema unless one is given
+  seed_volume_path = var.seed_volume_path != "" ? var.seed_volume_path : "/Volumes/${var.catalog_name}/${var.schema_name}/seed_staging"
+}
+
 # Execute schema creation SQL
 resource "null_resource" "create_app_delta_tables" {
+  count = var.provisioning_runner ? 0 : 1
+
   # Trigger on SQL file changes
   triggers = {
     schema_file = filemd5("${path.root}/sql/app_delta_schema.sql")
     seed_file   = filemd5("${path.root}/sql/app_delta_seed.sql")
     python_script = filemd5("${path.module}/create_delta_tables.py")
+    http_client   = filemd5("${path.module}/databricks_http_client.py")
+    execution     = filemd5("${path.module}/statement_execution.py")
+    token_cache   = filemd5("${path.module}/oauth_token_provider.py")
+    sql_parser    = filemd5("${path.module}/sql_script_parser.py")
+    batching      = filemd5("${path.module}/insert_batching.py")
+    ledger        = filemd5("${path.module}/statement_ledger.py")
+    tracing       = filemd5("${path.module}/provisioning_trace.py")
+    warehouse     = filemd5("${path.module}/warehouse_readiness.py")
+    async_executor = filemd5("${path.module}/async_statement_execution.py")
+    statement_plan = filemd5("${path.module}/statement_plan.py")
+    target         = "${var.catalog_name}.${var.schema_name}"
   }
 
   # Execute Python script to create tables using REST API (reliable for headless execution)
@@ -15,35 +33,138 @@ resource "null_resource" "create_app_delta_tables" {
     command = <<-EOT
       export DATABRICKS_CLIENT_ID="${var.databricks_client_id}"
       export DATABRICKS_CLIENT_SECRET="${var.databricks_client_secret}"
+      export DATABRICKS_TOKEN_CACHE="${var.token_cache}"
+      export PROVISIONING_LEDGER_FILE="${var.statement_ledger ? "${path.root}/.provisioning-ledger.json" : ""}"
+      export DATABRICKS_WAREHOUSE_WARMUP="${var.warehouse_start_timeout > 0 ? "on" : "off"}"
+      export DATABRICKS_WAREHOUSE_START_TIMEOUT="${var.warehouse_start_timeout}"
+      export DATABRICKS_SQL_EXECUTOR="${var.statement_executor}"
+      export DATABRICKS_CATALOG="${var.catalog_name}"
+      export DATABRICKS_SCHEMA="${var.schema_name}"
+      export PROVISIONING_PLAN_DIR="${var.statement_plan_cache ? "${path.root}/.provisioning-plans" : ""}"
       
       python3 ${path.module}/create_delta_tables_rest.py \
         "${var.workspace_url}" \
         "${var.sql_warehouse_id}" \
-        "${path.root}/sql/app_delta_schema.sql"
+        "${path.root}/sql/app_delta_schema.sql" \
+        "${var.ddl_workers}"
     EOT
   }
 }
 
 # Execute data seeding SQL
 resource "null_resource" "seed_app_delta_tables" {
+  count = var.provisioning_runner ? 0 : 1
+
   # Trigger on seed file changes
   triggers = {
     seed_file = filemd5("${path.root}/sql/app_delta_seed.sql")
     python_script = filemd5("${path.module}/seed_delta_tables.py")
+    http_client   = filemd5("${path.module}/databricks_http_client.py")
+    execution     = filemd5("${path.module}/statement_execution.py")
+    token_cache   = filemd5("${path.module}/oauth_token_provider.py")
+    sql_parser    = filemd5("${path.module}/sql_script_parser.py")
+    ledger        = filemd5("${path.module}/statement_ledger.py")
+    tracing       = filemd5("${path.module}/provisioning_trace.py")
+    batching      = filemd5("${path.module}/insert_batching.py")
+    warehouse     = filemd5("${path.module}/warehouse_readiness.py")
+    async_executor = filemd5("${path.module}/async_statement_execution.py")
+    copy_loader   = filemd5("${path.module}/copy_into_loader.py")
+    statement_plan = filemd5("${path.module}/statement_plan.py")
+    target         = "${var.catalog_name}.${var.schema_name}"
   }
 
   provisioner "local-exec" {
     command = <<-EOT
       export DATABRICKS_CLIENT_ID="${var.databricks_client_id}"
       export DATABRICKS_CLIENT_SECRET="${var.databricks_client_secret}"
+      export DATABRICKS_TOKEN_CACHE="${var.token_cache}"
+      export PROVISIONING_LEDGER_FILE="${var.statement_ledger ? "${path.root}/.provisioning-ledger.json" : ""}"
+      export DATABRICKS_WAREHOUSE_WARMUP="${var.warehouse_start_timeout > 0 ? "on" : "off"}"
+      export DATABRICKS_WAREHOUSE_START_TIMEOUT="${var.warehouse_start_timeout}"
+      export DATABRICKS_SQL_EXECUTOR="${var.statement_executor}"
+      export DATABRICKS_CATALOG="${var.catalog_name}"
+      export DATABRICKS_SCHEMA="${var.schema_name}"
+      export PROVISIONING_PLAN_DIR="${var.statement_plan_cache ? "${path.root}/.provisioning-plans" : ""}"
+      export SEED_BATCH_MAX_ROWS="${var.seed_batch_max_rows}"
+      export SEED_BATCH_MAX_BYTES="${var.seed_batch_max_bytes}"
+      export SEED_MODE="${var.seed_mode}"
+      export SEED_VOLUME_PATH="${local.seed_volume_path}"
+      export SEED_DATA_DIR="${var.seed_data_dir}"
       
       python3 ${path.module}/seed_delta_tables_rest.py \
         "${var.workspace_url}" \
         "${var.sql_warehouse_id}" \
-        "${path.root}/sql/app_delta_seed.sql"
+        "${path.root}/sql/app_delta_seed.sql" \
+        "${var.seed_workers}"
     EOT
   }
 
   depends_on = [null_resource.create_app_delta_tables]
 }
 
+# Both steps in one process (provisioning_runner.py), sharing the token,
+# HTTP pool and warehouse warm-up; DDL re-runs on seed changes are skipped
+# by the statement ledger
+resource "null_resource" "provision_app_delta_tables" {
+  count = var.provisioning_runner ? 1 : 0
+
+  triggers = {
+    schema_file    = filemd5("${path.root}/sql/app_delta_schema.sql")
+    seed_file      = filemd5("${path.root}/sql/app_delta_seed.sql")
+    runner         = filemd5("${path.module}/provisioning_runner.py")
+    create_script  = filemd5("${path.module}/create_delta_tables_rest.py")
+    seed_script    = filemd5("${path.module}/seed_delta_tables_rest.py")
+    http_client    = filemd5("${path.module}/databricks_http_client.py")
+    execution      = filemd5("${path.module}/statement_execution.py")
+    token_cache    = filemd5("${path.module}/oauth_token_provider.py")
+    sql_parser     = filemd5("${path.module}/sql_script_parser.py")
+    batching       = filemd5("${path.module}/insert_batching.py")
+    ledger         = filemd5("${path.module}/statement_ledger.py")
+    tracing        = filemd5("${path.module}/provisioning_trace.py")
+    warehouse      = filemd5("${path.module}/warehouse_readiness.py")
+    async_executor = filemd5("${path.module}/async_statement_execution.py")
+    copy_loader    = filemd5("${path.module}/copy_into_loader.py")
+    statement_plan = filemd5("${path.module}/statement_plan.py")
+    target         = "${var.catalog_name}.${var.schema_name}"
+  }
+
+  provisioner "local-exec" {
+    command = <<-EOT
+      export DATABRICKS_CLIENT_ID="${var.databricks_client_id}"
+      export DATABRICKS_CLIENT_SECRET="${var.databricks_client_secret}"
+      export DATABRICKS_TOKEN_CACHE="${var.token_cache}"
+      export PROVISIONING_LEDGER_FILE="${var.statement_ledger ? "${path.root}/.provisioning-ledger.json" : ""}"
+      export DATABRICKS_WAREHOUSE_WARMUP="${var.warehouse_start_timeout > 0 ? "on" : "off"}"
+      export DATABRICKS_WAREHOUSE_START_TIMEOUT="${var.warehouse_start_timeout}"
+      export DATABRICKS_SQL_EXECUTOR="${var.statement_executor}"
+      export DATABRICKS_CATALOG="${var.catalog_name}"
+      export DATABRICKS_SCHEMA="${var.schema_name}"
+      export PROVISIONING_PLAN_DIR="${var.statement_plan_cache ? "${path.root}/.provisioning-plans" : ""}"
+      export SEED_BATCH_MAX_ROWS="${var.seed_batch_max_rows}"
+      export SEED_BATCH_MAX_BYTES="${var.seed_batch_max_bytes}"
+      export SEED_MODE="${var.seed_mode}"
+      export SEED_VOLUME_PATH="${local.seed_volume_path}"
+      export SEED_DATA_DIR="${var.seed_data_dir}"
+      
+      python3 ${path.module}/provisioning_runner.py \
+        "${var.workspace_url}" \
+        "${var.sql_warehouse_id}" \
+        --steps delta_ddl delta_seed \
+        --schema-file "${path.root}/sql/app_delta_schema.sql" \
+        --seed-file "${path.root}/sql/app_delta_seed.sql" \
+        --ddl-workers "${var.ddl_workers}" \
+        --seed-workers "${var.seed_workers}"
+    EOT
+  }
+}
+
+# The per-script resources gained a count; keep their existing state
+moved {
+  from = null_resource.create_app_delta_tables
+  to   = null_resource.create_app_delta_tables[0]
+}
+
+moved {
+  from = null_resource.seed_app_delta_tables
+  to   = null_resource.seed_app_delta_tables[0]
+}
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Multi-environment provisioning orchestrator.
+Reads a list of environments (workspace, warehouse, catalog/schema, Lakebase
+instance, credentials) from a tfvars-style file and runs the provisioning
+plan (Delta DDL, Delta seed, Lakebase app_users bootstrap) against all of
+them at once, at most --max-parallel at a time. Each environment gets its
+own provisioning_runner.py process with its own credentials, target,
+statement ledger and log file, so one environment's settings, failures or
+crash never leak into another. The steps are dominated by waiting on the
+warehouse and Lakebase, so a global rollout takes about as long as the
+slowest environment.
+
+Usage:
+    multi_environment_runner.py environments.tfvars [--only dev stage] [--steps ...]
+                                [--max-parallel 8] [--state-dir DIR] [--json FILE] [--check]
+"""
+
+import argparse
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from provisioning_trace import span
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+RUNNER = os.path.join(MODULE_DIR, 'provisioning_runner.py')
+STEPS = ('delta_ddl', 'delta_seed', 'lakebase')
+
+DEFAULT_MAX_PARALLEL = 8
+DEFAULT_STATE_DIR = '.provisioning-environments'
+# Lines of a failed environment's log echoed under the summary
+LOG_TAIL_LINES = 15
+
+# Attributes an environment (or `defaults`) may set; anything else is a typo
+ENVIRONMENT_KEYS = (
+    'name', 'workspace_url', 'warehouse_id', 'catalog', 'schema', 'steps',
+    'lakebase_host', 'lakebase_database', 'ddl_workers', 'seed_workers',
+    'schema_file', 'seed_file', 'lakebase_sql_file', 'app_users_seed_file',
+    'client_id_env', 'client_secret_env', 'statement_ledger', 'env',
+)
+PATH_KEYS = ('schema_file', 'seed_file', 'lakebase_sql_file', 'app_users_seed_file')
+# Variables the steps read that describe one target (where to provision, what
+# to load, which state to reuse): runners only get them from their
+# environment's attributes or `env` block, never from the parent process
+TARGET_VARIABLES = (
+    'DATABRICKS_CATALOG', 'DATABRICKS_SCHEMA',
+    'LAKEBASE_HOST', 'LAKEBASE_DATABASE', 'LAKEBASE_SYNC_SCHEMA', 'APP_USERS_SEED_FILE',
+    'SEED_MODE', 'SEED_DATA_DIR', 'SEED_VOLUME_PATH', 'PROVISIONING_PLAN_DIR',
+)
+NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+TFVARS_TOKEN = re.compile(r'''
+    (?P<space>\s+|\#[^\n]*|//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:[^"\\\n]|\\.)*")
+  | (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_-]*)
+  | (?P<punct>[=:{}\[\],])
+''', re.VERBOSE | re.DOTALL)
+STRING_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\'}
+
+
+def _tfvars_tokens(text, source):
+    position = 0
+    line = 1
+    while position < len(text):
+        match = TFVARS_TOKEN.match(text, position)
+        if not match:
+            raise ValueError(f"{source}:{line}: unexpected {text[position]!r}")
+        kind = match.lastgroup
+        if kind != 'space':
+            yield kind, match.group(), line
+        line += match.group().count('\n')
+        position = match.end()
+
+
+def _unquote(token, source, line):
+    body = token[1:-1]
+    if '${' in body:
+        raise ValueError(f"{source}:{line}: interpolation is not supported in environment files")
+    return re.sub(r'\\(.)', lambda m: STRING_ESCAPES.get(m.group(1), m.group()), body)
+
+
+def parse_tfvars(text, source='<tfvars>'):
+    """Parse the literal subset of HCL used by .tfvars files into a dict.
+
+    Supports `name = value` attributes whose values are strings, numbers,
+    true/false/null, lists and objects, plus #, // and /* */ comments.
+    Expressions and interpolation are not evaluated.
+    """
+    tokens = list(_tfvars_tokens(text, source))
+    position = [0]
+
+    def peek():
+        return tokens[position[0]] if position[0] < len(tokens) else (None, None, tokens[-1][2] if tokens else 1)
+
+    def take(expected=None):
+        kind, value, line = peek()
+        if kind is None:
+            raise ValueError(f"{source}:{line}: unexpected end of file")
+        if expected is not None and value not in expected:
+            raise ValueError(f"{source}:{line}: expected {' or '.join(expected)}, got {value!r}")
+        position[0] += 1
+        return kind, value, line
+
+    def key():
+        kind, value, line = take()
+        if kind == 'string':
+            return _unquote(value, source, line)
+        if kind != 'ident':
+            raise ValueError(f"{source}:{line}: expected an attribute name, got {value!r}")
+        return value
+
+    def value():
+        kind, token, line = take()
+        if kind == 'string':
+            return _unquote(token, source, line)
+        if kind == 'number':
+            return float(token) if any(c in token for c in '.eE') else int(token)
+        if kind == 'ident' and token in ('true', 'false', 'null'):
+            return {'true': True, 'false': False, 'null': None}[token]
+        if token == '[':
+            items = []
+            while peek()[1] != ']':
+                items.append(value())
+                if peek()[1] == ',':
+                    take()
+            take([']'])
+            return items
+        if token == '{':
+            attributes = {}
+            while peek()[1] != '}':
+                name = key()
+                take(['=', ':'])
+                attributes[name] = value()
+                if peek()[1] == ',':
+                    take()
+            take(['}'])
+            return attributes
+        raise ValueError(f"{source}:{line}: unexpected {token!r}")
+
+    document = {}
+    while peek()[0] is not None:
+        name = key()
+        take(['='])
+        document[name] = value()
+    return document
+
+
+class Environment:
+    """One target of the rollout: where to provision and with which settings."""
+
+    def __init__(self, attributes, base_dir):
+        unknown = sorted(set(attributes) - set(ENVIRONMENT_KEYS))
+        if unknown:
+            raise ValueError(f"unknown attribute(s) {', '.join(unknown)}")
+        self.name = attributes.get('name') or ''
+        if not NAME_PATTERN.match(self.name):
+            raise ValueError(f"invalid or missing name {self.name!r}")
+        for required in ('workspace_url', 'warehouse_id'):
+            if not attributes.get(required):
+                raise ValueError(f"{self.name}: {required} is required")
+
+        self.workspace_url = attributes['workspace_url']
+        self.warehouse_id = attributes['warehouse_id']
+        self.catalog = attributes.get('catalog')
+        self.schema = attributes.get('schema')
+        self.steps = list(attributes.get('steps') or STEPS)
+        unknown_steps = sorted(set(self.steps) - set(STEPS))
+        if unknown_steps:
+            raise ValueError(f"{self.name}: unknown step(s) {', '.join(unknown_steps)}")
+        self.lakebase_host = attributes.get('lakebase_host')
+        if 'lakebase' in self.steps and not self.lakebase_host:
+            # The bootstrap script's built-in default host belongs to one workspace only
+            raise ValueError(f"{self.name}: lakebase_host is required for the lakebase step")
+        self.lakebase_database = attributes.get('lakebase_database')
+        self.ddl_workers = attributes.get('ddl_workers')
+        self.seed_workers = attributes.get('seed_workers')
+        self.paths = {
+            key: os.path.normpath(os.path.join(base_dir, attributes[key]))
+            for key in PATH_KEYS if attributes.get(key)
+        }
+        self.client_id_env = attributes.get('client_id_env', 'DATABRICKS_CLIENT_ID')
+        self.client_secret_env = attributes.get('client_secret_env', 'DATABRICKS_CLIENT_SECRET')
+        self.statement_ledger = attributes.get('statement_ledger', True)
+        self.env = {str(k): str(v) for k, v in (attributes.get('env') or {}).items()}
+
+    def missing_credentials(self):
+        """Names of the credential environment variables that aren't set."""
+        return [name for name in (self.client_id_env, self.client_secret_env) if not os.environ.get(name)]
+
+
+def load_environments(path):
+    """Environments from a .tfvars (HCL literals) or .json file.
+
+    The file has an `environments` list of objects and an optional
+    `defaults` object whose attributes apply to every environment that
+    doesn't set them. Relative file paths are resolved against the file's
+    directory.
+    """
+    with open(path, 'r') as f:
+        text = f.read()
+    document = json.loads(text) if path.lower().endswith('.json') else parse_tfvars(text, path)
+    defaults = document.get('defaults') or {}
+    entries = document.get('environments')
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path}: expected a non-empty `environments` list")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    environments = []
+    for number, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"{path}: environment #{number} is not an object")
+        try:
+            environments.append(Environment(dict(defaults, **entry), base_dir))
+        except ValueError as e:
+            raise ValueError(f"{path}: environment #{number}: {e}") from None
+
+    names = [environment.name for environment in environments]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"{path}: duplicate environment name(s) {', '.join(duplicates)}")
+    return environments
+
+
+def environment_variables(environment, state_dir):
+    """Process environment for one environment's runner: its credentials, target and state."""
+    env = dict(os.environ)
+    # Never inherit another environment's target or credentials by accident
+    env['DATABRICKS_CLIENT_ID'] = os.environ.get(environment.client_id_env, '')
+    env['DATABRICKS_CLIENT_SECRET'] = os.environ.get(environment.client_secret_env, '')
+    env['DATABRICKS_HOST'] = environment.workspace_url
+    for name in TARGET_VARIABLES:
+        env.pop(name, None)
+    if environment.catalog:
+        env['DATABRICKS_CATALOG'] = environment.catalog
+    if environment.schema:
+        env['DATABRICKS_SCHEMA'] = environment.schema
+    # The ledger is rewritten as a whole, so concurrent runners each need their own
+    env['PROVISIONING_LEDGER_FILE'] = (
+        os.path.join(state_dir, 'ledger.json') if environment.statement_ledger else ''
+    )
+    parent_trace = os.environ.get('PROVISIONING_TRACE_ID') or f"pid-{os.getpid()}"
+    env['PROVISIONING_TRACE_ID'] = f"{parent_trace}/{environment.name}"
+    env.update(environment.env)
+    return env
+
+
+def runner_command(environment, result_file, steps=None, check=False):
+    """provisioning_runner.py command line for one environment."""
+    command = [sys.executable, RUNNER, environment.workspace_url, environment.warehouse_id,
+               '--steps'] + list(steps or environment.steps) + ['--result-file', result_file]
+    options = [
+        ('--lakebase-host', environment.lakebase_host),
+        ('--lakebase-database', environment.lakebase_database),
+        ('--ddl-workers', environment.ddl_workers),
+        ('--seed-workers', environment.seed_workers),
+        ('--schema-file', environment.paths.get('schema_file')),
+        ('--seed-file', environment.paths.get('seed_file')),
+        ('--lakebase-sql-file', environment.paths.get('lakebase_sql_file')),
+        ('--app-users-seed-file', environment.paths.get('app_users_seed_file')),
+    ]
+    for flag, value in options:
+        if value is not None:
+            command += [flag, str(value)]
+    if check:
+        command.append('--check')
+    return command
+
+
+class EnvironmentResult:
+    """Outcome of one environment's runner process."""
+
+    def __init__(self, environment, status, seconds, steps=None, log_file=None, returncode=None):
+        self.environment = environment
+        self.status = status
+        self.seconds = seconds
+        self.steps = steps or {}
+        self.log_file = log_file
+        self.returncode = returncode
+
+    def as_dict(self):
+        return {
+            'name': self.environment.name,
+            'workspace_url': self.environment.workspace_url,
+            'status': self.status,
+            'seconds': round(self.seconds, 3),
+            'returncode': self.returncode,
+            'steps': self.steps,
+            'log_file': self.log_file,
+        }
+
+
+class Rollout:
+    """Runs one runner process per environment with bounded fan-out."""
+
+    def __init__(self, environments, state_dir, max_parallel=DEFAULT_MAX_PARALLEL, steps=None, check=False):
+        self.environments = environments
+        self.state_dir = state_dir
+        self.max_parallel = max(1, min(max_parallel, len(environments)))
+        self.steps = steps
+        self.check = check
+        self._processes = {}
+        self._lock = threading.Lock()
+        self._interrupted = False
+
+    def _steps_for(self, environment):
+        if not self.steps:
+            return environment.steps
+        return [step for step in environment.steps if step in self.steps]
+
+    def run_environment(self, environment):
+        steps = self._steps_for(environment)
+        if not steps:
+            return EnvironmentResult(environment, 'skipped', 0.0)
+
+        state_dir = os.path.join(self.state_dir, environment.name)
+        os.makedirs(state_dir, exist_ok=True)
+        suffix = '-check' if self.check else ''
+        log_file = os.path.join(state_dir, f"runner{suffix}.log")
+        result_file = os.path.join(state_dir, f"result{suffix}.json")
+        if os.path.exists(result_file):
+            os.unlink(result_file)
+
+        start = time.time()
+        with span('environment.run', environment=environment.name, check=self.check) as trace:
+            with open(log_file, 'w') as log, self._lock:
+                if self._interrupted:
+                    return EnvironmentResult(environment, 'skipped', 0.0, log_file=log_file)
+                print(f"▶️  {environment.name}: {environment.workspace_url} ({', '.join(steps)})")
+                process = subprocess.Popen(
+                    runner_command(environment, os.path.abspath(result_file), steps, self.check),
+                    env=environment_variables(environment, os.path.abspath(state_dir)),
+                    stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                    cwd=os.getcwd(), start_new_session=True
+                )
+                self._processes[environment.name] = process
+            try:
+                returncode = process.wait()
+            finally:
+                with self._lock:
+                    self._processes.pop(environment.name, None)
+            elapsed = time.time() - start
+
+            try:
+                with open(result_file, 'r') as f:
+                    step_results = json.load(f).get('steps', {})
+            except (OSError, ValueError):
+                step_results = {}
+            if returncode == 0:
+                status = 'ok'
+            elif returncode in (130, -signal.SIGINT):
+                status = 'interrupted'
+            else:
+                status = 'failed'
+            trace.set(status=status, returncode=returncode)
+
+        icon = '✅' if status == 'ok' else '❌'
+        print(f"{icon} {environment.name}: {status} ({elapsed:.1f}s)")
+        return EnvironmentResult(environment, status, elapsed, step_results, log_file, returncode)
+
+    def interrupt(self):
+        """Stop starting environments and pass Ctrl-C on to the running runners."""
+        with self._lock:
+            self._interrupted = True
+            processes = list(self._processes.values())
+        for process in processes:
+            # Each runner cancels its in-flight statements on SIGINT
+            try:
+                process.send_signal(signal.SIGINT)
+            except OSError:
+                pass
+
+    def run(self):
+        """Run every environment; returns EnvironmentResults in configuration order."""
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            futures = {executor.submit(self.run_environment, environment): environment
+                       for environment in self.environments}
+            try:
+                for future in as_completed(futures):
+                    environment = futures[future]
+                    try:
+                        results[environment.name] = future.result()
+                    except Exception as e:
+                        print(f"❌ {environment.name}: {e}")
+                        results[environment.name] = EnvironmentResult(environment, 'failed', 0.0)
+            except KeyboardInterrupt:
+                print("\n❌ Interrupted, stopping the running environments...")
+                self.interrupt()
+                for future in futures:
+                    future.cancel()
+                raise
+        return [results[environment.name] for environment in self.environments]
+
+
+def print_summary(results, wall_seconds):
+    """Aggregated table: one row per environment, one column per step."""
+    name_width = max([len('environment')] + [len(r.environment.name) for r in results])
+    print(f"\n{'='*60}")
+    print(f"{'environment':<{name_width}}  {'status':<11} " + ' '.join(f"{s:<14}" for s in STEPS) + " time")
+    for result in results:
+        cells = []
+        for step in STEPS:
+            outcome = result.steps.get(step)
+            cells.append(f"{outcome['status']} {outcome['seconds']:.1f}s" if outcome else '-')
+        print(f"{result.environment.name:<{name_width}}  {result.status:<11} "
+              + ' '.join(f"{cell:<14}" for cell in cells) + f" {result.seconds:.1f}s")
+
+    serial = sum(result.seconds for result in results)
+    print(f"\n⏱️  Wall time {wall_seconds:.1f}s (environments back to back: {serial:.1f}s)")
+
+    for result in results:
+        if result.status in ('ok', 'skipped') or not result.log_file:
+            continue
+        print(f"\n❌ {result.environment.name} (exit code {result.returncode}), last lines of {result.log_file}:")
+        try:
+            with open(result.log_file, 'r', errors='replace') as f:
+                lines = f.readlines()[-LOG_TAIL_LINES:]
+        except OSError:
+            lines = []
+        for line in lines:
+            print(f"   {line.rstrip()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Provision several environments concurrently")
+    parser.add_argument('environments_file', help="tfvars-style (or .json) file with an `environments` list")
+    parser.add_argument('--only', nargs='+', metavar='NAME', help="Only these environments")
+    parser.add_argument('--steps', nargs='+', choices=STEPS,
+                        help="Only these steps (default: each environment's own steps)")
+    parser.add_argument('--max-parallel', type=int,
+                        default=int(os.environ.get('PROVISIONING_MAX_PARALLEL_ENVIRONMENTS', DEFAULT_MAX_PARALLEL)),
+                        help="Environments provisioned at the same time")
+    parser.add_argument('--state-dir', default=os.environ.get('PROVISIONING_ENVIRONMENTS_DIR', DEFAULT_STATE_DIR),
+                        help="Per-environment logs, results and statement ledgers")
+    parser.add_argument('--json', help="Write the aggregated results to this file")
+    parser.add_argument('--check', action='store_true',
+                        help="Validate the file and every environment's inputs; nothing is sent anywhere")
+    args = parser.parse_args()
+
+    try:
+        environments = load_environments(args.environments_file)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if args.only:
+        unknown = sorted(set(args.only) - {environment.name for environment in environments})
+        if unknown:
+            print(f"❌ Unknown environment(s): {', '.join(unknown)}")
+            sys.exit(1)
+        environments = [environment for environment in environments if environment.name in args.only]
+
+    missing = {environment.name: environment.missing_credentials() for environment in environments}
+    missing = {name: variables for name, variables in missing.items() if variables}
+    for name, variables in missing.items():
+        print(f"{'⚠️ ' if args.check else '❌'} {name}: {', '.join(variables)} not set")
+    if missing and not args.check:
+        sys.exit(1)
+
+    rollout = Rollout(environments, args.state_dir, args.max_parallel, args.steps, args.check)
+    print(f"🌍 {'Checking' if args.check else 'Provisioning'} {len(environments)} environment(s), "
+          f"{rollout.max_parallel} at a time (logs in {args.state_dir}/<name>/)")
+
+    start = time.time()
+    try:
+        results = rollout.run()
+    except KeyboardInterrupt:
+        sys.exit(130)
+    wall_seconds = time.time() - start
+
+    print_summary(results, wall_seconds)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'check': args.check,
+                'wall_seconds': round(wall_seconds, 3),
+                'environments': [result.as_dict() for result in results],
+            }, f, indent=2)
+        print(f"\n📄 Results written to {args.json}")
+
+    if any(result.status not in ('ok', 'skipped') for result in results):
+        sys.exit(1)
+    print(f"\n🎉 All environments {'checked' if args.check else 'provisioned'}!")
+
+
+if __name__ == "__main__":
+    with span('script.multi_environment_runner'):
+        main()
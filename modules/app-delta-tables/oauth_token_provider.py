@@ -0,0 +1,167 @@
+"""
+Process-wide OAuth M2M token cache for the provisioning scripts.
+Tokens are reused until shortly before `expires_in` runs out and can
+optionally be persisted to a 0600 cache file so back-to-back provisioner
+runs skip the /oidc/v1/token round-trip.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from databricks_http_client import get_client
+from provisioning_trace import span
+
+# Refresh this long before the token actually expires
+DEFAULT_REFRESH_MARGIN_SECONDS = 300
+DEFAULT_CACHE_FILE = os.path.join(
+    os.path.expanduser('~'), '.cache', 'databricks-provisioning', 'oauth-tokens.json'
+)
+
+
+def _cache_file_from_env():
+    """DATABRICKS_TOKEN_CACHE_FILE names the file; DATABRICKS_TOKEN_CACHE=disk uses the default."""
+    path = os.environ.get('DATABRICKS_TOKEN_CACHE_FILE')
+    if path:
+        return path
+    if os.environ.get('DATABRICKS_TOKEN_CACHE', '').lower() == 'disk':
+        return DEFAULT_CACHE_FILE
+    return None
+
+
+class TokenProvider:
+    """Hands out a valid access token for one (host, client_id), refreshing ahead of expiry."""
+
+    def __init__(self, host, client_id, client_secret, cache_file=None,
+                 refresh_margin_seconds=DEFAULT_REFRESH_MARGIN_SECONDS):
+        self.host = host
+        self.client_id = client_id
+        self._client_secret = client_secret
+        self.cache_file = cache_file
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.cache_key = hashlib.sha256(f"{host}|{client_id}".encode('utf-8')).hexdigest()
+
+        self._access_token = None
+        self._expires_at = 0.0
+        self._lifetime = 3600.0
+        self._bypass_cache = False
+        self._lock = threading.Lock()
+
+    def _margin(self, lifetime):
+        # Short-lived tokens would otherwise be "expired" the moment they arrive
+        return min(self.refresh_margin_seconds, lifetime / 10)
+
+    def _is_fresh(self, expires_at, lifetime):
+        return time.time() < expires_at - self._margin(lifetime)
+
+    def token(self):
+        """Return a valid access token, fetching a new one only when needed."""
+        with self._lock:
+            if self._access_token and self._is_fresh(self._expires_at, self._lifetime):
+                return self._access_token
+
+            cached = None if self._bypass_cache else self._read_cache()
+            if cached:
+                self._access_token, self._expires_at, self._lifetime = cached
+                return self._access_token
+
+            self._access_token, self._expires_at, self._lifetime = self._fetch()
+            self._bypass_cache = False
+            self._write_cache()
+            return self._access_token
+
+    def invalidate(self):
+        """Drop the current token (e.g. after a 401) so the next call fetches a new one."""
+        with self._lock:
+            self._access_token = None
+            self._expires_at = 0.0
+            self._bypass_cache = True
+
+    def _fetch(self):
+        token_url = f"{self.host}/oidc/v1/token"
+        with span('token.fetch', host=self.host):
+            response = get_client().post(
+                token_url,
+                label="token",
+                # A second token request is harmless
+                idempotent=True,
+                auth=(self.client_id, self._client_secret),
+                data={"grant_type": "client_credentials", "scope": "all-apis"},
+                timeout=30
+            )
+            response.raise_for_status()
+        token_data = response.json()
+        expires_in = float(token_data.get('expires_in', 3600))
+        return token_data['access_token'], time.time() + expires_in, expires_in
+
+    def _read_cache(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file, 'r') as f:
+                entry = json.load(f).get(self.cache_key)
+        except (OSError, ValueError):
+            return None
+        if not entry:
+            return None
+        lifetime = entry.get('lifetime', 3600.0)
+        if not self._is_fresh(entry['expires_at'], lifetime):
+            return None
+        return entry['access_token'], entry['expires_at'], lifetime
+
+    def _write_cache(self):
+        if not self.cache_file:
+            return
+        try:
+            entries = {}
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r') as f:
+                    entries = json.load(f)
+            now = time.time()
+            # Drop anything already expired while we're here
+            entries = {k: v for k, v in entries.items() if v.get('expires_at', 0) > now}
+            entries[self.cache_key] = {
+                'access_token': self._access_token,
+                'expires_at': self._expires_at,
+                'lifetime': self._lifetime,
+            }
+
+            cache_dir = os.path.dirname(self.cache_file) or '.'
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix='.oauth-tokens-')
+            try:
+                os.fchmod(fd, 0o600)
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(entries, f)
+                os.replace(tmp_path, self.cache_file)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+        except (OSError, ValueError) as e:
+            # The cache is an optimisation - never fail a deploy over it
+            print(f"⚠️  Could not write token cache {self.cache_file}: {e}")
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_token_provider(host, client_id, client_secret):
+    """Return the shared TokenProvider for (host, client_id), creating it on first use."""
+    key = (host, client_id)
+    with _providers_lock:
+        if key not in _providers:
+            _providers[key] = TokenProvider(
+                host, client_id, client_secret, cache_file=_cache_file_from_env()
+            )
+        return _providers[key]
+
+
+def resolve_token(token):
+    """Accept either a raw token string or a TokenProvider and return the bearer token."""
+    if isinstance(token, TokenProvider):
+        return token.token()
+    return token
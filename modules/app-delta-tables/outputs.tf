@@ -1,6 +1,6 @@
 output "schema_name" {
   description = "Name of the schema where Delta tables were created"
-  value       = "afc-mvp.fraud-investigation"
+  value       = "${var.catalog_name}.${var.schema_name}"
 }
 
 output "tables_created" {
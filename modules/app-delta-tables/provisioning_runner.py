@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Single-process provisioning runner.
+Runs a declared plan of steps (Delta DDL, Delta seed, Lakebase app_users
+bootstrap) in one Python process, so they share one OAuth token provider,
+one pooled HTTP client, one SQL warehouse warm-up and one Lakebase
+connection pool. A step starts as soon as the steps it depends on have
+succeeded, so independent steps run concurrently: the Lakebase bootstrap
+doesn't wait for Delta seeding. With --check, each step only validates
+its inputs, without credentials, network access or the heavy imports.
+
+Usage:
+    provisioning_runner.py <workspace_url> <warehouse_id> [--steps delta_ddl delta_seed lakebase] [--check] ...
+
+With --result-file, the per-step outcome is also written there as JSON
+(multi_environment_runner.py collects it from every environment).
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from create_delta_tables_rest import check_create_delta_tables, create_delta_tables
+from databricks_http_client import get_client, normalize_host
+from oauth_token_provider import get_token_provider
+from provisioning_trace import span
+from seed_delta_tables_rest import check_seed_delta_tables, seed_delta_tables
+from warehouse_readiness import start_warehouse_warmup
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(MODULE_DIR, '..', '..'))
+LAKEBASE_DIR = os.path.abspath(os.path.join(MODULE_DIR, '..', 'lakebase'))
+
+
+def _add_lakebase_path():
+    # The Lakebase scripts live next to this module's directory
+    if LAKEBASE_DIR not in sys.path:
+        sys.path.insert(0, LAKEBASE_DIR)
+
+
+class Step:
+    """One unit of the plan: `run(context)` returns True on success, `check(options)`
+    validates the step's inputs without side effects."""
+
+    def __init__(self, name, run, check, depends_on=(), uses_warehouse=False, description=''):
+        self.name = name
+        self.run = run
+        self.check = check
+        self.depends_on = tuple(depends_on)
+        self.uses_warehouse = uses_warehouse
+        self.description = description
+
+
+class ProvisioningContext:
+    """Resources shared by the steps of one run, created on first use."""
+
+    def __init__(self, host, client_id, client_secret, warehouse_id, options):
+        self.host = host
+        self.client_id = client_id
+        self.warehouse_id = warehouse_id
+        self.options = options
+        self.token = get_token_provider(host, client_id, client_secret)
+        self._warmup = None
+        self._lakebase_pool = None
+        self._lock = threading.Lock()
+
+    def start_warmup(self):
+        with self._lock:
+            if self._warmup is None:
+                self._warmup = start_warehouse_warmup(self.host, self.token, self.warehouse_id)
+            return self._warmup
+
+    def warehouse_ready(self):
+        return self.start_warmup().wait()
+
+    def lakebase_pool(self):
+        # psycopg2 is only needed when a Lakebase step actually runs
+        _add_lakebase_path()
+        from lakebase_pool import connect_lakebase
+
+        with self._lock:
+            if self._lakebase_pool is None:
+                self._lakebase_pool = connect_lakebase(
+                    self.options.lakebase_host, self.options.lakebase_database,
+                    self.client_id, self.token
+                )
+                print("✅ Connected to Lakebase")
+            return self._lakebase_pool
+
+    def close(self):
+        if self._lakebase_pool is not None:
+            self._lakebase_pool.close()
+
+
+def _load_lakebase_script():
+    """Import create-lakebase-app-users.py (its file name isn't a module name)."""
+    path = os.path.join(LAKEBASE_DIR, 'create-lakebase-app-users.py')
+    _add_lakebase_path()
+    spec = importlib.util.spec_from_file_location('create_lakebase_app_users', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_delta_ddl(context):
+    options = context.options
+    return create_delta_tables(
+        context.host, context.token, context.warehouse_id, options.schema_file,
+        options.ddl_workers, ready=context.warehouse_ready
+    )
+
+
+def run_delta_seed(context):
+    options = context.options
+    return seed_delta_tables(
+        context.host, context.token, context.warehouse_id, options.seed_file,
+        options.seed_workers, ready=context.warehouse_ready
+    )
+
+
+def check_lakebase(options):
+    return _load_lakebase_script().check_app_users(options.lakebase_sql_file, options.app_users_seed_file)
+
+
+def run_lakebase(context):
+    lakebase = _load_lakebase_script()
+    options = context.options
+    if not options.lakebase_host:
+        options.lakebase_host = lakebase.DEFAULT_LAKEBASE_HOST
+    return lakebase.bootstrap_app_users(
+        context.lakebase_pool(), options.lakebase_sql_file, options.app_users_seed_file
+    )
+
+
+PLAN = [
+    Step('delta_ddl', run_delta_ddl,
+         lambda options: check_create_delta_tables(options.schema_file),
+         uses_warehouse=True, description="Create the Unity Catalog schema and Delta tables"),
+    Step('delta_seed', run_delta_seed,
+         lambda options: check_seed_delta_tables(options.seed_file),
+         depends_on=['delta_ddl'], uses_warehouse=True, description="Seed the Delta tables"),
+    Step('lakebase', run_lakebase, check_lakebase,
+         description="Create (and optionally seed) app_users in Lakebase"),
+]
+
+
+def run_plan(context, steps):
+    """Run `steps`, each as soon as its dependencies succeeded; returns {name: (status, seconds)}.
+
+    A dependency that isn't part of `steps` is assumed to have been done
+    earlier. Steps whose dependency failed are skipped.
+    """
+    selected = {step.name for step in steps}
+    results = {}
+    pending = list(steps)
+    running = {}
+
+    def run_step(step):
+        start = time.time()
+        with span('runner.step', step=step.name) as trace:
+            ok = bool(step.run(context))
+            trace.set(ok=ok)
+        return ok, time.time() - start
+
+    with ThreadPoolExecutor(max_workers=max(1, len(steps))) as executor:
+        try:
+            while pending or running:
+                for step in list(pending):
+                    needed = [name for name in step.depends_on if name in selected]
+                    if any(results.get(name, ('',))[0] in ('failed', 'skipped') for name in needed):
+                        print(f"⏭️  Skipping {step.name}: a step it depends on did not succeed")
+                        results[step.name] = ('skipped', 0.0)
+                        pending.remove(step)
+                    elif all(results.get(name, ('',))[0] == 'ok' for name in needed):
+                        print(f"\n▶️  {step.name}: {step.description}")
+                        running[executor.submit(run_step, step)] = step
+                        pending.remove(step)
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    try:
+                        ok, elapsed = future.result()
+                    except Exception as e:
+                        print(f"❌ {step.name} failed: {e}")
+                        ok, elapsed = False, 0.0
+                    results[step.name] = ('ok' if ok else 'failed', elapsed)
+                    print(f"{'✅' if ok else '❌'} {step.name} {'finished' if ok else 'failed'} ({elapsed:.1f}s)")
+        except KeyboardInterrupt:
+            print("\n❌ Interrupted, cancelling running statements (Ctrl-C again to force)...")
+            # Only loaded if a step used the async executor
+            async_execution = sys.modules.get('async_statement_execution')
+            if async_execution is not None:
+                async_execution.cancel_active_runs()
+            raise
+
+    return results
+
+
+def write_results(path, host, results, check=False):
+    """Write {'host', 'check', 'steps': {name: {'status', 'seconds'}}} to `path`."""
+    if not path:
+        return
+    data = {
+        'host': host,
+        'check': check,
+        'steps': {name: {'status': status, 'seconds': round(elapsed, 3)}
+                  for name, (status, elapsed) in results.items()},
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the provisioning steps in one process")
+    parser.add_argument('workspace_url')
+    parser.add_argument('warehouse_id')
+    parser.add_argument('--steps', nargs='+', choices=[step.name for step in PLAN],
+                        default=[step.name for step in PLAN], help="Steps to run (default: all)")
+    parser.add_argument('--schema-file', default=os.path.join(REPO_ROOT, 'sql', 'app_delta_schema.sql'))
+    parser.add_argument('--seed-file', default=os.path.join(REPO_ROOT, 'sql', 'app_delta_seed.sql'))
+    parser.add_argument('--ddl-workers', type=int, default=int(os.environ.get('DELTA_DDL_WORKERS', '6')))
+    parser.add_argument('--seed-workers', type=int, default=int(os.environ.get('SEED_WORKERS', '6')))
+    parser.add_argument('--lakebase-host', default=os.environ.get('LAKEBASE_HOST') or None,
+                        help="Lakebase read/write DNS (default: LAKEBASE_HOST or the bootstrap script's default)")
+    parser.add_argument('--lakebase-database', default=os.environ.get('LAKEBASE_DATABASE', 'fraud_detection_db'))
+    parser.add_argument('--lakebase-sql-file', default=os.path.join(REPO_ROOT, 'sql', 'lakebase_app_users.sql'))
+    parser.add_argument('--app-users-seed-file', default=os.environ.get('APP_USERS_SEED_FILE') or None)
+    parser.add_argument('--check', action='store_true',
+                        help="Only validate arguments and inputs; nothing is sent to the workspace")
+    parser.add_argument('--result-file', help="Also write the per-step results to this JSON file")
+    options = parser.parse_args()
+
+    client_id = os.environ.get('DATABRICKS_CLIENT_ID')
+    client_secret = os.environ.get('DATABRICKS_CLIENT_SECRET')
+    host = normalize_host(options.workspace_url)
+    steps = [step for step in PLAN if step.name in options.steps]
+
+    if options.check:
+        print(f"🔎 Checking {host} / warehouse {options.warehouse_id}: {', '.join(step.name for step in steps)}")
+        if not client_id or not client_secret:
+            print("⚠️  DATABRICKS_CLIENT_ID or DATABRICKS_CLIENT_SECRET not set (needed for a real run)")
+        results = {}
+        for step in steps:
+            print(f"\n▶️  {step.name}: {step.description}")
+            start = time.time()
+            results[step.name] = ('ok' if step.check(options) else 'failed', time.time() - start)
+        write_results(options.result_file, host, results, check=True)
+        sys.exit(1 if any(status != 'ok' for status, _ in results.values()) else 0)
+
+    if not client_id or not client_secret:
+        print("❌ Missing DATABRICKS_CLIENT_ID or DATABRICKS_CLIENT_SECRET")
+        write_results(options.result_file, host, {step.name: ('failed', 0.0) for step in steps})
+        sys.exit(1)
+
+    print(f"🔗 Connecting to {host}")
+    print(f"   Warehouse ID: {options.warehouse_id}")
+    print(f"   Service Principal: {client_id[:20]}...")
+    print(f"   Steps: {', '.join(step.name for step in steps)}")
+
+    context = ProvisioningContext(host, client_id, client_secret, options.warehouse_id, options)
+    # Start the warehouse early; its cold start overlaps token fetch and parsing
+    if any(step.uses_warehouse for step in steps):
+        context.start_warmup()
+
+    print("🔐 Obtaining OAuth token...")
+    try:
+        context.token.token()
+        print("✅ OAuth token obtained")
+    except Exception as e:
+        print(f"❌ Failed to get OAuth token: {e}")
+        write_results(options.result_file, host, {step.name: ('failed', 0.0) for step in steps})
+        sys.exit(1)
+
+    try:
+        results = run_plan(context, steps)
+    except KeyboardInterrupt:
+        sys.exit(130)
+    finally:
+        context.close()
+
+    get_client().print_stats()
+    write_results(options.result_file, host, results)
+
+    print(f"\n{'='*60}")
+    for step in steps:
+        status, elapsed = results[step.name]
+        icon = {'ok': '✅', 'failed': '❌', 'skipped': '⏭️ '}[status]
+        print(f"{icon} {step.name:<12} {status:<8} {elapsed:.1f}s")
+
+    if any(status != 'ok' for status, _ in results.values()):
+        sys.exit(1)
+    print("🎉 All provisioning steps succeeded!")
+
+
+if __name__ == "__main__":
+    with span('script.provisioning_runner'):
+        main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Structured timing spans for the provisioning scripts.
+Every phase (token fetch, statement submit, queue wait, polling, Lakebase
+connect, ...) is recorded as one JSON line in PROVISIONING_TRACE_FILE, tagged
+with PROVISIONING_TRACE_ID so spans from every script and deploy step of one
+run can be put back together. Tracing is off when the file isn't set.
+
+Usage:
+    provisioning_trace.py record <step> <start_epoch> <end_epoch> [key=value ...]
+    provisioning_trace.py summary <trace_file>
+"""
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+_write_lock = threading.Lock()
+# Open spans of the current thread or asyncio task (a tuple, so tasks never share one)
+_open_spans = contextvars.ContextVar('provisioning_trace_spans', default=())
+# Spans started on worker threads hang off the outermost span of the process
+_root_span_id = None
+
+
+def trace_file():
+    return os.environ.get('PROVISIONING_TRACE_FILE') or None
+
+
+def trace_id():
+    return os.environ.get('PROVISIONING_TRACE_ID') or f"pid-{os.getpid()}"
+
+
+class Span:
+    """A timed phase; attributes can be added while it runs."""
+
+    __slots__ = ('name', 'span_id', 'parent_id', 'start', 'end', 'attributes', 'status')
+
+    def __init__(self, name, parent_id=None, **attributes):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end = None
+        self.attributes = {k: v for k, v in attributes.items() if v is not None}
+        self.status = 'ok'
+
+    def set(self, **attributes):
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+    def add(self, key, amount=1):
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    @property
+    def duration(self):
+        return (self.end or time.time()) - self.start
+
+    def to_record(self):
+        return {
+            'trace_id': trace_id(),
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': round(self.start, 6),
+            'end': round(self.end, 6),
+            'duration': round(self.end - self.start, 6),
+            'status': self.status,
+            'process': os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else 'python',
+            'pid': os.getpid(),
+            'attributes': self.attributes,
+        }
+
+
+def _write(record):
+    path = trace_file()
+    if not path:
+        return
+    line = json.dumps(record, default=str) + '\n'
+    try:
+        with _write_lock:
+            with open(path, 'a') as f:
+                f.write(line)
+    except OSError as e:
+        # Tracing must never break a deploy
+        print(f"⚠️  Could not write trace {path}: {e}")
+
+
+def _parent_id():
+    stack = _open_spans.get()
+    return stack[-1].span_id if stack else _root_span_id
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time the enclosed block as one span; yields the Span so callers can add attributes."""
+    global _root_span_id
+    current = Span(name, parent_id=_parent_id(), **attributes)
+    if _root_span_id is None:
+        _root_span_id = current.span_id
+    token = _open_spans.set(_open_spans.get() + (current,))
+    try:
+        yield current
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            current.status = 'error'
+            current.set(exit_code=e.code)
+        raise
+    except BaseException as e:
+        current.status = 'error'
+        current.set(error=f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _open_spans.reset(token)
+        if _root_span_id == current.span_id:
+            _root_span_id = None
+        current.end = time.time()
+        if current.attributes.get('ok') is False:
+            current.status = 'error'
+        _write(current.to_record())
+
+
+def record_span(name, start, end, **attributes):
+    """Record a span measured elsewhere (e.g. a deploy step timed by the shell)."""
+    current = Span(name, parent_id=_parent_id(), **attributes)
+    current.start = float(start)
+    current.end = float(end)
+    _write(current.to_record())
+
+
+def load_spans(path, trace=None):
+    spans = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if trace is None or record.get('trace_id') == trace:
+                spans.append(record)
+    return spans
+
+
+def _bar(seconds, longest, width=24):
+    filled = int(round(width * seconds / longest)) if longest else 0
+    return '█' * filled + '░' * (width - filled)
+
+
+def summarize(spans):
+    """Print where the time went: deploy steps, then the phases inside the scripts."""
+    if not spans:
+        print("No spans recorded")
+        return
+
+    steps = sorted((s for s in spans if s['name'] == 'step'), key=lambda s: s['start'])
+    scripts = sorted((s for s in spans if s['name'].startswith('script.')), key=lambda s: s['start'])
+    statements = [s for s in spans if s['name'] == 'statement']
+
+    print("⏱️  Critical path")
+    if steps:
+        longest = max(s['duration'] for s in steps)
+        total = steps[-1]['end'] - steps[0]['start']
+        for s in steps:
+            label = s['attributes'].get('step', '?')
+            share = 100 * s['duration'] / total if total else 0
+            print(f"   {label:<32} {s['duration']:8.1f}s {share:5.1f}%  {_bar(s['duration'], longest)}")
+        print(f"   {'total':<32} {total:8.1f}s")
+
+    for script in scripts:
+        children = [s for s in spans if s['pid'] == script['pid'] and s['trace_id'] == script['trace_id']]
+        by_name = {}
+        for s in children:
+            by_name.setdefault(s['name'], []).append(s)
+        print(f"\n   {script['name'][len('script.'):]} ({script['duration']:.1f}s, status {script['status']})")
+
+        token = sum(s['duration'] for s in by_name.get('token.fetch', []))
+        if by_name.get('token.fetch'):
+            print(f"     token fetch        {token:8.2f}s  ({len(by_name['token.fetch'])} fetches)")
+
+        stmts = by_name.get('statement', [])
+        if stmts:
+            queue = sum(s['attributes'].get('queue_wait_seconds', 0) for s in stmts)
+            polls = sum(s['attributes'].get('poll_count', 0) for s in stmts)
+            sleep = sum(s['attributes'].get('poll_sleep_seconds', 0) for s in stmts)
+            # The statement finished somewhere inside the last poll gap
+            overhead = sum(s['attributes'].get('last_poll_gap_seconds', 0) for s in stmts) / 2
+            busy = sum(s['duration'] for s in stmts)
+            failed = sum(1 for s in stmts if s['status'] != 'ok')
+            print(f"     statements         {busy:8.2f}s  ({len(stmts)} statements, {failed} failed, summed over workers)")
+            print(f"       queue wait       {queue:8.2f}s  (time seen PENDING)")
+            print(f"       execution        {max(0.0, busy - queue - overhead):8.2f}s")
+            print(f"       poll overhead    {overhead:8.2f}s  (estimated; {polls} polls, {sleep:.1f}s asleep)")
+
+        for name in ('upload', 'lakebase.connect', 'lakebase.execute', 'lakebase.bulk_insert', 'lakebase.query'):
+            if by_name.get(name):
+                total = sum(s['duration'] for s in by_name[name])
+                print(f"     {name:<18} {total:8.2f}s  ({len(by_name[name])} calls)")
+
+    if statements:
+        print("\n   Slowest statements")
+        for s in sorted(statements, key=lambda s: s['duration'], reverse=True)[:5]:
+            attrs = s['attributes']
+            print(f"     {s['duration']:7.2f}s  {attrs.get('table') or '-':<26} "
+                  f"queue {attrs.get('queue_wait_seconds', 0):.1f}s, {attrs.get('poll_count', 0)} polls, "
+                  f"{attrs.get('statement_id', '-')}")
+
+
+def main():
+    if len(sys.argv) >= 5 and sys.argv[1] == 'record':
+        attributes = dict(arg.split('=', 1) for arg in sys.argv[5:] if '=' in arg)
+        record_span('step', sys.argv[3], sys.argv[4], step=sys.argv[2], **attributes)
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'summary':
+        if not os.path.exists(sys.argv[2]):
+            print(f"No trace file at {sys.argv[2]}")
+            return
+        summarize(load_spans(sys.argv[2], os.environ.get('PROVISIONING_TRACE_ID') or None))
+    else:
+        print(__doc__.strip().split('Usage:')[1].rstrip())
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
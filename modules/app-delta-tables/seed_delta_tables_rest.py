@@ -2,203 +2,360 @@
 """
 Seed Unity Catalog Delta tables using Databricks REST API.
 Reliable for headless execution in Terraform provisioners.
+
+INSERT seeding runs a compiled statement plan (batched, qualified INSERTs,
+see statement_plan.py) for the catalog/schema in DATABRICKS_CATALOG /
+DATABRICKS_SCHEMA. With --check, the arguments are validated and the seed
+data is compiled without contacting the workspace (or importing requests).
 """
 
 import sys
 import os
-import re
-import time
-import requests
-import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from databricks_http_client import get_client, normalize_host
+from insert_batching import InsertBatch, batch_limits_from_env, iter_batches
+from oauth_token_provider import get_token_provider
+from provisioning_trace import span
+from sql_script_parser import parse_sql_file
+from statement_ledger import open_ledger
+from statement_execution import execute_sql_statement, use_async_executor
+from statement_plan import open_plan, plan_target, qualifier
+from warehouse_readiness import start_warehouse_warmup
 
 def get_oauth_token(host, client_id, client_secret):
-    """Get OAuth M2M token from Databricks."""
+    """Get a cached, auto-refreshing OAuth M2M token provider for Databricks."""
     print("🔐 Obtaining OAuth token...")
     
-    token_url = f"{host}/oidc/v1/token"
-    data = {
-        "grant_type": "client_credentials",
-        "scope": "all-apis"
-    }
-    
     try:
-        response = requests.post(
-            token_url,
-            auth=(client_id, client_secret),
-            data=data,
-            timeout=30
-        )
-        response.raise_for_status()
-        token_data = response.json()
+        provider = get_token_provider(host, client_id, client_secret)
+        # Fetch (or load from cache) now so bad credentials fail fast
+        provider.token()
         print("✅ OAuth token obtained")
-        return token_data['access_token']
+        return provider
     except Exception as e:
         print(f"❌ Failed to get OAuth token: {e}")
         sys.exit(1)
 
-def poll_statement_status(host, token, statement_id, max_wait_seconds=120):
-    """Poll statement status until completion."""
-    api_url = f"{host}/api/2.0/sql/statements/{statement_id}"
-    headers = {
-        "Authorization": f"Bearer {token}"
-    }
-    
-    start_time = time.time()
-    while True:
-        elapsed = time.time() - start_time
-        if elapsed > max_wait_seconds:
-            print(f"❌ Timeout after {elapsed:.0f}s")
+def run_batches(host, token, warehouse_id, batches, workers, ready=None, on_success=None):
+    """Execute batches as they stream in: tables run concurrently, each table's batches in order.
+    
+    Returns {table_name: (ok, rows_inserted)}. A table stops at its first
+    failed batch. `on_success(batch)` is called from the worker as soon as
+    a batch succeeds.
+    At most `workers * 2` batches are queued at once so a large seed file is
+    never fully held in memory. If `ready` is given, workers call it before
+    their first statement (e.g. to wait for the warehouse) while batches keep
+    being parsed; a False result fails the batch.
+    """
+    results = {}
+    lock = threading.Lock()
+    
+    def run_after(previous, batch):
+        # Wait for the table's previous batch so row order is preserved
+        if previous is not None and not previous.result():
             return False
-        
-        try:
-            response = requests.get(api_url, headers=headers, timeout=30)
-            response.raise_for_status()
-            result = response.json()
-            
-            status = result.get('status', {}).get('state', 'UNKNOWN')
+        ok = (ready is None or ready()) and execute_sql_statement(
+            host, token, warehouse_id, batch.statement, table_name=batch.table_name
+        )
+        with lock:
+            table_ok, rows = results.get(batch.table_name, (True, 0))
+            results[batch.table_name] = (table_ok and ok, rows + (batch.row_count if ok else 0))
+        if ok and on_success is not None:
+            on_success(batch)
+        return ok
+    
+    last_batch = {}
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for batch in batches:
+            with lock:
+                results.setdefault(batch.table_name, (True, 0))
+            future = executor.submit(run_after, last_batch.get(batch.table_name), batch)
+            last_batch[batch.table_name] = future
+            in_flight.append(future)
+            while len(in_flight) > workers * 2:
+                in_flight.popleft().result()
+        for future in in_flight:
+            future.result()
+    
+    return results
+
+def run_batches_async(host, token, warehouse_id, batches, max_in_flight, on_success=None):
+    """Like run_batches, but batches are run from one event loop instead of a thread pool.
+    
+    Up to `max_in_flight` statements run at once and at most twice that many
+    batches are queued; each table's batches still run in order.
+    """
+    import asyncio
+    from async_statement_execution import AsyncStatementExecutor, run_with_cancellation
+    
+    results = {}
+    
+    async def run_all():
+        async with AsyncStatementExecutor(host, token, warehouse_id, max_in_flight) as executor:
+            async def run_after(previous, batch):
+                # Wait for the table's previous batch so row order is preserved
+                if previous is not None and not await previous:
+                    return False
+                ok = await executor.execute(batch.statement, table_name=batch.table_name)
+                table_ok, rows = results.get(batch.table_name, (True, 0))
+                results[batch.table_name] = (table_ok and ok, rows + (batch.row_count if ok else 0))
+                if ok and on_success is not None:
+                    on_success(batch)
+                return ok
             
-            if status == 'SUCCEEDED':
-                print(f"✅ Success (took {elapsed:.1f}s)")
-                return True
-            elif status in ['FAILED', 'CANCELED', 'CLOSED']:
-                error_info = result.get('status', {}).get('error', {})
-                error_msg = error_info.get('message', f'Statement {status}')
-                print(f"❌ {error_msg}")
-                return False
-            elif status in ['PENDING', 'RUNNING']:
-                # Still executing, wait and poll again
-                time.sleep(2)
-                continue
-            else:
-                print(f"❌ Unknown status: {status}")
-                return False
-                
-        except Exception as e:
-            print(f"❌ Error polling status: {e}")
-            return False
+            last_batch = {}
+            in_flight = deque()
+            for batch in batches:
+                results.setdefault(batch.table_name, (True, 0))
+                task = executor.create_task(run_after(last_batch.get(batch.table_name), batch))
+                last_batch[batch.table_name] = task
+                in_flight.append(task)
+                # Let the new task submit before the next batch is parsed
+                await asyncio.sleep(0)
+                while len(in_flight) > executor.max_in_flight * 2:
+                    await in_flight.popleft()
+            for task in in_flight:
+                await task
+    
+    run_with_cancellation(run_all())
+    return results
 
-def execute_sql_statement(host, token, warehouse_id, statement, timeout_seconds=120):
-    """Execute SQL statement using SQL Statement Execution API."""
-    api_url = f"{host}/api/2.0/sql/statements"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "statement": statement,
-        "warehouse_id": warehouse_id,
-        "wait_timeout": "0s"  # Don't wait, return immediately
-    }
+def compile_seed_plan(sql_file, catalog, schema, max_rows, max_bytes):
+    """Plan records for `sql_file`: {'insert': text} per INSERT statement and
+    {'table', 'sql', 'rows', 'sources'} per batch.
     
-    try:
-        # Submit statement
-        response = requests.post(
-            api_url,
-            headers=headers,
-            json=payload,
-            timeout=30
+    A batch's `sources` are ordinals of the 'insert' records, all of which
+    come before the batch; each statement's rows are in a single batch.
+    """
+    unread = []
+    
+    def inserts():
+        for stmt in parse_sql_file(sql_file):
+            if stmt.kind == 'INSERT':
+                unread.append(stmt.text)
+                yield stmt.text
+    
+    for batch in iter_batches(inserts(), catalog, schema, max_rows=max_rows, max_bytes=max_bytes):
+        for text in unread:
+            yield {'insert': text}
+        unread.clear()
+        yield {'table': batch.table_name, 'sql': batch.statement, 'rows': batch.row_count,
+               'sources': sorted(batch.sources)}
+    for text in unread:
+        yield {'insert': text}
+
+def open_seed_plan(sql_file, catalog, schema, max_rows, max_bytes):
+    """The (cached) compiled INSERT plan of `sql_file` for `catalog`.`schema`."""
+    return open_plan(
+        'seed', sql_file,
+        lambda: compile_seed_plan(sql_file, catalog, schema, max_rows, max_bytes),
+        catalog, schema, settings={'max_rows': max_rows, 'max_bytes': max_bytes}
+    )
+
+def check_seed_delta_tables(sql_file, catalog=None, schema=None):
+    """Compile the seed data without contacting the workspace; True if it is usable."""
+    if not os.path.isfile(sql_file):
+        print(f"❌ SQL file not found: {sql_file}")
+        return False
+    
+    if os.environ.get('SEED_MODE', 'insert').lower() == 'copy':
+        from copy_into_loader import collect_sql_rows, find_seed_files
+        
+        seed_dir = os.environ.get('SEED_DATA_DIR') or os.path.dirname(os.path.abspath(sql_file))
+        tables = {name: (len(rows), 'seed SQL') for name, (_, rows, _) in collect_sql_rows(sql_file).items()}
+        for name, files in find_seed_files(seed_dir).items():
+            tables[name] = (None, f"{len(files)} file(s) in {seed_dir}")
+        print(f"✅ COPY INTO mode: {len(tables)} tables")
+        for name, (rows, source) in tables.items():
+            print(f"   {name}: {source}" + (f" ({rows} rows)" if rows is not None else ""))
+        return bool(tables)
+    
+    default_catalog, default_schema = plan_target()
+    catalog, schema = catalog or default_catalog, schema or default_schema
+    max_rows, max_bytes = batch_limits_from_env()
+    tables = {}
+    with open_seed_plan(sql_file, catalog, schema, max_rows, max_bytes) as plan:
+        for record in plan.records():
+            if 'table' in record:
+                batches, rows = tables.get(record['table'], (0, 0))
+                tables[record['table']] = (batches + 1, rows + record['rows'])
+    if not tables:
+        print(f"❌ No INSERT statements in {sql_file}")
+        return False
+    
+    print(f"✅ {sum(rows for _, rows in tables.values())} rows for {len(tables)} tables in "
+          f"`{catalog}`.`{schema}` (max {max_rows} rows / {max_bytes} bytes per batch)")
+    for name, (batches, rows) in tables.items():
+        print(f"   {name}: {rows} rows in {batches} batch(es)")
+    return True
+
+def seed_delta_tables(host, token, warehouse_id, sql_file, workers, ready=None,
+                      catalog=None, schema=None):
+    """Seed every table from `sql_file` (or staged files in copy mode); True if all succeeded.
+    
+    Tables are in `catalog`.`schema` (default: plan_target()). `ready`, if
+    given, must return True (e.g. the warehouse has started) before the
+    first statement is submitted. Each INSERT statement is recorded in the
+    ledger as soon as its batch succeeds, and the ledger is saved even
+    when a batch fails or KeyboardInterrupt propagates.
+    """
+    default_catalog, default_schema = plan_target()
+    catalog, schema = catalog or default_catalog, schema or default_schema
+    print(f"\n🌱 Seeding Delta tables from {sql_file}...\n")
+    
+    # "copy" stages seed data as Parquet in a volume and loads each table with COPY INTO
+    if os.environ.get('SEED_MODE', 'insert').lower() == 'copy':
+        from copy_into_loader import default_volume_path, load_with_copy_into
+        
+        loaded, total = load_with_copy_into(
+            host, token, warehouse_id, sql_file, qualifier(catalog, schema),
+            volume_path=os.environ.get('SEED_VOLUME_PATH') or default_volume_path(catalog, schema),
+            workers=workers,
+            seed_dir=os.environ.get('SEED_DATA_DIR') or None,
+            ready=ready
         )
         
-        if response.status_code != 200:
-            error_details = response.text
-            print(f"❌ HTTP {response.status_code}: {error_details}")
+        print(f"\n{'='*60}")
+        print(f"✅ Loaded {loaded}/{total} tables with COPY INTO")
+        if total == 0 or loaded < total:
+            print(f"⚠️  {total - loaded} tables failed")
             return False
-            
-        result = response.json()
-        statement_id = result.get('statement_id')
+        print("🎉 All tables seeded successfully!")
+        return True
+    
+    # INSERTs coalesced per table into size-bounded multi-row INSERTs, compiled
+    # once per seed file, target and batch limits
+    max_rows, max_bytes = batch_limits_from_env()
+    print(f"Batching INSERTs (max {max_rows} rows / {max_bytes} bytes each)\n")
+    with open_seed_plan(sql_file, catalog, schema, max_rows, max_bytes) as plan:
+        # Statements recorded in the ledger by an earlier run are skipped so
+        # rows are never inserted twice (INSERT text is unqualified: scope it
+        # to the target schema)
+        ledger = open_ledger(f"{host}|{catalog}.{schema}")
+        source_fingerprints = []
+        skipped = 0
+        for record in plan.records():
+            if 'insert' not in record:
+                continue
+            fingerprint = ledger.next_fingerprint(record['insert'])
+            if ledger.is_applied(fingerprint):
+                skipped += 1
+                continue
+            source_fingerprints.append((fingerprint, record['insert']))
         
-        if not statement_id:
-            print(f"❌ No statement_id in response")
-            return False
+        if not skipped:
+            batches = (
+                InsertBatch(record['table'], record['sql'], record['rows'], record['sources'])
+                for record in plan.records() if 'table' in record
+            )
+        else:
+            # Planned batches may mix applied and pending rows: re-batch the pending ones
+            batches = iter_batches(
+                (text for _, text in source_fingerprints), catalog, schema,
+                max_rows=max_rows, max_bytes=max_bytes
+            )
         
-        # Poll for completion
-        return poll_statement_status(host, token, statement_id, timeout_seconds)
-            
-    except requests.Timeout:
-        print(f"❌ Timeout submitting statement")
-        return False
-    except Exception as e:
-        print(f"❌ Error: {e}")
+        def record_applied(batch):
+            # A statement's rows are all in one batch, so its statements are now fully applied
+            for ordinal in batch.sources:
+                fingerprint, text = source_fingerprints[ordinal]
+                ledger.record(fingerprint, text)
+        
+        try:
+            if use_async_executor():
+                if ready is not None and not ready():
+                    print("❌ SQL warehouse is not available")
+                    return False
+                results = run_batches_async(
+                    host, token, warehouse_id, batches, workers, on_success=record_applied
+                )
+            else:
+                results = run_batches(
+                    host, token, warehouse_id, batches, workers, ready=ready, on_success=record_applied
+                )
+        finally:
+            ledger.save()
+    
+    if skipped:
+        print(f"⏭️  Skipped {skipped} INSERT statements already applied (ledger)\n")
+    
+    success_count = 0
+    total_rows = 0
+    for i, (table_name, (ok, rows)) in enumerate(results.items(), 1):
+        total_rows += rows
+        if ok:
+            success_count += 1
+            print(f"[{i}/{len(results)}] Seeded table: {table_name} ({rows} rows)")
+        else:
+            print(f"[{i}/{len(results)}] ⚠️  Failed to seed {table_name}")
+    
+    print(f"\n{'='*60}")
+    print(f"✅ Seeded {success_count}/{len(results)} tables successfully ({total_rows} rows)")
+    
+    if success_count < len(results):
+        print(f"⚠️  {len(results) - success_count} tables failed")
         return False
+    
+    print("🎉 All tables seeded successfully!")
+    return True
 
 def main():
-    if len(sys.argv) < 4:
-        print("Usage: seed_delta_tables_rest.py <workspace_url> <warehouse_id> <sql_file>")
+    args = [arg for arg in sys.argv[1:] if arg != '--check']
+    check = len(args) < len(sys.argv) - 1
+    if len(args) < 3:
+        print("Usage: seed_delta_tables_rest.py <workspace_url> <warehouse_id> <sql_file> [workers] [--check]")
         sys.exit(1)
     
-    workspace_url = sys.argv[1]
-    warehouse_id = sys.argv[2]
-    sql_file = sys.argv[3]
+    workspace_url = args[0]
+    warehouse_id = args[1]
+    sql_file = args[2]
+    
+    # Number of tables seeded concurrently (1 = one table at a time)
+    workers = int(args[3]) if len(args) > 3 else int(os.environ.get('SEED_WORKERS', '6'))
     
     # Get credentials from environment
     client_id = os.environ.get('DATABRICKS_CLIENT_ID')
     client_secret = os.environ.get('DATABRICKS_CLIENT_SECRET')
     
+    if check:
+        print(f"🔎 Checking {normalize_host(workspace_url)} / warehouse {warehouse_id} with {workers} workers")
+        if not client_id or not client_secret:
+            print("⚠️  DATABRICKS_CLIENT_ID or DATABRICKS_CLIENT_SECRET not set (needed for a real run)")
+        sys.exit(0 if check_seed_delta_tables(sql_file) else 1)
+    
     if not client_id or not client_secret:
         print("❌ Missing DATABRICKS_CLIENT_ID or DATABRICKS_CLIENT_SECRET")
         sys.exit(1)
     
-    # Normalize host URL
-    host = workspace_url.rstrip('/')
-    if not host.startswith('http'):
-        host = f"https://{host}"
+    host = normalize_host(workspace_url)
     
     print(f"🔗 Connecting to {host}")
     print(f"   Warehouse ID: {warehouse_id}")
     print(f"   Service Principal: {client_id[:20]}...")
     
+    # Wake the warehouse (fetching the token on the way) before anything is submitted
+    warmup = start_warehouse_warmup(
+        host, get_token_provider(host, client_id, client_secret), warehouse_id
+    )
+    
     # Get OAuth token
     token = get_oauth_token(host, client_id, client_secret)
     
-    print(f"\n🌱 Seeding Delta tables from {sql_file}...\n")
-    
-    # Read and parse SQL file
-    with open(sql_file, 'r') as f:
-        sql_content = f.read()
-    
-    # Split by semicolon, filter INSERT statements
-    statements = [stmt.strip() for stmt in sql_content.split(';') if stmt.strip()]
-    insert_statements = [stmt for stmt in statements if 'INSERT INTO' in stmt.upper()]
-    
-    print(f"Found {len(insert_statements)} INSERT statements\n")
-    
-    success_count = 0
-    for i, stmt in enumerate(insert_statements, 1):
-        # Remove comments
-        clean_stmt = re.sub(r'--.*$', '', stmt, flags=re.MULTILINE)
-        # Remove USE statements
-        clean_stmt = re.sub(r'USE\s+(CATALOG|SCHEMA)\s+[^;]+;?', '', clean_stmt, flags=re.IGNORECASE)
-        # Normalize whitespace
-        clean_stmt = ' '.join(clean_stmt.split())
-        
-        if clean_stmt and 'INSERT INTO' in clean_stmt.upper():
-            # Extract table name for logging
-            table_match = re.search(r'INSERT\s+INTO\s+`?(\w+)`?', clean_stmt, re.IGNORECASE)
-            table_name = table_match.group(1) if table_match else f"table_{i}"
-            
-            # Add fully qualified table name
-            qualified_stmt = re.sub(
-                r'(INSERT\s+INTO\s+)`?(\w+)`?',
-                r'\1`afc-mvp`.`fraud-investigation`.`\2`',
-                clean_stmt,
-                flags=re.IGNORECASE
-            )
-            
-            print(f"[{i}/{len(insert_statements)}] Seeding table: {table_name}")
-            if execute_sql_statement(host, token, warehouse_id, qualified_stmt + ';'):
-                success_count += 1
-            else:
-                print(f"⚠️  Failed to seed {table_name}, continuing...")
-    
-    print(f"\n{'='*60}")
-    print(f"✅ Seeded {success_count}/{len(insert_statements)} tables successfully")
+    try:
+        ok = seed_delta_tables(host, token, warehouse_id, sql_file, workers, ready=warmup.wait)
+    except KeyboardInterrupt:
+        # Statements still running were cancelled; those already applied are in the ledger
+        print("\n❌ Interrupted")
+        sys.exit(130)
     
-    if success_count < len(insert_statements):
-        print(f"⚠️  {len(insert_statements) - success_count} tables failed")
+    get_client().print_stats()
+    if not ok:
         sys.exit(1)
-    
-    print("🎉 All tables seeded successfully!")
 
 if __name__ == "__main__":
-    main()
-
+    with span('script.seed_delta_tables'):
+        main()
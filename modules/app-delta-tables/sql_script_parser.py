@@ -0,0 +1,310 @@
+"""
+Streaming SQL script parser for the Delta provisioning scripts.
+Reads a SQL file in chunks and yields one SqlStatement per top-level `;`,
+understanding string literals, backtick identifiers and `--` / `/* */`
+comments, so semicolons inside literals no longer split statements and
+memory stays bounded by the largest single statement.
+"""
+
+import re
+
+from insert_batching import split_row_values
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# Part of the compiled statement plan cache key (statement_plan.py): bump it
+# whenever parsing, qualification or INSERT batching output changes
+PARSER_VERSION = 3
+
+NORMAL, SINGLE_QUOTE, DOUBLE_QUOTE, BACKTICK, LINE_COMMENT, BLOCK_COMMENT = range(6)
+
+_QUOTE_STATES = {"'": SINGLE_QUOTE, '"': DOUBLE_QUOTE, '`': BACKTICK}
+_STATE_QUOTES = {SINGLE_QUOTE: "'", DOUBLE_QUOTE: '"', BACKTICK: '`'}
+
+
+class SqlStatement:
+    """One parsed statement: its kind, the table it targets and its normalized text.
+
+    Comments are stripped and whitespace outside literals is collapsed to a
+    single space; text inside literals is left exactly as written.
+    """
+
+    __slots__ = ('kind', 'target_table', 'text', '_target_span', '_target_parts')
+
+    def __init__(self, kind, target_table, text, target_span=None, target_parts=None):
+        self.kind = kind
+        self.target_table = target_table
+        self.text = text
+        self._target_span = target_span
+        self._target_parts = target_parts or []
+
+    @property
+    def target_parts(self):
+        """Name parts of the target as written: ['claims'] or ['afc-mvp', 'fraud-investigation', 'claims']."""
+        return list(self._target_parts)
+
+    @property
+    def target_span(self):
+        """(start, end) of the target table name in `text`, or None."""
+        return self._target_span
+
+    def qualified(self, catalog, schema):
+        """Statement text with a bare target table rewritten to `catalog`.`schema`.`table`.
+
+        Already-qualified names are left alone.
+        """
+        if self._target_span is None or len(self._target_parts) != 1:
+            return self.text
+        start, end = self._target_span
+        return f"{self.text[:start]}`{catalog}`.`{schema}`.`{self.target_table}`{self.text[end:]}"
+
+    def __repr__(self):
+        return f"SqlStatement({self.kind!r}, {self.target_table!r}, {self.text[:60]!r})"
+
+
+def _leading_tokens(text, limit=8):
+    """Scan the first few tokens: (upper-cased word or None, start, end, identifier parts)."""
+    tokens = []
+    i = 0
+    n = len(text)
+    while i < n and len(tokens) < limit:
+        ch = text[i]
+        if ch == ' ':
+            i += 1
+            continue
+        if ch == '`' or ch.isalnum() or ch == '_':
+            start = i
+            parts = []
+            while i < n:
+                if text[i] == '`':
+                    # Backtick identifier; `` is an escaped backtick
+                    j = i + 1
+                    part = []
+                    while j < n:
+                        if text[j] == '`':
+                            if j + 1 < n and text[j + 1] == '`':
+                                part.append('`')
+                                j += 2
+                                continue
+                            break
+                        part.append(text[j])
+                        j += 1
+                    parts.append(''.join(part))
+                    i = j + 1
+                else:
+                    j = i
+                    while j < n and (text[j].isalnum() or text[j] == '_'):
+                        j += 1
+                    if j == i:
+                        break
+                    parts.append(text[i:j])
+                    i = j
+                if i < n and text[i] == '.':
+                    i += 1
+                    continue
+                break
+            word = parts[0].upper() if len(parts) == 1 and text[start] != '`' else None
+            tokens.append((word, start, i, parts))
+        else:
+            # Punctuation such as '(' ends the statement head
+            break
+    return tokens
+
+
+def classify(text):
+    """Build a SqlStatement from normalized statement text."""
+    tokens = _leading_tokens(text)
+    words = [t[0] for t in tokens]
+
+    def target(index):
+        if index < len(tokens) and tokens[index][3]:
+            _, start, end, parts = tokens[index]
+            return parts[-1], (start, end), parts
+        return None, None, None
+
+    def skip(index, *optional):
+        # Step over optional keyword runs like OR REPLACE / IF NOT EXISTS
+        for run in optional:
+            if words[index:index + len(run)] == list(run):
+                index += len(run)
+        return index
+
+    kind = 'OTHER'
+    name, span, parts = None, None, None
+    if words[:1] == ['CREATE']:
+        i = skip(1, ('OR', 'REPLACE'), ('TEMPORARY',), ('EXTERNAL',))
+        if words[i:i + 1] == ['TABLE']:
+            kind = 'CREATE_TABLE'
+            name, span, parts = target(skip(i + 1, ('IF', 'NOT', 'EXISTS')))
+        elif words[i:i + 1] in (['SCHEMA'], ['DATABASE']):
+            kind = 'CREATE_SCHEMA'
+            name, span, parts = target(skip(i + 1, ('IF', 'NOT', 'EXISTS')))
+        elif words[i:i + 1] == ['VIEW'] or words[i:i + 2] == ['MATERIALIZED', 'VIEW']:
+            kind = 'CREATE_VIEW'
+            i += 1 if words[i] == 'VIEW' else 2
+            name, span, parts = target(skip(i, ('IF', 'NOT', 'EXISTS')))
+    elif words[:2] == ['ALTER', 'TABLE']:
+        kind = 'ALTER_TABLE'
+        name, span, parts = target(skip(2, ('IF', 'EXISTS')))
+    elif words[:1] == ['INSERT'] and words[1:2] in (['INTO'], ['OVERWRITE']):
+        kind = 'INSERT'
+        name, span, parts = target(skip(2, ('TABLE',)))
+    elif words[:2] == ['COPY', 'INTO']:
+        kind = 'COPY'
+        name, span, parts = target(2)
+    elif words[:1] == ['USE']:
+        kind = 'USE'
+
+    return SqlStatement(kind, name, text, span, parts)
+
+
+class ColumnDefinition:
+    """One column from a CREATE TABLE column list."""
+
+    __slots__ = ('name', 'data_type', 'identity', 'default')
+
+    def __init__(self, name, data_type, identity=False, default=None):
+        self.name = name
+        self.data_type = data_type
+        self.identity = identity
+        self.default = default
+
+    def __repr__(self):
+        return f"ColumnDefinition({self.name!r}, {self.data_type!r})"
+
+
+_COLUMN_PATTERN = re.compile(r'`?(\w+)`?\s+(\w+(?:\s*\([^)]*\))?)(.*)$', re.DOTALL)
+_DEFAULT_PATTERN = re.compile(r'\bDEFAULT\s+(.+?)(?:\s+(?:NOT\s+NULL|COMMENT)\b.*)?$', re.IGNORECASE | re.DOTALL)
+
+
+def column_definitions(statement):
+    """Column definitions of a CREATE_TABLE statement, in declaration order.
+
+    Table constraints are skipped; GENERATED ... AS IDENTITY columns are
+    flagged so callers know not to supply values for them.
+    """
+    text = statement.text
+    if statement.kind != 'CREATE_TABLE' or '(' not in text:
+        return []
+    # Walk to the matching close paren of the column list
+    start = text.index('(') + 1
+    depth = 1
+    i = start
+    while i < len(text) and depth:
+        if text[i] == '(':
+            depth += 1
+        elif text[i] == ')':
+            depth -= 1
+        i += 1
+
+    columns = []
+    for definition in split_row_values(text[start:i - 1]):
+        parts = definition.split()
+        if len(parts) < 2 or parts[0].upper() in ('CONSTRAINT', 'PRIMARY', 'FOREIGN'):
+            continue
+        match = _COLUMN_PATTERN.match(definition)
+        if not match:
+            continue
+        rest = match.group(3)
+        default = _DEFAULT_PATTERN.search(rest)
+        columns.append(ColumnDefinition(
+            match.group(1),
+            match.group(2),
+            identity=bool(re.search(r'\bAS\s+IDENTITY\b', rest, re.IGNORECASE)),
+            default=default.group(1).strip() if default else None
+        ))
+    return columns
+
+
+def iter_statements(source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Lazily yield SqlStatements from a file object, streaming it chunk by chunk."""
+    out = []
+    state = NORMAL
+    pending_space = False
+    carry = ''
+
+    while True:
+        chunk = source.read(chunk_size)
+        eof = not chunk
+        data = carry + (chunk or '')
+        carry = ''
+        n = len(data)
+        i = 0
+
+        while i < n:
+            ch = data[i]
+            nxt = data[i + 1] if i + 1 < n else None
+
+            # Characters whose meaning depends on the next one wait for more input
+            if nxt is None and not eof and (
+                (state == NORMAL and ch in '-/') or
+                (state == BLOCK_COMMENT and ch == '*') or
+                (state in _STATE_QUOTES and ch in ("\\", _STATE_QUOTES[state]))
+            ):
+                carry = ch
+                break
+
+            if state == NORMAL:
+                if ch.isspace():
+                    pending_space = bool(out)
+                    i += 1
+                elif ch == '-' and nxt == '-':
+                    state = LINE_COMMENT
+                    pending_space = bool(out)
+                    i += 2
+                elif ch == '/' and nxt == '*':
+                    state = BLOCK_COMMENT
+                    pending_space = bool(out)
+                    i += 2
+                elif ch == ';':
+                    if out:
+                        yield classify(''.join(out))
+                    out = []
+                    pending_space = False
+                    i += 1
+                else:
+                    if pending_space:
+                        out.append(' ')
+                        pending_space = False
+                    out.append(ch)
+                    state = _QUOTE_STATES.get(ch, NORMAL)
+                    i += 1
+            elif state == LINE_COMMENT:
+                if ch == '\n':
+                    state = NORMAL
+                i += 1
+            elif state == BLOCK_COMMENT:
+                if ch == '*' and nxt == '/':
+                    state = NORMAL
+                    i += 2
+                else:
+                    i += 1
+            else:
+                quote = _STATE_QUOTES[state]
+                out.append(ch)
+                if ch == '\\' and state != BACKTICK and nxt is not None:
+                    out.append(nxt)
+                    i += 2
+                elif ch == quote:
+                    if nxt == quote:
+                        # Doubled quote is an escaped quote, stay inside the literal
+                        out.append(nxt)
+                        i += 2
+                    else:
+                        state = NORMAL
+                        i += 1
+                else:
+                    i += 1
+
+        if eof:
+            break
+
+    if state in _STATE_QUOTES:
+        raise ValueError(f"Unterminated {_STATE_QUOTES[state]} literal at end of SQL script")
+    if out:
+        yield classify(''.join(out))
+
+
+def parse_sql_file(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield SqlStatements from the SQL file at `path`."""
+    with open(path, 'r') as f:
+        yield from iter_statements(f, chunk_size)
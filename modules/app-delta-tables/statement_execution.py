@@ -0,0 +1,327 @@
+"""
+SQL Statement Execution API helpers shared by the Delta REST scripts.
+Statements are submitted with a server-side wait first, then polled with
+exponential backoff if they are still running when the inline wait ends.
+fetch_rows() does the same for queries whose (small) results are needed.
+"""
+
+import os
+import time
+
+from databricks_http_client import get_client
+from provisioning_trace import span
+
+TERMINAL_FAILURE_STATES = ['FAILED', 'CANCELED', 'CLOSED']
+RUNNING_STATES = ['PENDING', 'RUNNING']
+
+
+def use_async_executor():
+    """True when DATABRICKS_SQL_EXECUTOR selects the asyncio executor over threads.
+
+    Lives here rather than in async_statement_execution so the choice can be
+    made without importing asyncio.
+    """
+    return os.environ.get('DATABRICKS_SQL_EXECUTOR', 'threads').lower() == 'async'
+
+
+class PollingPolicy:
+    """How long to wait inline on submit and how to space out status polls."""
+
+    def __init__(self, wait_timeout_seconds=50, initial_interval=0.25,
+                 multiplier=2.0, max_interval=10.0, max_wait_seconds=120):
+        # The API accepts 0 (async) or 5-50 seconds for wait_timeout
+        if wait_timeout_seconds:
+            wait_timeout_seconds = max(5, min(50, int(wait_timeout_seconds)))
+        self.wait_timeout_seconds = int(wait_timeout_seconds)
+        self.initial_interval = initial_interval
+        self.multiplier = multiplier
+        self.max_interval = max_interval
+        self.max_wait_seconds = max_wait_seconds
+
+    @classmethod
+    def from_env(cls, **overrides):
+        """Build a policy from DATABRICKS_SQL_* environment variables."""
+        settings = {
+            'wait_timeout_seconds': int(os.environ.get('DATABRICKS_SQL_WAIT_TIMEOUT', '50')),
+            'initial_interval': float(os.environ.get('DATABRICKS_SQL_POLL_INITIAL', '0.25')),
+            'multiplier': float(os.environ.get('DATABRICKS_SQL_POLL_MULTIPLIER', '2.0')),
+            'max_interval': float(os.environ.get('DATABRICKS_SQL_POLL_MAX', '10.0')),
+            'max_wait_seconds': float(os.environ.get('DATABRICKS_SQL_MAX_WAIT', '120')),
+        }
+        settings.update(overrides)
+        return cls(**settings)
+
+    def intervals(self):
+        """Yield sleep intervals between polls: short at first, then backing off."""
+        interval = self.initial_interval
+        while True:
+            yield interval
+            interval = min(self.max_interval, interval * self.multiplier)
+
+
+def _check_state(result, elapsed):
+    """Return True/False for a finished statement, None while it is still running."""
+    status = result.get('status', {}).get('state', 'UNKNOWN')
+
+    if status == 'SUCCEEDED':
+        print(f"✅ Success (took {elapsed:.1f}s)")
+        return True
+    elif status in TERMINAL_FAILURE_STATES:
+        error_info = result.get('status', {}).get('error', {})
+        error_msg = error_info.get('message', f'Statement {status}')
+        print(f"❌ {error_msg}")
+        return False
+    elif status in RUNNING_STATES:
+        return None
+    else:
+        print(f"❌ Unknown status: {status}")
+        return False
+
+
+def _observe(trace, result, start_time):
+    """Note on the statement's span how long it was seen queued (PENDING)."""
+    if trace is not None and result.get('status', {}).get('state') == 'PENDING':
+        trace.set(queue_wait_seconds=round(time.time() - start_time, 3))
+
+
+def poll_statement_status(host, token, statement_id, max_wait_seconds=None,
+                          policy=None, start_time=None, trace=None):
+    """Poll statement status with backoff until completion.
+
+    `token` may be a raw access token or a TokenProvider. `trace` is the
+    statement's span, which collects poll counts and queue wait. A statement
+    still running when polling stops (timeout, KeyboardInterrupt, poll error)
+    is cancelled, so a False result never leaves it to finish unobserved.
+    """
+    policy = policy or PollingPolicy.from_env()
+    if max_wait_seconds is None:
+        max_wait_seconds = policy.max_wait_seconds
+
+    api_url = f"{host}/api/2.0/sql/statements/{statement_id}"
+
+    start_time = start_time or time.time()
+    finished = False
+    try:
+        for interval in policy.intervals():
+            elapsed = time.time() - start_time
+            if elapsed > max_wait_seconds:
+                print(f"❌ Timeout after {elapsed:.0f}s")
+                return False
+
+            # Don't sleep past the deadline
+            delay = min(interval, max(0, max_wait_seconds - elapsed))
+            time.sleep(delay)
+            if trace is not None:
+                trace.add('poll_count')
+                trace.add('poll_sleep_seconds', delay)
+                trace.set(last_poll_gap_seconds=round(delay, 3))
+
+            try:
+                # Resolved per poll so a long-running statement outlives its token
+                response = get_client().get(api_url, label="poll", token=token, timeout=30)
+                response.raise_for_status()
+                result = response.json()
+                _observe(trace, result, start_time)
+                state = _check_state(result, time.time() - start_time)
+                if state is not None:
+                    finished = True
+                    return state
+            except Exception as e:
+                print(f"❌ Error polling status: {e}")
+                return False
+    finally:
+        if not finished:
+            cancel_statement(host, token, statement_id)
+
+
+def execute_sql_statement(host, token, warehouse_id, statement, timeout_seconds=None,
+                          policy=None, verbose=False, table_name=None):
+    """Execute SQL statement using SQL Statement Execution API.
+
+    `table_name` only labels the statement's trace span.
+    """
+    kind = statement.split(None, 1)[0].upper() if statement.strip() else None
+    with span('statement', table=table_name, kind=kind) as trace:
+        ok = _execute(host, token, warehouse_id, statement, timeout_seconds, policy, verbose, trace)
+        trace.set(ok=ok)
+        return ok
+
+
+def _execute(host, token, warehouse_id, statement, timeout_seconds, policy, verbose, trace):
+    import requests
+
+    if verbose:
+        print(f"Executing: {statement[:100]}...")
+
+    policy = policy or PollingPolicy.from_env()
+    if timeout_seconds is None:
+        timeout_seconds = policy.max_wait_seconds
+
+    api_url = f"{host}/api/2.0/sql/statements"
+    payload = {
+        "statement": statement,
+        "warehouse_id": warehouse_id,
+        # Let the server hold the request while the statement runs; quick DDL
+        # comes back finished and never needs a poll
+        "wait_timeout": f"{policy.wait_timeout_seconds}s",
+    }
+    if policy.wait_timeout_seconds:
+        payload["on_wait_timeout"] = "CONTINUE"
+
+    start_time = time.time()
+    try:
+        headers = {
+            "Content-Type": "application/json"
+        }
+
+        # Submit statement
+        with span('statement.submit', table=trace.attributes.get('table')):
+            response = get_client().post(
+                api_url,
+                label="submit",
+                token=token,
+                headers=headers,
+                json=payload,
+                timeout=policy.wait_timeout_seconds + 30
+            )
+
+        if response.status_code != 200:
+            error_details = response.text
+            print(f"❌ HTTP {response.status_code}: {error_details}")
+            return False
+
+        result = response.json()
+        statement_id = result.get('statement_id')
+
+        if not statement_id:
+            print(f"❌ No statement_id in response")
+            return False
+        trace.set(statement_id=statement_id)
+        _observe(trace, result, start_time)
+
+        state = _check_state(result, time.time() - start_time)
+        if state is not None:
+            return state
+
+        # Still running after the inline wait - poll for completion
+        return poll_statement_status(
+            host, token, statement_id, timeout_seconds,
+            policy=policy, start_time=start_time, trace=trace
+        )
+
+    except requests.Timeout:
+        print(f"❌ Timeout submitting statement")
+        return False
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+
+class StatementError(Exception):
+    """A query whose results were needed did not succeed."""
+
+
+def run_query(host, token, warehouse_id, statement, result_format='JSON_ARRAY', disposition='INLINE',
+              policy=None, trace=None):
+    """Submit a query and poll until it finishes; returns the final response.
+
+    The response carries the `manifest` (schema, chunk and row counts) and
+    the first chunk of the `result`. Nothing is printed; a failed, canceled
+    or timed-out statement raises StatementError. A statement still running
+    when polling stops (timeout, KeyboardInterrupt, poll error) is cancelled.
+    """
+    policy = policy or PollingPolicy.from_env()
+    payload = {
+        "statement": statement,
+        "warehouse_id": warehouse_id,
+        "format": result_format,
+        "disposition": disposition,
+        "wait_timeout": f"{policy.wait_timeout_seconds}s",
+    }
+    if policy.wait_timeout_seconds:
+        payload["on_wait_timeout"] = "CONTINUE"
+
+    start_time = time.time()
+    response = get_client().post(
+        f"{host}/api/2.0/sql/statements", label="submit", token=token, json=payload,
+        timeout=policy.wait_timeout_seconds + 30
+    )
+    if response.status_code != 200:
+        raise StatementError(f"HTTP {response.status_code}: {response.text}")
+    result = response.json()
+    statement_id = result.get('statement_id')
+    if trace is not None:
+        trace.set(statement_id=statement_id)
+
+    intervals = policy.intervals()
+    finished = False
+    try:
+        while result.get('status', {}).get('state') in RUNNING_STATES:
+            if time.time() - start_time > policy.max_wait_seconds:
+                raise StatementError(f"Timeout after {time.time() - start_time:.0f}s")
+            time.sleep(next(intervals))
+            if trace is not None:
+                trace.add('poll_count')
+            response = get_client().get(
+                f"{host}/api/2.0/sql/statements/{statement_id}", label="poll", token=token,
+                timeout=30
+            )
+            response.raise_for_status()
+            result = response.json()
+        finished = True
+    finally:
+        # Don't leave a statement nobody is waiting for running on the warehouse
+        if not finished and statement_id:
+            cancel_statement(host, token, statement_id)
+
+    state = result.get('status', {}).get('state', 'UNKNOWN')
+    if state != 'SUCCEEDED':
+        error = result.get('status', {}).get('error', {})
+        raise StatementError(error.get('message', f"Statement {state}"))
+    result.setdefault('statement_id', statement_id)
+    return result
+
+
+def cancel_statement(host, token, statement_id):
+    """Ask the warehouse to cancel a statement; True if the request was accepted (never raises)."""
+    with span('statement.cancel', statement_id=statement_id) as trace:
+        try:
+            response = get_client().post(
+                f"{host}/api/2.0/sql/statements/{statement_id}/cancel", label="cancel",
+                token=token, timeout=30, idempotent=True
+            )
+            ok = response.status_code == 200
+        except Exception:
+            ok = False
+        trace.set(ok=ok)
+        return ok
+
+
+def result_chunk(host, token, statement_id, chunk_index):
+    """Fetch chunk `chunk_index` of a finished statement's result (data or external links)."""
+    response = get_client().get(
+        f"{host}/api/2.0/sql/statements/{statement_id}/result/chunks/{chunk_index}",
+        label="chunk", token=token, timeout=60
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_rows(host, token, warehouse_id, statement, policy=None, table_name=None):
+    """Run a query and return (column names, rows), with every value as a string or None.
+
+    Results come back inline as JSON arrays, chunk by chunk, so this is
+    meant for small results (aggregates, catalog lookups); large ones go
+    through statement_results.py. Unlike execute_sql_statement() nothing
+    is printed; failures raise StatementError.
+    """
+    with span('statement.fetch', table=table_name) as trace:
+        result = run_query(host, token, warehouse_id, statement, policy=policy, trace=trace)
+        columns = [c['name'] for c in result.get('manifest', {}).get('schema', {}).get('columns', [])]
+        chunk = result.get('result') or {}
+        rows = list(chunk.get('data_array') or [])
+        while chunk.get('next_chunk_index') is not None:
+            chunk = result_chunk(host, token, result['statement_id'], chunk['next_chunk_index'])
+            rows.extend(chunk.get('data_array') or [])
+        trace.set(rows=len(rows))
+        return columns, rows
@@ -0,0 +1,95 @@
+"""
+Content-hash ledger of statements that have already succeeded.
+The create and seed scripts fingerprint every statement they would run and
+skip the ones recorded here, so a redeploy only sends new or changed SQL
+to the warehouse (and seed INSERTs are never applied twice).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+LEDGER_VERSION = 1
+# Persist after this many new records so a crash loses little work
+SAVE_EVERY = 50
+
+
+class StatementLedger:
+    """Fingerprints of applied statements for one target, persisted to a JSON file.
+
+    With no path the ledger is disabled: nothing is ever skipped or saved.
+    """
+
+    def __init__(self, path, scope):
+        self.path = path
+        self.scope = scope
+        self._entries = {}
+        self._occurrences = {}
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == LEDGER_VERSION:
+                self._entries = data.get('entries', {})
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def next_fingerprint(self, text):
+        """Fingerprint for the next occurrence of `text`.
+
+        Repeating an identical statement in a file is deliberate (e.g. the same
+        INSERT twice), so each occurrence gets its own fingerprint.
+        """
+        base = hashlib.sha256(f"{self.scope}\0{text}".encode('utf-8')).hexdigest()
+        with self._lock:
+            occurrence = self._occurrences.get(base, 0)
+            self._occurrences[base] = occurrence + 1
+        if occurrence == 0:
+            return base
+        return hashlib.sha256(f"{base}\0{occurrence}".encode('utf-8')).hexdigest()
+
+    def is_applied(self, fingerprint):
+        return self.enabled and fingerprint in self._entries
+
+    def record(self, fingerprint, summary=''):
+        """Mark a statement as applied."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[fingerprint] = {
+                'applied_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'summary': summary[:80],
+            }
+            self._unsaved += 1
+            should_save = self._unsaved >= SAVE_EVERY
+        if should_save:
+            self.save()
+
+    def save(self):
+        """Atomically write the ledger file."""
+        if not self.enabled:
+            return
+        with self._lock:
+            payload = {'version': LEDGER_VERSION, 'entries': dict(self._entries)}
+            self._unsaved = 0
+        ledger_dir = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(ledger_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=ledger_dir, prefix='.ledger-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(payload, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+
+def open_ledger(scope):
+    """Ledger at PROVISIONING_LEDGER_FILE (disabled when unset), scoped to e.g. the workspace host."""
+    return StatementLedger(os.environ.get('PROVISIONING_LEDGER_FILE') or None, scope)
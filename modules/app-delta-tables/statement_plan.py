@@ -0,0 +1,149 @@
+"""
+Compiled statement plans for the Delta REST scripts.
+Parsing a SQL file and qualifying its table names is done once per
+(file contents, target catalog/schema, parser version): the result is
+written as a JSON Lines plan under PROVISIONING_PLAN_DIR and later runs
+execute the plan without touching the SQL parser. A plan file is also a
+reviewable record of exactly what will be sent to the warehouse.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+from sql_script_parser import PARSER_VERSION
+
+PLAN_VERSION = 2
+
+DEFAULT_CATALOG = "afc-mvp"
+DEFAULT_SCHEMA = "fraud-investigation"
+
+
+def plan_target():
+    """(catalog, schema) to provision, from DATABRICKS_CATALOG / DATABRICKS_SCHEMA."""
+    return (
+        os.environ.get('DATABRICKS_CATALOG') or DEFAULT_CATALOG,
+        os.environ.get('DATABRICKS_SCHEMA') or DEFAULT_SCHEMA,
+    )
+
+
+def qualifier(catalog, schema):
+    """Function mapping a bare table name to `catalog`.`schema`.`table`."""
+    return lambda table: f"`{catalog}`.`{schema}`.`{table}`"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StatementPlan:
+    """A compiled plan: `header` says what it was compiled from, records() streams its entries.
+
+    A plan that isn't kept in the cache lives in a temporary file that
+    close() removes.
+    """
+
+    def __init__(self, path, header, temporary=False):
+        self.path = path
+        self.header = header
+        self.temporary = temporary
+
+    def records(self):
+        with open(self.path, 'r') as f:
+            f.readline()
+            for line in f:
+                yield json.loads(line)
+
+    def close(self):
+        if self.temporary and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _read_header(path):
+    with open(path, 'r') as f:
+        return json.loads(f.readline())
+
+
+def _write_plan(path, header, records):
+    """Atomically write the header line followed by one line per record."""
+    plan_dir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(plan_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=plan_dir, prefix='.plan-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(json.dumps(header, sort_keys=True) + '\n')
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _prune_stale_plans(plan_dir, header):
+    # Older compilations of the same file for the same target are superseded
+    for name in os.listdir(plan_dir):
+        path = os.path.join(plan_dir, name)
+        if not name.startswith(f"{header['kind']}-") or not name.endswith('.jsonl'):
+            continue
+        try:
+            other = _read_header(path)
+        except (OSError, ValueError):
+            continue
+        if other.get('key') != header['key'] and all(
+            other.get(field) == header[field] for field in ('source', 'catalog', 'schema')
+        ):
+            os.unlink(path)
+
+
+def open_plan(kind, sql_file, compile_records, catalog, schema, settings=None):
+    """Load the `kind` plan of `sql_file` for the target from the cache, compiling it on a miss.
+
+    `compile_records()` yields the plan's JSON-serializable records in order.
+    `settings` holds anything else the compiled output depends on (e.g. batch
+    limits) and is part of the cache key, with the file's hash, the target
+    and PARSER_VERSION. With PROVISIONING_PLAN_DIR unset the plan is compiled
+    into a temporary file for this run only.
+    """
+    header = {
+        'version': PLAN_VERSION,
+        'kind': kind,
+        'parser_version': PARSER_VERSION,
+        'source_sha256': file_sha256(sql_file),
+        'catalog': catalog,
+        'schema': schema,
+        'settings': settings or {},
+    }
+    header['key'] = hashlib.sha256(json.dumps(header, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    header['source'] = os.path.abspath(sql_file)
+
+    plan_dir = os.environ.get('PROVISIONING_PLAN_DIR')
+    if not plan_dir:
+        fd, path = tempfile.mkstemp(prefix=f"{kind}-plan-", suffix='.jsonl')
+        os.close(fd)
+        _write_plan(path, header, compile_records())
+        return StatementPlan(path, header, temporary=True)
+
+    path = os.path.join(plan_dir, f"{kind}-{header['key']}.jsonl")
+    try:
+        if _read_header(path).get('key') == header['key']:
+            print(f"📋 Using compiled plan {path}")
+            return StatementPlan(path, header)
+    except (OSError, ValueError):
+        pass
+
+    _write_plan(path, header, compile_records())
+    _prune_stale_plans(plan_dir, header)
+    print(f"📋 Compiled plan {path}")
+    return StatementPlan(path, header)
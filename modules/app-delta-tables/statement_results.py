@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Large query results from the SQL Statement Execution API as Arrow.
+Queries run with format ARROW_STREAM and disposition EXTERNAL_LINKS, so
+the warehouse writes the result as Arrow IPC chunks to cloud storage and
+returns presigned links. The chunks are downloaded in parallel, a bounded
+number ahead of the consumer and in order, and handed out as
+pyarrow.RecordBatch objects or written straight into a Parquet file.
+Rows are never turned into Python objects, and memory stays at a few
+chunks whatever the size of the result.
+
+Requires pyarrow.
+
+Usage:
+    statement_results.py <workspace_url> <warehouse_id> (--query SQL | --query-file FILE)
+                         --output FILE.parquet [--workers 4] [--max-wait SECONDS] [--check]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from databricks_http_client import get_client, normalize_host
+from oauth_token_provider import get_token_provider
+from provisioning_trace import span
+from statement_execution import PollingPolicy, StatementError, result_chunk, run_query
+
+# Chunks downloaded at once (and so held in memory at most, plus the one being read)
+DEFAULT_DOWNLOAD_WORKERS = 4
+# Links this close to expiry are fetched again before downloading
+LINK_EXPIRY_MARGIN_SECONDS = 30
+DOWNLOAD_TIMEOUT_SECONDS = 300
+# Exports run far longer than provisioning DDL: default wait for the query to finish
+DEFAULT_MAX_WAIT_SECONDS = 3600
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("❌ Arrow result fetching requires pyarrow (pip install pyarrow)")
+        raise
+
+
+def export_policy(max_wait_seconds=None):
+    """The DATABRICKS_SQL_* polling policy with the export deadline (DATABRICKS_RESULT_MAX_WAIT)."""
+    if max_wait_seconds is None:
+        max_wait_seconds = float(os.environ.get('DATABRICKS_RESULT_MAX_WAIT', DEFAULT_MAX_WAIT_SECONDS))
+    return PollingPolicy.from_env(max_wait_seconds=max_wait_seconds)
+
+
+def arrow_schema(manifest):
+    """pyarrow schema for the manifest's columns (only needed when there are no chunks to read it from)."""
+    import pyarrow as pa
+
+    simple = {
+        'BOOLEAN': pa.bool_(), 'BYTE': pa.int8(), 'SHORT': pa.int16(), 'INT': pa.int32(),
+        'LONG': pa.int64(), 'FLOAT': pa.float32(), 'DOUBLE': pa.float64(), 'DATE': pa.date32(),
+        'TIMESTAMP': pa.timestamp('us', tz='UTC'), 'TIMESTAMP_NTZ': pa.timestamp('us'),
+        'BINARY': pa.binary(),
+    }
+    fields = []
+    for column in manifest.get('schema', {}).get('columns', []):
+        type_name = column.get('type_name', 'STRING')
+        if type_name == 'DECIMAL':
+            arrow_type = pa.decimal128(int(column.get('type_precision', 38)), int(column.get('type_scale', 0)))
+        else:
+            arrow_type = simple.get(type_name, pa.string())
+        fields.append(pa.field(column['name'], arrow_type))
+    return pa.schema(fields)
+
+
+def _expires_soon(link):
+    expiration = link.get('expiration')
+    if not expiration:
+        return False
+    try:
+        expires_at = datetime.fromisoformat(expiration.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return False
+    return expires_at - time.time() < LINK_EXPIRY_MARGIN_SECONDS
+
+
+class ArrowResult:
+    """A finished ARROW_STREAM / EXTERNAL_LINKS statement whose chunks are downloaded on demand."""
+
+    def __init__(self, host, token, response):
+        self.host = host
+        self.token = token
+        self.statement_id = response['statement_id']
+        self.manifest = response.get('manifest', {})
+        self.columns = [c['name'] for c in self.manifest.get('schema', {}).get('columns', [])]
+        self.total_row_count = self.manifest.get('total_row_count', 0)
+        self.total_chunk_count = self.manifest.get('total_chunk_count', 0)
+        # Set when the warehouse cut the result off at its byte limit
+        self.truncated = bool(self.manifest.get('truncated'))
+        self._links = {}
+        self._remember((response.get('result') or {}).get('external_links'))
+
+    def _remember(self, links):
+        for link in links or ():
+            self._links[link['chunk_index']] = link
+
+    def _link(self, chunk_index, refresh=False):
+        link = self._links.get(chunk_index)
+        if refresh or link is None or _expires_soon(link):
+            # Asking for the chunk again returns a fresh presigned link
+            self._remember(result_chunk(self.host, self.token, self.statement_id, chunk_index).get('external_links'))
+            link = self._links[chunk_index]
+        return link
+
+    def download(self, chunk_index):
+        """Bytes of one Arrow IPC chunk, fetching a fresh link if the current one has expired."""
+        with span('result.download', chunk=chunk_index) as trace:
+            for attempt in range(2):
+                link = self._link(chunk_index, refresh=attempt > 0)
+                # Presigned cloud storage URL: no workspace Authorization header
+                response = get_client().get(
+                    link['external_link'], label="download", headers=link.get('http_headers') or {},
+                    timeout=DOWNLOAD_TIMEOUT_SECONDS
+                )
+                if response.status_code in (401, 403, 404) and attempt == 0:
+                    continue
+                response.raise_for_status()
+                trace.set(bytes=len(response.content))
+                return response.content
+
+    def iter_batches(self, workers=DEFAULT_DOWNLOAD_WORKERS):
+        """Yield the result's RecordBatches in order, downloading up to `workers` chunks ahead."""
+        import pyarrow as pa
+
+        executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        in_flight = deque()
+        next_chunk = 0
+        try:
+            while next_chunk < self.total_chunk_count or in_flight:
+                while next_chunk < self.total_chunk_count and len(in_flight) < max(1, workers):
+                    in_flight.append(executor.submit(self.download, next_chunk))
+                    next_chunk += 1
+                payload = in_flight.popleft().result()
+                with pa.ipc.open_stream(pa.py_buffer(payload)) as reader:
+                    yield from reader
+        finally:
+            # Also runs when the consumer stops early: drop the downloads nobody will read
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def write_parquet(self, path, workers=DEFAULT_DOWNLOAD_WORKERS, compression='snappy'):
+        """Stream the result into a Parquet file at `path` (written atomically); returns the row count."""
+        import pyarrow.parquet as pq
+
+        target_dir = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=target_dir, prefix='.result-', suffix='.parquet')
+        os.close(fd)
+        rows = 0
+        writer = None
+        try:
+            for batch in self.iter_batches(workers):
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, batch.schema, compression=compression)
+                writer.write_batch(batch)
+                rows += batch.num_rows
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, arrow_schema(self.manifest), compression=compression)
+            writer.close()
+            writer = None
+            os.replace(tmp_path, path)
+        except BaseException:
+            if writer is not None:
+                writer.close()
+            os.unlink(tmp_path)
+            raise
+        return rows
+
+
+def execute_arrow_query(host, token, warehouse_id, statement, policy=None, table_name=None):
+    """Run a query with ARROW_STREAM / EXTERNAL_LINKS results; returns an ArrowResult.
+
+    `token` may be a raw access token or a TokenProvider. `policy` defaults
+    to export_policy(). Failures raise StatementError; a query that times
+    out or is interrupted is cancelled.
+    """
+    _require_pyarrow()
+    with span('statement.query', table=table_name) as trace:
+        response = run_query(host, token, warehouse_id, statement, result_format='ARROW_STREAM',
+                             disposition='EXTERNAL_LINKS', policy=policy or export_policy(), trace=trace)
+        result = ArrowResult(host, token, response)
+        trace.set(rows=result.total_row_count, chunks=result.total_chunk_count)
+        return result
+
+
+def iter_record_batches(host, token, warehouse_id, statement, workers=DEFAULT_DOWNLOAD_WORKERS, policy=None):
+    """Lazily yield the query's result as pyarrow.RecordBatch objects."""
+    result = execute_arrow_query(host, token, warehouse_id, statement, policy=policy)
+    yield from result.iter_batches(workers)
+
+
+def query_to_parquet(host, token, warehouse_id, statement, path, workers=DEFAULT_DOWNLOAD_WORKERS, policy=None):
+    """Run a query and write its result to a Parquet file; returns the ArrowResult and row count."""
+    result = execute_arrow_query(host, token, warehouse_id, statement, policy=policy)
+    with span('result.parquet', path=path) as trace:
+        rows = result.write_parquet(path, workers)
+        trace.set(rows=rows)
+    return result, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a query result to Parquet through Arrow external links")
+    parser.add_argument('workspace_url')
+    parser.add_argument('warehouse_id')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--query', help="SQL query to run")
+    source.add_argument('--query-file', help="File with the SQL query to run")
+    parser.add_argument('--output', required=True, help="Parquet file to write")
+    parser.add_argument('--workers', type=int,
+                        default=int(os.environ.get('DATABRICKS_RESULT_DOWNLOAD_WORKERS', DEFAULT_DOWNLOAD_WORKERS)),
+                        help="Result chunks downloaded in parallel")
+    parser.add_argument('--max-wait', type=float, default=None,
+                        help=f"Seconds to wait for the query before cancelling it "
+                             f"(default: DATABRICKS_RESULT_MAX_WAIT or {DEFAULT_MAX_WAIT_SECONDS})")
+    parser.add_argument('--check', action='store_true', help="Only validate the query and output path")
+    args = parser.parse_args()
+
+    try:
+        if args.query_file:
+            with open(args.query_file, 'r') as f:
+                args.query = f.read()
+    except OSError as e:
+        print(f"❌ Cannot read query file: {e}")
+        sys.exit(1)
+    if not args.query.strip():
+        print("❌ Empty query")
+        sys.exit(1)
+    output_dir = os.path.dirname(os.path.abspath(args.output))
+    if not os.path.isdir(output_dir):
+        print(f"❌ Output directory does not exist: {output_dir}")
+        sys.exit(1)
+    _require_pyarrow()
+
+    client_id = os.environ.get('DATABRICKS_CLIENT_ID')
+    client_secret = os.environ.get('DATABRICKS_CLIENT_SECRET')
+    if args.check:
+        if not client_id or not client_secret:
+            print("⚠️  DATABRICKS_CLIENT_ID or DATABRICKS_CLIENT_SECRET not set (needed for a real run)")
+        print(f"✅ Query ({len(args.query)} chars) -> {args.output}")
+        sys.exit(0)
+    if not client_id or not client_secret:
+        print("❌ Missing DATABRICKS_CLIENT_ID or DATABRICKS_CLIENT_SECRET")
+        sys.exit(1)
+
+    host = normalize_host(args.workspace_url)
+    token = get_token_provider(host, client_id, client_secret)
+    start = time.time()
+    try:
+        result, rows = query_to_parquet(host, token, args.warehouse_id, args.query, args.output, args.workers,
+                                        policy=export_policy(args.max_wait))
+    except KeyboardInterrupt:
+        # A query still running was cancelled; a partial output file was removed
+        print("\n❌ Interrupted")
+        sys.exit(130)
+    except StatementError as e:
+        print(f"❌ Query failed: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Export failed: {e}")
+        sys.exit(1)
+
+    print(f"✅ {rows} rows in {result.total_chunk_count} chunk(s) written to {args.output} "
+          f"({os.path.getsize(args.output) / 1e6:.1f} MB, {time.time() - start:.1f}s)")
+    if result.truncated:
+        print("⚠️  The warehouse truncated the result at its size limit")
+    get_client().print_stats()
+
+
+if __name__ == "__main__":
+    with span('script.statement_results'):
+        main()
@@ -19,3 +19,108 @@ variable "databricks_client_secret" {
   sensitive   = true
 }
 
+
+variable "catalog_name" {
+  description = "Unity Catalog catalog the Delta tables are created in"
+  type        = string
+  default     = "afc-mvp"
+}
+
+variable "schema_name" {
+  description = "Schema (within catalog_name) the Delta tables are created in"
+  type        = string
+  default     = "fraud-investigation"
+}
+
+variable "ddl_workers" {
+  description = "Number of CREATE TABLE statements to run concurrently (1 = sequential)"
+  type        = number
+  default     = 6
+}
+
+variable "seed_workers" {
+  description = "Number of tables to seed concurrently (1 = one table at a time)"
+  type        = number
+  default     = 6
+}
+
+variable "seed_batch_max_rows" {
+  description = "Maximum rows per batched seed INSERT statement"
+  type        = number
+  default     = 1000
+}
+
+variable "seed_batch_max_bytes" {
+  description = "Maximum size in bytes of a batched seed INSERT statement"
+  type        = number
+  default     = 1048576
+}
+
+variable "seed_mode" {
+  description = "How seed data is loaded: \"insert\" (batched INSERTs) or \"copy\" (Parquet staged in a volume + COPY INTO)"
+  type        = string
+  default     = "insert"
+
+  validation {
+    condition     = contains(["insert", "copy"], var.seed_mode)
+    error_message = "seed_mode must be \"insert\" or \"copy\"."
+  }
+}
+
+variable "seed_volume_path" {
+  description = "Unity Catalog volume used to stage seed files when seed_mode = \"copy\" (empty = /Volumes/<catalog_name>/<schema_name>/seed_staging)"
+  type        = string
+  default     = ""
+}
+
+variable "seed_data_dir" {
+  description = "Directory of <table>.csv/.parquet files or <table>/ part directories loaded when seed_mode = \"copy\" (empty = the sql/ directory)"
+  type        = string
+  default     = ""
+}
+
+variable "token_cache" {
+  description = "Where provisioner scripts cache OAuth tokens: \"memory\" (per process) or \"disk\" (0600 file shared across runs)"
+  type        = string
+  default     = "memory"
+
+  validation {
+    condition     = contains(["memory", "disk"], var.token_cache)
+    error_message = "token_cache must be \"memory\" or \"disk\"."
+  }
+}
+
+variable "statement_ledger" {
+  description = "Record applied DDL/seed statements in .provisioning-ledger.json and skip them on later applies"
+  type        = bool
+  default     = true
+}
+
+variable "warehouse_start_timeout" {
+  description = "Seconds to wait for a stopped SQL warehouse to reach RUNNING before provisioning (0 = skip the warm-up)"
+  type        = number
+  default     = 600
+}
+
+variable "statement_executor" {
+  description = "How the REST scripts run statements: \"threads\" (a thread per worker) or \"async\" (one asyncio event loop, needs aiohttp; ddl_workers/seed_workers cap statements in flight and unfinished statements are cancelled on interrupt)"
+  type        = string
+  default     = "threads"
+
+  validation {
+    condition     = contains(["threads", "async"], var.statement_executor)
+    error_message = "statement_executor must be \"threads\" or \"async\"."
+  }
+}
+
+variable "provisioning_runner" {
+  description = "Run Delta DDL and seeding in one provisioning_runner.py process (one resource) instead of one script per resource"
+  type        = bool
+  default     = false
+}
+
+variable "statement_plan_cache" {
+  description = "Keep compiled statement plans (parsed, qualified and batched SQL) in .provisioning-plans/ so unchanged SQL files aren't parsed again on later applies"
+  type        = bool
+  default     = true
+}
@@ -0,0 +1,139 @@
+"""
+Pre-flight warm-up of the SQL warehouse used by the provisioning scripts.
+The warehouse state is checked through the Warehouses API and a stopped
+warehouse is started in a background thread, so its cold start overlaps
+with token fetching and SQL parsing instead of being absorbed by the first
+statement (which would otherwise often hit the statement poll timeout).
+"""
+
+import os
+import threading
+import time
+
+from databricks_http_client import get_client
+from provisioning_trace import span
+
+READY_STATES = ['RUNNING']
+# STARTING and STOPPING are waited out; a STOPPING warehouse is started once it has stopped
+STOPPED_STATES = ['STOPPED']
+GONE_STATES = ['DELETED', 'DELETING']
+
+DEFAULT_START_TIMEOUT_SECONDS = 600
+DEFAULT_POLL_SECONDS = 5
+
+
+class WarehouseWarmup:
+    """Brings a warehouse to RUNNING in the background; wait() blocks until it is ready.
+
+    If the warehouse state can't be read (e.g. the service principal lacks
+    permission on the Warehouses API) readiness is assumed and statements are
+    submitted as before.
+    """
+
+    def __init__(self, host, token, warehouse_id, timeout_seconds=None,
+                 poll_seconds=DEFAULT_POLL_SECONDS):
+        if timeout_seconds is None:
+            timeout_seconds = float(os.environ.get(
+                'DATABRICKS_WAREHOUSE_START_TIMEOUT', DEFAULT_START_TIMEOUT_SECONDS
+            ))
+        self.host = host
+        self.token = token
+        self.warehouse_id = warehouse_id
+        self.timeout_seconds = timeout_seconds
+        self.poll_seconds = poll_seconds
+        self.enabled = os.environ.get('DATABRICKS_WAREHOUSE_WARMUP', 'on').lower() not in ('off', '0', 'false')
+
+        self.ready = None
+        self.state = None
+        self._done = threading.Event()
+        self._thread = None
+        self._announced = False
+
+    def start(self):
+        """Begin warming up in a background thread; returns self."""
+        if not self.enabled:
+            self.ready = True
+            self._done.set()
+            return self
+        self._thread = threading.Thread(target=self._run, name='warehouse-warmup', daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self):
+        """Block until the warehouse is RUNNING; False if it never got there."""
+        if self._thread is None and not self._done.is_set():
+            self.start()
+        if not self._done.is_set():
+            # Several workers may wait at once; say so only once
+            if not self._announced:
+                self._announced = True
+                print(f"⏳ Waiting for warehouse {self.warehouse_id} to start...")
+            self._done.wait()
+        return bool(self.ready)
+
+    def _api_url(self, suffix=''):
+        return f"{self.host}/api/2.0/sql/warehouses/{self.warehouse_id}{suffix}"
+
+    def _get_state(self):
+        response = get_client().get(
+            self._api_url(), label="warehouse", token=self.token, timeout=30
+        )
+        if response.status_code != 200:
+            return None, response
+        return response.json().get('state', 'UNKNOWN'), response
+
+    def _run(self):
+        with span('warehouse.warmup', warehouse_id=self.warehouse_id) as trace:
+            try:
+                self.ready = self._bring_up(trace)
+            except Exception as e:
+                # Don't block provisioning on a failed pre-flight; the statements
+                # themselves will report a real problem
+                print(f"⚠️  Warehouse pre-flight check failed ({e}), continuing")
+                self.ready = True
+            finally:
+                trace.set(ok=self.ready, final_state=self.state)
+                self._done.set()
+
+    def _bring_up(self, trace):
+        deadline = time.time() + self.timeout_seconds
+        state, response = self._get_state()
+        trace.set(initial_state=state)
+        if state is None:
+            print(f"⚠️  Could not read warehouse state (HTTP {response.status_code}), skipping warm-up")
+            return True
+
+        started = False
+        while True:
+            self.state = state
+            if state in READY_STATES:
+                if started:
+                    print(f"✅ Warehouse {self.warehouse_id} is RUNNING")
+                return True
+            if state in GONE_STATES:
+                print(f"❌ Warehouse {self.warehouse_id} is {state}")
+                return False
+            if state in STOPPED_STATES and not started:
+                print(f"🔌 Warehouse {self.warehouse_id} is {state}, starting it...")
+                response = get_client().post(
+                    self._api_url('/start'), label="warehouse", token=self.token, timeout=30,
+                    idempotent=True
+                )
+                if response.status_code != 200:
+                    print(f"❌ Could not start warehouse: HTTP {response.status_code}: {response.text}")
+                    return False
+                started = True
+                trace.set(started=True)
+            if time.time() >= deadline:
+                print(f"❌ Warehouse {self.warehouse_id} still {state} after {self.timeout_seconds:.0f}s")
+                return False
+            time.sleep(min(self.poll_seconds, max(0.0, deadline - time.time())))
+            state, response = self._get_state()
+            if state is None:
+                print(f"⚠️  Lost warehouse state (HTTP {response.status_code}), continuing")
+                return True
+
+
+def start_warehouse_warmup(host, token, warehouse_id):
+    """Start warming up `warehouse_id` in the background and return the WarehouseWarmup."""
+    return WarehouseWarmup(host, token, warehouse_id).start()
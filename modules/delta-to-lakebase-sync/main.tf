@@ -1,15 +1,26 @@
 # Terraform module to sync Unity Catalog Delta tables to Lakebase
 # Syncs operational fraud data from Delta to PostgreSQL for app queries
 # All tables use a single shared DLT pipeline for efficiency (bin-packed)
+# The tables come from sync_tables.json: adding a table is a manifest change
+# Synced tables copy every row and column of their source and only use each
+# entry's name and primary_key; their layout is the source's CLUSTER BY and
+# the Lakebase indexes the index advisor recommends
 
-# Primary sync: siu_cases (creates the shared pipeline)
-resource "databricks_database_synced_database_table" "siu_cases" {
-  name = "${var.lakebase_catalog_name}.${var.target_schema}.siu_cases"
+locals {
+  sync_tables = jsondecode(file("${path.module}/sync_tables.json")).tables
+
+  # The first table in the manifest creates the shared pipeline; the rest reuse it
+  pipeline_table = local.sync_tables[0]
+  shared_tables  = { for table in slice(local.sync_tables, 1, length(local.sync_tables)) : table.name => table }
+}
+
+resource "databricks_database_synced_database_table" "pipeline_table" {
+  name = "${var.lakebase_catalog_name}.${var.target_schema}.${local.pipeline_table.name}"
 
   spec = {
-    source_table_full_name = "${var.source_catalog}.${var.source_schema}.siu_cases"
-    primary_key_columns    = ["case_id"]
-    scheduling_policy      = "TRIGGERED"
+    source_table_full_name = "${var.source_catalog}.${var.source_schema}.${local.pipeline_table.name}"
+    primary_key_columns    = [local.pipeline_table.primary_key]
+    scheduling_policy      = var.scheduling_policy
     
     # Create a new pipeline for all tables to share
     new_pipeline_spec = {
@@ -18,78 +29,178 @@ resource "databricks_database_synced_database_table" "siu_cases" {
   }
 }
 
-# Sync: transactions (uses shared pipeline)
-resource "databricks_database_synced_database_table" "transactions" {
-  name = "${var.lakebase_catalog_name}.${var.target_schema}.transactions"
+resource "databricks_database_synced_database_table" "tables" {
+  for_each = local.shared_tables
+
+  name = "${var.lakebase_catalog_name}.${var.target_schema}.${each.key}"
 
   spec = {
-    source_table_full_name = "${var.source_catalog}.${var.source_schema}.transactions"
-    primary_key_columns    = ["transaction_id"]
-    scheduling_policy      = "TRIGGERED"
+    source_table_full_name = "${var.source_catalog}.${var.source_schema}.${each.key}"
+    primary_key_columns    = [each.value.primary_key]
+    scheduling_policy      = var.scheduling_policy
     
-    # Reuse the pipeline created by siu_cases
-    existing_pipeline_id = databricks_database_synced_database_table.siu_cases.data_synchronization_status.pipeline_id
+    # Reuse the pipeline created by the first table
+    existing_pipeline_id = databricks_database_synced_database_table.pipeline_table.data_synchronization_status.pipeline_id
   }
 
-  depends_on = [databricks_database_synced_database_table.siu_cases]
+  depends_on = [databricks_database_synced_database_table.pipeline_table]
+}
+
+# Tables synced before the manifest drove this module keep their state
+moved {
+  from = databricks_database_synced_database_table.siu_cases
+  to   = databricks_database_synced_database_table.pipeline_table
 }
 
-# Sync: alerts (uses shared pipeline)
-resource "databricks_database_synced_database_table" "alerts" {
-  name = "${var.lakebase_catalog_name}.${var.target_schema}.alerts"
+moved {
+  from = databricks_database_synced_database_table.transactions
+  to   = databricks_database_synced_database_table.tables["transactions"]
+}
 
-  spec = {
-    source_table_full_name = "${var.source_catalog}.${var.source_schema}.alerts"
-    primary_key_columns    = ["alert_id"]
-    scheduling_policy      = "TRIGGERED"
-    
-    existing_pipeline_id = databricks_database_synced_database_table.siu_cases.data_synchronization_status.pipeline_id
+moved {
+  from = databricks_database_synced_database_table.alerts
+  to   = databricks_database_synced_database_table.tables["alerts"]
+}
+
+moved {
+  from = databricks_database_synced_database_table.claims
+  to   = databricks_database_synced_database_table.tables["claims"]
+}
+
+moved {
+  from = databricks_database_synced_database_table.investigation_activities
+  to   = databricks_database_synced_database_table.tables["investigation_activities"]
+}
+
+moved {
+  from = databricks_database_synced_database_table.fraud_indicators
+  to   = databricks_database_synced_database_table.tables["fraud_indicators"]
+}
+
+# ============================================
+# Case summaries
+# Materialized views over the Delta tables (summary_notebook.py), maintained
+# by their own pipeline in the source schema and synced to Lakebase
+# ============================================
+
+resource "databricks_notebook" "case_summaries" {
+  source = "${path.module}/summary_notebook.py"
+  path   = "${var.notebook_directory}/case_summaries"
+}
+
+resource "databricks_pipeline" "case_summaries" {
+  name       = "case-summaries"
+  catalog    = var.source_catalog
+  target     = var.source_schema
+  serverless = true
+  continuous = false
+
+  configuration = {
+    "summary.source_catalog" = var.source_catalog
+    "summary.source_schema"  = var.source_schema
   }
 
-  depends_on = [databricks_database_synced_database_table.siu_cases]
+  library {
+    notebook {
+      path = databricks_notebook.case_summaries.path
+    }
+  }
 }
 
-# Sync: claims (uses shared pipeline)
-resource "databricks_database_synced_database_table" "claims" {
-  name = "${var.lakebase_catalog_name}.${var.target_schema}.claims"
+# Refresh the summaries, then re-copy them into Lakebase: SNAPSHOT synced
+# tables only sync when their pipeline runs. Unless the manifest tables sync
+# continuously, their pipeline is triggered on the same schedule.
+resource "databricks_job" "case_summaries_refresh" {
+  name = "case-summaries-refresh"
 
-  spec = {
-    source_table_full_name = "${var.source_catalog}.${var.source_schema}.claims"
-    primary_key_columns    = ["claim_id"]
-    scheduling_policy      = "TRIGGERED"
-    
-    existing_pipeline_id = databricks_database_synced_database_table.siu_cases.data_synchronization_status.pipeline_id
+  schedule {
+    quartz_cron_expression = var.summary_refresh_cron
+    timezone_id            = "UTC"
+  }
+
+  task {
+    task_key = "refresh"
+
+    pipeline_task {
+      pipeline_id = databricks_pipeline.case_summaries.id
+    }
+  }
+
+  task {
+    task_key = "sync_summaries"
+
+    depends_on {
+      task_key = "refresh"
+    }
+
+    pipeline_task {
+      pipeline_id = databricks_database_synced_database_table.case_summary.data_synchronization_status.pipeline_id
+    }
   }
 
-  depends_on = [databricks_database_synced_database_table.siu_cases]
+  dynamic "task" {
+    for_each = var.scheduling_policy == "CONTINUOUS" ? [] : [1]
+
+    content {
+      task_key = "sync_tables"
+
+      pipeline_task {
+        pipeline_id = databricks_database_synced_database_table.pipeline_table.data_synchronization_status.pipeline_id
+      }
+    }
+  }
+}
+
+# Creating the pipeline does not run it: build the views once so the synced
+# tables below have a source
+resource "null_resource" "case_summaries_update" {
+  triggers = {
+    pipeline_id = databricks_pipeline.case_summaries.id
+    notebook    = filemd5("${path.module}/summary_notebook.py")
+    script      = filemd5("${path.module}/run_pipeline_update.py")
+  }
+
+  provisioner "local-exec" {
+    command = <<-EOT
+      export DATABRICKS_CLIENT_ID="${var.databricks_client_id}"
+      export DATABRICKS_CLIENT_SECRET="${var.databricks_client_secret}"
+      
+      python3 ${path.module}/run_pipeline_update.py \
+        "${var.workspace_url}" \
+        "${databricks_pipeline.case_summaries.id}" \
+        --timeout "${var.summary_update_timeout}"
+    EOT
+  }
 }
 
-# Sync: investigation_activities (uses shared pipeline)
-resource "databricks_database_synced_database_table" "investigation_activities" {
-  name = "${var.lakebase_catalog_name}.${var.target_schema}.investigation_activities"
+# Materialized views have no Change Data Feed, so the summaries are re-copied
+# in full (they are small: one row per case / per region and status)
+resource "databricks_database_synced_database_table" "case_summary" {
+  name = "${var.lakebase_catalog_name}.${var.target_schema}.case_summary"
 
   spec = {
-    source_table_full_name = "${var.source_catalog}.${var.source_schema}.investigation_activities"
-    primary_key_columns    = ["activity_id"]
-    scheduling_policy      = "TRIGGERED"
+    source_table_full_name = "${var.source_catalog}.${var.source_schema}.case_summary"
+    primary_key_columns    = ["case_id"]
+    scheduling_policy      = "SNAPSHOT"
     
-    existing_pipeline_id = databricks_database_synced_database_table.siu_cases.data_synchronization_status.pipeline_id
+    new_pipeline_spec = {
+    }
   }
 
-  depends_on = [databricks_database_synced_database_table.siu_cases]
+  depends_on = [null_resource.case_summaries_update]
 }
 
-# Sync: fraud_indicators (uses shared pipeline)
-resource "databricks_database_synced_database_table" "fraud_indicators" {
-  name = "${var.lakebase_catalog_name}.${var.target_schema}.fraud_indicators"
+resource "databricks_database_synced_database_table" "case_status_summary" {
+  name = "${var.lakebase_catalog_name}.${var.target_schema}.case_status_summary"
 
   spec = {
-    source_table_full_name = "${var.source_catalog}.${var.source_schema}.fraud_indicators"
-    primary_key_columns    = ["indicator_id"]
-    scheduling_policy      = "TRIGGERED"
+    source_table_full_name = "${var.source_catalog}.${var.source_schema}.case_status_summary"
+    primary_key_columns    = ["region", "status"]
+    scheduling_policy      = "SNAPSHOT"
     
-    existing_pipeline_id = databricks_database_synced_database_table.siu_cases.data_synchronization_status.pipeline_id
+    # Reuse the pipeline created by case_summary
+    existing_pipeline_id = databricks_database_synced_database_table.case_summary.data_synchronization_status.pipeline_id
   }
 
-  depends_on = [databricks_database_synced_database_table.siu_cases]
+  depends_on = [databricks_database_synced_database_table.case_summary]
 }
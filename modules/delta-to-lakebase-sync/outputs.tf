@@ -1,22 +1,33 @@
 output "synced_tables" {
   description = "List of tables being synced from Delta to Lakebase"
-  value = [
-    "siu_cases",
-    "transactions",
-    "alerts",
-    "claims",
-    "investigation_activities",
-    "fraud_indicators"
-  ]
+  value       = [for table in local.sync_tables : table.name]
+}
+
+output "summary_tables" {
+  description = "Pre-aggregated summary tables synced to Lakebase, with their primary key columns"
+  value = {
+    for table in [
+      databricks_database_synced_database_table.case_summary,
+      databricks_database_synced_database_table.case_status_summary
+    ] : table.name => table.spec.primary_key_columns
+  }
+}
+
+output "summary_pipeline_id" {
+  description = "DLT pipeline maintaining the case summaries"
+  value       = databricks_pipeline.case_summaries.id
 }
 
 output "sync_schedule" {
-  description = "Sync schedule (cron expression)"
-  value       = "Daily at 23:00 UTC"
+  description = "When the synced tables are refreshed: the case-summaries-refresh job's Quartz cron expression (UTC), or continuous for the manifest tables"
+  value = {
+    tables    = var.scheduling_policy == "CONTINUOUS" ? "continuous" : "${var.summary_refresh_cron} (UTC)"
+    summaries = "${var.summary_refresh_cron} (UTC)"
+  }
 }
 
 output "sync_mode" {
   description = "Sync mode used for all tables"
-  value       = "full"
+  value       = var.scheduling_policy == "SNAPSHOT" ? "full" : "incremental"
 }
 
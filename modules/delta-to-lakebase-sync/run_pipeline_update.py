@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Run one update of a Delta Live Tables pipeline and wait for it to finish.
+Terraform creates the summary pipeline but creating a pipeline does not
+run it; the synced tables reading its materialized views need them to
+exist, so the first update is run here at apply time.
+
+Usage:
+    run_pipeline_update.py <workspace_url> <pipeline_id> [--timeout SECONDS] [--full-refresh]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(MODULE_DIR, '..', 'app-delta-tables'))
+
+from databricks_http_client import get_client, normalize_host
+from oauth_token_provider import get_token_provider
+from provisioning_trace import span
+
+DONE_STATES = ['COMPLETED']
+FAILED_STATES = ['FAILED', 'CANCELED']
+DEFAULT_TIMEOUT_SECONDS = 3600
+POLL_SECONDS = 15
+
+
+def start_update(host, token, pipeline_id, full_refresh=False):
+    """Start an update; returns its update_id (that of the running update if one is already active)."""
+    url = f"{host}/api/2.0/pipelines/{pipeline_id}/updates"
+    response = get_client().post(
+        url, label="pipeline", token=token, json={"full_refresh": full_refresh}, timeout=30
+    )
+    if response.status_code == 409:
+        # An update is already running (e.g. the scheduled one): wait for that instead
+        latest = get_client().get(
+            f"{host}/api/2.0/pipelines/{pipeline_id}", label="pipeline", token=token, timeout=30
+        )
+        latest.raise_for_status()
+        updates = latest.json().get('latest_updates') or []
+        if updates:
+            return updates[0]['update_id']
+    response.raise_for_status()
+    return response.json()['update_id']
+
+
+def wait_for_update(host, token, pipeline_id, update_id, timeout_seconds=DEFAULT_TIMEOUT_SECONDS):
+    """Poll an update until it finishes; returns its final state (None on timeout)."""
+    url = f"{host}/api/2.0/pipelines/{pipeline_id}/updates/{update_id}"
+    deadline = time.time() + timeout_seconds
+    state = None
+    while time.time() < deadline:
+        response = get_client().get(url, label="pipeline", token=token, timeout=30)
+        response.raise_for_status()
+        new_state = response.json().get('update', {}).get('state')
+        if new_state != state:
+            state = new_state
+            print(f"   Update {update_id}: {state}")
+        if state in DONE_STATES or state in FAILED_STATES:
+            return state
+        time.sleep(POLL_SECONDS)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one DLT pipeline update and wait for it")
+    parser.add_argument('workspace_url')
+    parser.add_argument('pipeline_id')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT_SECONDS,
+                        help="Seconds to wait for the update to finish")
+    parser.add_argument('--full-refresh', action='store_true', help="Recompute every table from scratch")
+    args = parser.parse_args()
+
+    client_id = os.environ.get('DATABRICKS_CLIENT_ID')
+    client_secret = os.environ.get('DATABRICKS_CLIENT_SECRET')
+    if not client_id or not client_secret:
+        print("❌ Missing DATABRICKS_CLIENT_ID or DATABRICKS_CLIENT_SECRET")
+        sys.exit(1)
+
+    host = normalize_host(args.workspace_url)
+    token = get_token_provider(host, client_id, client_secret)
+    print(f"▶️  Running pipeline {args.pipeline_id}...")
+    start = time.time()
+    try:
+        with span('pipeline.update', pipeline_id=args.pipeline_id) as trace:
+            update_id = start_update(host, token, args.pipeline_id, args.full_refresh)
+            state = wait_for_update(host, token, args.pipeline_id, update_id, args.timeout)
+            trace.set(update_id=update_id, state=state)
+    except Exception as e:
+        print(f"❌ Pipeline update failed: {e}")
+        sys.exit(1)
+
+    if state is None:
+        print(f"❌ Pipeline update still running after {args.timeout:.0f}s")
+        sys.exit(1)
+    if state not in DONE_STATES:
+        print(f"❌ Pipeline update {state}")
+        sys.exit(1)
+    print(f"✅ Pipeline update completed ({time.time() - start:.0f}s)")
+
+
+if __name__ == "__main__":
+    with span('script.run_pipeline_update'):
+        main()
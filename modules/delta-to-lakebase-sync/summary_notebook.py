@@ -0,0 +1,101 @@
+# Databricks notebook source
+# MAGIC %md
+# MAGIC # Case Summaries
+# MAGIC Pre-aggregated per-case and per-region rollups (`case_summary`, `case_status_summary`) so
+# MAGIC the app and dashboards can read them with a primary-key lookup instead of joining five
+# MAGIC tables on every page load.
+# MAGIC
+# MAGIC The summaries are materialized views over the Delta source tables, written to the
+# MAGIC pipeline's own catalog and schema; Terraform syncs them to Lakebase like the raw tables.
+
+# COMMAND ----------
+
+import dlt
+from pyspark.sql import functions as F
+
+# Configuration (overridable from the pipeline configuration)
+SOURCE_CATALOG = spark.conf.get("summary.source_catalog", "afc-mvp")
+SOURCE_SCHEMA = spark.conf.get("summary.source_schema", "fraud-investigation")
+
+# COMMAND ----------
+
+# MAGIC %md
+# MAGIC ## Summaries
+# MAGIC Materialized views over the source tables. DLT refreshes them incrementally where the
+# MAGIC aggregation allows it, so an update only recomputes the cases whose rows changed.
+
+# COMMAND ----------
+
+# Alert statuses that no longer need attention
+CLOSED_ALERT_STATUSES = ["Resolved", "Dismissed", "Closed"]
+
+
+def source(name):
+    return spark.read.table(f"`{SOURCE_CATALOG}`.`{SOURCE_SCHEMA}`.{name}")
+
+
+@dlt.table(
+    name="case_summary",
+    comment="Per-case rollup of transactions, alerts, indicators and activities (one row per case_id)",
+    cluster_by=["case_id"]
+)
+def case_summary():
+    # Each child table is reduced to one row per case before joining, so the
+    # joins never fan out
+    transactions = source("transactions").groupBy("case_id").agg(
+        F.count("*").alias("transaction_count"),
+        F.sum("amount").alias("transaction_amount"),
+        F.max("risk_score").alias("max_risk_score"),
+        F.max("transaction_date").alias("last_transaction_date")
+    )
+    alerts = source("alerts").groupBy("case_id").agg(
+        F.count("*").alias("alert_count"),
+        F.count(F.when(~F.col("status").isin(CLOSED_ALERT_STATUSES), 1)).alias("open_alert_count")
+    )
+    indicators = source("fraud_indicators").groupBy("case_id").agg(
+        F.count("*").alias("indicator_count")
+    )
+    # Latest activity per case: max over a (date, type, investigator) struct
+    # keeps the whole row that has the newest date
+    activities = source("investigation_activities").groupBy("case_id").agg(
+        F.count("*").alias("activity_count"),
+        F.max(F.struct("activity_date", "activity_type", "investigator")).alias("latest")
+    ).select(
+        "case_id",
+        "activity_count",
+        F.col("latest.activity_date").alias("latest_activity_date"),
+        F.col("latest.activity_type").alias("latest_activity_type"),
+        F.col("latest.investigator").alias("latest_activity_investigator")
+    )
+
+    counts = ["transaction_count", "alert_count", "open_alert_count", "indicator_count", "activity_count"]
+    return (
+        source("siu_cases")
+        .select("case_id", "claim_id", "status", "priority", "region", "fraud_score",
+                "loss_amount", "investigator_name", "updated_at")
+        .join(transactions, "case_id", "left")
+        .join(alerts, "case_id", "left")
+        .join(indicators, "case_id", "left")
+        .join(activities, "case_id", "left")
+        .fillna(0, subset=counts)
+    )
+
+# COMMAND ----------
+
+@dlt.table(
+    name="case_status_summary",
+    comment="Case counts and totals per region and status (one row per region/status pair)"
+)
+def case_status_summary():
+    return (
+        source("siu_cases")
+        .fillna("Unknown", subset=["region", "status"])
+        .groupBy("region", "status")
+        .agg(
+            F.count("*").alias("case_count"),
+            F.sum("loss_amount").alias("total_loss_amount"),
+            F.avg("fraud_score").alias("avg_fraud_score"),
+            F.count(F.when(F.col("priority") == "High", 1)).alias("high_priority_count"),
+            F.max("updated_at").alias("last_updated_at")
+        )
+    )
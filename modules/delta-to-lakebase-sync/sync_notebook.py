@@ -2,74 +2,124 @@
 # MAGIC %md
 # MAGIC # Delta to Lakebase Sync Pipeline
 # MAGIC Single DLT pipeline to sync all fraud management tables from Delta to Lakebase PostgreSQL
+# MAGIC
+# MAGIC The tables to sync are listed in a manifest (`sync_tables.json` in this module), whose
+# MAGIC workspace path must be set in the pipeline configuration `sync.manifest`. Each entry has:
+# MAGIC - `name`, `primary_key`, `comment`
+# MAGIC - `columns` (optional projection) and `filter` (optional SQL predicate)
+# MAGIC
+# MAGIC The manifest carries no layout: Delta tables are laid out by the source schema's
+# MAGIC `CLUSTER BY` (sql/app_delta_schema.sql) and the Lakebase copies are indexed as
+# MAGIC `lakebase_index_advisor.py` recommends from their query workload.
+# MAGIC
+# MAGIC Adding a table is a manifest change. DLT refreshes the tables in parallel since none depend on each other.
+# MAGIC
+# MAGIC By default each table is synced incrementally: the source table's Change Data Feed is
+# MAGIC streamed and applied with `dlt.apply_changes` keyed on the primary key, so an update only
+# MAGIC moves rows that changed since the last run. A change whose new values fall outside the
+# MAGIC table's `filter` deletes the row from the target. Set the pipeline configuration
+# MAGIC `sync.mode = full` to fall back to a full re-read of every source table.
 
 # COMMAND ----------
 
+import json
+
 import dlt
 from pyspark.sql import functions as F
 
-# Configuration
-SOURCE_CATALOG = "afc-mvp"
-SOURCE_SCHEMA = "fraud-investigation"
-TARGET_CATALOG = "afc_lakebase_catalog"
-TARGET_SCHEMA = "fraud_management"
-
-# COMMAND ----------
-
-# MAGIC %md
-# MAGIC ## Table Syncs
-
-# COMMAND ----------
-
-@dlt.table(
-    name=f"{TARGET_CATALOG}.{TARGET_SCHEMA}.siu_cases",
-    comment="SIU Cases synced from Delta to Lakebase"
-)
-def siu_cases():
-    return spark.read.table(f"`{SOURCE_CATALOG}`.`{SOURCE_SCHEMA}`.siu_cases")
-
-# COMMAND ----------
-
-@dlt.table(
-    name=f"{TARGET_CATALOG}.{TARGET_SCHEMA}.transactions",
-    comment="Transactions synced from Delta to Lakebase"
-)
-def transactions():
-    return spark.read.table(f"`{SOURCE_CATALOG}`.`{SOURCE_SCHEMA}`.transactions")
+# Configuration (overridable from the pipeline configuration)
+SOURCE_CATALOG = spark.conf.get("sync.source_catalog", "afc-mvp")
+SOURCE_SCHEMA = spark.conf.get("sync.source_schema", "fraud-investigation")
+TARGET_CATALOG = spark.conf.get("sync.target_catalog", "afc_lakebase_catalog")
+TARGET_SCHEMA = spark.conf.get("sync.target_schema", "fraud_management")
+# Required: a pipeline's working directory is not the notebook's, so there is no usable default
+MANIFEST_PATH = spark.conf.get("sync.manifest", None)
+if not MANIFEST_PATH:
+    raise ValueError("Set the pipeline configuration sync.manifest to the workspace path of sync_tables.json")
 
-# COMMAND ----------
+# "incremental" (Change Data Feed + apply_changes) or "full" (batch re-read)
+SYNC_MODE = spark.conf.get("sync.mode", "incremental")
 
-@dlt.table(
-    name=f"{TARGET_CATALOG}.{TARGET_SCHEMA}.alerts",
-    comment="Alerts synced from Delta to Lakebase"
-)
-def alerts():
-    return spark.read.table(f"`{SOURCE_CATALOG}`.`{SOURCE_SCHEMA}`.alerts")
+# Metadata columns added by readChangeFeed that must not reach the target
+CDF_COLUMNS = ["_change_type", "_commit_version", "_commit_timestamp"]
+# Set on change rows whose post-image fails the manifest filter
+OUT_OF_FILTER_COLUMN = "_out_of_filter"
 
 # COMMAND ----------
 
-@dlt.table(
-    name=f"{TARGET_CATALOG}.{TARGET_SCHEMA}.claims",
-    comment="Claims synced from Delta to Lakebase"
-)
-def claims():
-    return spark.read.table(f"`{SOURCE_CATALOG}`.`{SOURCE_SCHEMA}`.claims")
+def load_manifest(path):
+    with open(path, "r") as f:
+        return json.load(f)["tables"]
+
+
+def source_table(name):
+    return f"`{SOURCE_CATALOG}`.`{SOURCE_SCHEMA}`.{name}"
+
+
+def shape(df, table, extra_columns=()):
+    """Apply the manifest's filter and projection, reading only the columns that are synced."""
+    if table.get("filter"):
+        df = df.where(table["filter"])
+    return project(df, table, extra_columns)
+
+
+def project(df, table, extra_columns=()):
+    """Apply the manifest's projection, keeping the primary key and `extra_columns`."""
+    if table.get("columns"):
+        columns = list(table["columns"])
+        if table["primary_key"] not in columns:
+            columns.insert(0, table["primary_key"])
+        df = df.select(*columns, *extra_columns)
+    return df
+
+
+def sync_table(table):
+    """Register the DLT objects that keep TARGET_SCHEMA.<name> in sync with its Delta source."""
+    name = table["name"]
+    target = f"{TARGET_CATALOG}.{TARGET_SCHEMA}.{name}"
+    comment = table.get("comment", f"{name} synced from Delta to Lakebase")
+
+    if SYNC_MODE == "full":
+        @dlt.table(name=target, comment=comment)
+        def full_refresh():
+            return shape(spark.read.table(source_table(name)), table)
+        return
+
+    changes_view = f"{name}_changes"
+
+    @dlt.view(name=changes_view, comment=f"Change Data Feed of {name}")
+    def changes():
+        # Pre-images carry the old values of an update; apply_changes only needs the post-image
+        feed = (
+            spark.readStream
+            .option("readChangeFeed", "true")
+            .table(source_table(name))
+            .filter(F.col("_change_type") != "update_preimage")
+        )
+        # The filter can't drop change rows: a row updated out of it would
+        # keep its old values in the target. Its post-image deletes it instead.
+        predicate = F.expr(table["filter"]) if table.get("filter") else F.lit(True)
+        feed = feed.withColumn(OUT_OF_FILTER_COLUMN, ~F.coalesce(predicate, F.lit(False)))
+        return project(feed, table, extra_columns=CDF_COLUMNS + [OUT_OF_FILTER_COLUMN])
+
+    dlt.create_streaming_table(name=target, comment=comment)
+
+    dlt.apply_changes(
+        target=target,
+        source=changes_view,
+        keys=[table["primary_key"]],
+        sequence_by=F.col("_commit_version"),
+        apply_as_deletes=F.expr(f"_change_type = 'delete' OR {OUT_OF_FILTER_COLUMN}"),
+        except_column_list=CDF_COLUMNS + [OUT_OF_FILTER_COLUMN],
+        stored_as_scd_type=1
+    )
 
 # COMMAND ----------
 
-@dlt.table(
-    name=f"{TARGET_CATALOG}.{TARGET_SCHEMA}.investigation_activities",
-    comment="Investigation Activities synced from Delta to Lakebase"
-)
-def investigation_activities():
-    return spark.read.table(f"`{SOURCE_CATALOG}`.`{SOURCE_SCHEMA}`.investigation_activities")
+# MAGIC %md
+# MAGIC ## Table Syncs
 
 # COMMAND ----------
 
-@dlt.table(
-    name=f"{TARGET_CATALOG}.{TARGET_SCHEMA}.fraud_indicators",
-    comment="Fraud Indicators synced from Delta to Lakebase"
-)
-def fraud_indicators():
-    return spark.read.table(f"`{SOURCE_CATALOG}`.`{SOURCE_SCHEMA}`.fraud_indicators")
-
+for table in load_manifest(MANIFEST_PATH):
+    sync_table(table)
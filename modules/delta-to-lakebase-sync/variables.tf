@@ -10,6 +10,22 @@ variable "source_schema" {
   default     = "fraud-investigation"
 }
 
+variable "workspace_url" {
+  description = "Databricks workspace URL (used to run the summary pipeline at apply time)"
+  type        = string
+}
+
+variable "databricks_client_id" {
+  description = "Databricks Service Principal Client ID for authentication"
+  type        = string
+}
+
+variable "databricks_client_secret" {
+  description = "Databricks Service Principal Client Secret for authentication"
+  type        = string
+  sensitive   = true
+}
+
 variable "lakebase_catalog_name" {
   description = "Unity Catalog database catalog name for Lakebase"
   type        = string
@@ -21,3 +37,32 @@ variable "target_schema" {
   default     = "fraud_management"
 }
 
+
+variable "scheduling_policy" {
+  description = "Synced table scheduling policy: SNAPSHOT re-copies each table in full, TRIGGERED/CONTINUOUS apply only changed rows from the source Change Data Feed"
+  type        = string
+  default     = "TRIGGERED"
+
+  validation {
+    condition     = contains(["SNAPSHOT", "TRIGGERED", "CONTINUOUS"], var.scheduling_policy)
+    error_message = "scheduling_policy must be SNAPSHOT, TRIGGERED or CONTINUOUS."
+  }
+}
+
+variable "notebook_directory" {
+  description = "Workspace directory the summary notebook is uploaded to"
+  type        = string
+  default     = "/Shared/delta-to-lakebase-sync"
+}
+
+variable "summary_refresh_cron" {
+  description = "Quartz cron expression (UTC) for refreshing the case summaries and triggering the synced table pipelines"
+  type        = string
+  default     = "0 30 22 * * ?"
+}
+
+variable "summary_update_timeout" {
+  description = "Seconds to wait for the summary pipeline's first update at apply time"
+  type        = number
+  default     = 3600
+}
@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+Post-sync consistency check between the Delta source tables and their
+Lakebase copies (the synced tables listed in sync_tables.json).
+Each table is split into primary-key ranges. For every range both sides
+compute a row count and an order-independent hash (the sum of a 60-bit
+md5 prefix per row, over a canonical text form of the row) in one GROUP BY
+query: the SQL Statement Execution API on the Delta side, psycopg2 on the
+Lakebase side. Only ranges whose aggregates differ are split further, and
+only small differing ranges are compared row by row (primary key plus row
+hash), so a 50M-row table that matches costs a few kilobytes of hashes.
+The queries of one drill-down level run concurrently.
+
+Usage:
+    verify_sync_consistency.py <workspace_url> <warehouse_id> [--tables siu_cases alerts]
+                               [--lakebase-host HOST] [--chunk-rows 100000] [--json FILE] [--check]
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Shared helpers live with the Delta scripts, the pool with the Lakebase ones
+sys.path.insert(0, os.path.join(MODULE_DIR, '..', 'app-delta-tables'))
+sys.path.insert(0, os.path.join(MODULE_DIR, '..', 'lakebase'))
+
+from databricks_http_client import get_client, normalize_host
+from oauth_token_provider import get_token_provider
+from provisioning_trace import span
+from statement_execution import StatementError, fetch_rows
+from statement_plan import plan_target
+
+DEFAULT_MANIFEST = os.path.join(MODULE_DIR, 'sync_tables.json')
+DEFAULT_LAKEBASE_SCHEMA = 'fraud_management'
+
+# Rows per first-level range; differing ranges are split DEFAULT_FANOUT ways
+DEFAULT_CHUNK_ROWS = 100000
+DEFAULT_FANOUT = 16
+# Ranges at most this big are compared row by row
+DEFAULT_LEAF_ROWS = 1000
+# Stop fetching row hashes for a table past this many (e.g. an empty copy)
+DEFAULT_MAX_DIFF_ROWS = 20000
+DEFAULT_WORKERS = 8
+MAX_FIRST_LEVEL_CHUNKS = 4096
+MAX_REPORTED_KEYS = 20
+
+DELTA = 'delta'
+POSTGRES = 'postgres'
+INTEGRAL_TYPES = ('tinyint', 'smallint', 'int', 'integer', 'bigint', 'long', 'short', 'byte')
+UNSUPPORTED_TYPES = ('array', 'map', 'struct', 'binary', 'variant', 'interval')
+DECIMAL_TYPE = re.compile(r'^decimal\((\d+)\s*,\s*(\d+)\)$')
+# Floating point columns are compared at this many decimal places
+FLOAT_SCALE = 6
+
+
+def quote(dialect, name):
+    if dialect == DELTA:
+        return '`' + name.replace('`', '``') + '`'
+    return '"' + name.replace('"', '""') + '"'
+
+
+def literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def render_column(dialect, name, data_type):
+    """SQL expression giving `name` the same text form on both sides (NULL stays NULL).
+
+    `data_type` is the Delta type; it decides the form for both sides, so
+    e.g. a TIMESTAMP is compared as epoch microseconds whether Lakebase
+    stores it as timestamp or timestamptz.
+    """
+    column = quote(dialect, name)
+    data_type = data_type.lower()
+    decimal = DECIMAL_TYPE.match(data_type)
+    if data_type == 'timestamp':
+        if dialect == DELTA:
+            return f"CAST(unix_micros({column}) AS STRING)"
+        return f"(extract(epoch FROM {column}) * 1000000)::bigint::text"
+    if data_type == 'timestamp_ntz':
+        if dialect == DELTA:
+            return f"date_format({column}, 'yyyy-MM-dd HH:mm:ss.SSSSSS')"
+        return f"to_char({column}, 'YYYY-MM-DD HH24:MI:SS.US')"
+    if data_type == 'date':
+        if dialect == DELTA:
+            return f"date_format({column}, 'yyyy-MM-dd')"
+        return f"to_char({column}, 'YYYY-MM-DD')"
+    if data_type == 'boolean':
+        return f"CASE WHEN {column} THEN 't' WHEN NOT {column} THEN 'f' END"
+    if decimal or data_type in ('float', 'double', 'real'):
+        scale = decimal.group(2) if decimal else FLOAT_SCALE
+        if dialect == DELTA:
+            return f"CAST(CAST({column} AS DECIMAL(38, {scale})) AS STRING)"
+        return f"{column}::numeric(38, {scale})::text"
+    if dialect == DELTA:
+        return f"CAST({column} AS STRING)"
+    return f"{column}::text"
+
+
+def row_hash(dialect, columns):
+    """Non-negative 60-bit hash of the row's canonical text, identical on both sides."""
+    # chr(31) separates values and chr(30) stands for NULL, so ('a', NULL) != ('a', '')
+    parts = ', '.join(f"coalesce({render_column(dialect, name, data_type)}, chr(30))"
+                      for name, data_type in columns)
+    text = f"concat_ws(chr(31), {parts})"
+    if dialect == DELTA:
+        return f"CAST(conv(substr(md5({text}), 1, 15), 16, 10) AS BIGINT)"
+    return f"('x' || substr(md5({text}), 1, 15))::bit(60)::bigint"
+
+
+def key_expression(dialect, primary_key, numeric):
+    """Integer the table is range-split on: the key itself, or a 32-bit md5 prefix of a string key."""
+    column = quote(dialect, primary_key)
+    if numeric:
+        return column
+    if dialect == DELTA:
+        return f"CAST(conv(substr(md5(CAST({column} AS STRING)), 1, 8), 16, 10) AS BIGINT)"
+    return f"('x' || substr(md5({column}::text), 1, 8))::bit(32)::bigint"
+
+
+class TableQueries:
+    """The three queries the verifier runs against one side of one table."""
+
+    def __init__(self, dialect, table_ref, primary_key, numeric_key, columns, where=None):
+        self.dialect = dialect
+        key = key_expression(dialect, primary_key, numeric_key)
+        pk_text = render_column(dialect, primary_key, 'string')
+        self._source = (f"SELECT {key} AS k, {pk_text} AS pk, {row_hash(dialect, columns)} AS h "
+                        f"FROM {table_ref}" + (f" WHERE {where}" if where else ''))
+
+    def bounds(self):
+        return f"SELECT count(*), min(k), max(k) FROM ({self._source}) s"
+
+    def chunk_hashes(self, lo, hi, width):
+        """(bucket, count, hash sum) per `width`-sized key range in [lo, hi]."""
+        if self.dialect == DELTA:
+            bucket, total = f"(k - {lo}) div {width}", "CAST(sum(CAST(h AS DECIMAL(38, 0))) AS STRING)"
+        else:
+            bucket, total = f"(k - {lo}) / {width}", "sum(h)::text"
+        return (f"SELECT {bucket} AS bucket, count(*), {total} FROM ({self._source}) s "
+                f"WHERE k BETWEEN {lo} AND {hi} GROUP BY 1")
+
+    def row_hashes(self, lo, hi):
+        return f"SELECT pk, h FROM ({self._source}) s WHERE k BETWEEN {lo} AND {hi}"
+
+
+class DeltaSide:
+    """Delta source tables, queried through a SQL warehouse."""
+
+    name = DELTA
+
+    def __init__(self, host, token, warehouse_id, catalog, schema):
+        self.host = host
+        self.token = token
+        self.warehouse_id = warehouse_id
+        self.catalog = catalog
+        self.schema = schema
+
+    def table_ref(self, table):
+        return f"{quote(DELTA, self.catalog)}.{quote(DELTA, self.schema)}.{quote(DELTA, table)}"
+
+    def describe(self, table):
+        """[(column, Delta type)] in table order; empty if the table doesn't exist."""
+        return [tuple(row) for row in self.query(
+            f"SELECT column_name, full_data_type FROM {quote(DELTA, self.catalog)}.information_schema.columns "
+            f"WHERE table_schema = {literal(self.schema)} AND table_name = {literal(table)} "
+            f"ORDER BY ordinal_position", table
+        )]
+
+    def query(self, statement, table=None):
+        return fetch_rows(self.host, self.token, self.warehouse_id, statement, table_name=table)[1]
+
+
+class LakebaseSide:
+    """Synced copies in Lakebase, queried through the shared connection pool."""
+
+    name = POSTGRES
+
+    def __init__(self, lakebase_pool, schema):
+        self.pool = lakebase_pool
+        self.schema = schema
+
+    def table_ref(self, table):
+        return f"{quote(POSTGRES, self.schema)}.{quote(POSTGRES, table)}"
+
+    def describe(self, table):
+        return [tuple(row) for row in self.pool.fetch_all(
+            "SELECT column_name, data_type FROM information_schema.columns "
+            "WHERE table_schema = %s AND table_name = %s ORDER BY ordinal_position",
+            (self.schema, table)
+        )]
+
+    def query(self, statement, table=None):
+        with span('lakebase.query', table=table):
+            rows = self.pool.fetch_all(statement)
+        # Same shape as the Statement API: strings (or None)
+        return [[None if v is None else str(v) for v in row] for row in rows]
+
+
+class TableResult:
+    """Outcome of verifying one table."""
+
+    def __init__(self, table):
+        self.table = table
+        self.status = 'match'
+        self.delta_rows = 0
+        self.lakebase_rows = 0
+        self.chunks_compared = 0
+        self.chunks_differing = 0
+        self.hash_rows = 0
+        self.leaf_rows = 0
+        self.missing = []
+        self.extra = []
+        self.different = []
+        self.missing_count = 0
+        self.extra_count = 0
+        self.different_count = 0
+        self.unresolved_ranges = []
+        self.notes = []
+        self.error = None
+        self.seconds = 0.0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def load_manifest(path, names=None):
+    """Tables (name, primary_key, optional columns and filter) from sync_tables.json.
+
+    A filter is a predicate both Spark SQL and PostgreSQL accept (plain
+    comparisons on columns), as it is run against both sides.
+    """
+    with open(path, 'r') as f:
+        tables = json.load(f)['tables']
+    for table in tables:
+        if not table.get('name') or not table.get('primary_key'):
+            raise ValueError(f"{path}: every table needs a name and a primary_key")
+    if names:
+        unknown = sorted(set(names) - {table['name'] for table in tables})
+        if unknown:
+            raise ValueError(f"Not in {path}: {', '.join(unknown)}")
+        tables = [table for table in tables if table['name'] in names]
+    return tables
+
+
+def compared_columns(spec, delta_columns, lakebase_columns, result):
+    """[(column, Delta type)] to hash: the synced projection that exists on both sides."""
+    lakebase_names = {name for name, _ in lakebase_columns}
+    wanted = spec.get('columns')
+    if wanted:
+        wanted = set(wanted) | {spec['primary_key']}
+    columns = []
+    for name, data_type in delta_columns:
+        if wanted and name not in wanted:
+            continue
+        if name not in lakebase_names:
+            result.notes.append(f"column {name} is missing in Lakebase")
+            result.status = 'mismatch'
+            continue
+        if data_type.lower().split('<')[0].split('(')[0] in UNSUPPORTED_TYPES:
+            result.notes.append(f"column {name} ({data_type}) is not compared")
+            continue
+        columns.append((name, data_type))
+    return columns
+
+
+class Verifier:
+    """Runs the range drill-down for tables against one Delta and one Lakebase side."""
+
+    def __init__(self, delta, lakebase, workers=DEFAULT_WORKERS, chunk_rows=DEFAULT_CHUNK_ROWS,
+                 fanout=DEFAULT_FANOUT, leaf_rows=DEFAULT_LEAF_ROWS, max_diff_rows=DEFAULT_MAX_DIFF_ROWS):
+        self.delta = delta
+        self.lakebase = lakebase
+        self.chunk_rows = chunk_rows
+        self.fanout = max(2, fanout)
+        self.leaf_rows = leaf_rows
+        self.max_diff_rows = max_diff_rows
+        self._executor = ThreadPoolExecutor(max_workers=max(2, workers))
+
+    def close(self):
+        self._executor.shutdown()
+
+    def _both(self, table, delta_sql, lakebase_sql):
+        # Each side's query runs on the shared pool; the caller waits for both
+        delta_future = self._executor.submit(self.delta.query, delta_sql, table)
+        lakebase_future = self._executor.submit(self.lakebase.query, lakebase_sql, table)
+        return delta_future, lakebase_future
+
+    def verify(self, spec):
+        table = spec['name']
+        result = TableResult(table)
+        start = time.time()
+        with span('verify.table', table=table) as trace:
+            try:
+                self._verify(spec, result)
+            except Exception as e:
+                result.status = 'error'
+                result.error = str(e)
+            result.seconds = time.time() - start
+            trace.set(status=result.status, hash_rows=result.hash_rows, leaf_rows=result.leaf_rows)
+        return result
+
+    def _verify(self, spec, result):
+        table = spec['name']
+        delta_describe = self._executor.submit(self.delta.describe, table)
+        lakebase_describe = self._executor.submit(self.lakebase.describe, table)
+        delta_columns, lakebase_columns = delta_describe.result(), lakebase_describe.result()
+        if not delta_columns or not lakebase_columns:
+            missing = 'Delta' if not delta_columns else 'Lakebase'
+            raise StatementError(f"table not found in {missing}")
+        types = dict(delta_columns)
+        if spec['primary_key'] not in types:
+            raise StatementError(f"primary key {spec['primary_key']} not found in Delta")
+        numeric_key = types[spec['primary_key']].lower() in INTEGRAL_TYPES
+        columns = compared_columns(spec, delta_columns, lakebase_columns, result)
+
+        # The synced tables copy every row, so a manifest filter only narrows
+        # what is compared and has to hold on both sides alike
+        queries = (
+            TableQueries(DELTA, self.delta.table_ref(table), spec['primary_key'], numeric_key,
+                         columns, spec.get('filter')),
+            TableQueries(POSTGRES, self.lakebase.table_ref(table), spec['primary_key'], numeric_key,
+                         columns, spec.get('filter')),
+        )
+
+        delta_bounds, lakebase_bounds = (f.result()[0] for f in self._both(
+            table, queries[0].bounds(), queries[1].bounds()
+        ))
+        result.delta_rows = int(delta_bounds[0])
+        result.lakebase_rows = int(lakebase_bounds[0])
+        keys = [int(v) for v in delta_bounds[1:] + lakebase_bounds[1:] if v is not None]
+        if not keys:
+            return
+        lo, hi = min(keys), max(keys)
+        chunks = min(MAX_FIRST_LEVEL_CHUNKS,
+                     max(1, math.ceil(max(result.delta_rows, result.lakebase_rows) / self.chunk_rows)))
+
+        frontier = [(lo, hi, max(1, math.ceil((hi - lo + 1) / chunks)))]
+        while frontier:
+            leaves, next_frontier = self._compare_level(table, queries, frontier, result)
+            self._compare_leaves(table, queries, leaves, result)
+            frontier = next_frontier
+
+        if result.missing_count or result.extra_count or result.different_count or result.unresolved_ranges:
+            result.status = 'mismatch'
+
+    def _compare_level(self, table, queries, frontier, result):
+        """Hash every range of `frontier` on both sides; split or collect the differing ones."""
+        futures = [(lo, hi, width, self._both(
+            table, queries[0].chunk_hashes(lo, hi, width), queries[1].chunk_hashes(lo, hi, width)
+        )) for lo, hi, width in frontier]
+
+        leaves, next_frontier = [], []
+        for lo, hi, width, (delta_future, lakebase_future) in futures:
+            sides = []
+            for future in (delta_future, lakebase_future):
+                rows = future.result()
+                result.hash_rows += len(rows)
+                sides.append({int(bucket): (int(count), int(total or 0)) for bucket, count, total in rows})
+            delta_chunks, lakebase_chunks = sides
+            buckets = set(delta_chunks) | set(lakebase_chunks)
+            result.chunks_compared += len(buckets)
+
+            for bucket in sorted(buckets):
+                delta_chunk = delta_chunks.get(bucket, (0, 0))
+                lakebase_chunk = lakebase_chunks.get(bucket, (0, 0))
+                if delta_chunk == lakebase_chunk:
+                    continue
+                result.chunks_differing += 1
+                sub_lo = lo + bucket * width
+                sub_hi = min(hi, sub_lo + width - 1)
+                rows = max(delta_chunk[0], lakebase_chunk[0])
+                # A range missing on one side is all-different: splitting it tells nothing new
+                if rows <= self.leaf_rows or sub_lo == sub_hi or min(delta_chunk[0], lakebase_chunk[0]) == 0:
+                    leaves.append((sub_lo, sub_hi, rows))
+                else:
+                    next_frontier.append((sub_lo, sub_hi, max(1, math.ceil((sub_hi - sub_lo + 1) / self.fanout))))
+        return leaves, next_frontier
+
+    def _compare_leaves(self, table, queries, leaves, result):
+        """Compare the differing small ranges row by row (primary key and row hash only)."""
+        fetch = []
+        for lo, hi, rows in leaves:
+            if result.leaf_rows + rows > self.max_diff_rows:
+                result.unresolved_ranges.append([lo, hi])
+                continue
+            result.leaf_rows += rows
+            fetch.append(self._both(table, queries[0].row_hashes(lo, hi), queries[1].row_hashes(lo, hi)))
+
+        for delta_future, lakebase_future in fetch:
+            delta_rows = dict(delta_future.result())
+            lakebase_rows = dict(lakebase_future.result())
+            for key, row_hash_value in delta_rows.items():
+                if key not in lakebase_rows:
+                    result.missing_count += 1
+                    _sample(result.missing, key)
+                elif lakebase_rows[key] != row_hash_value:
+                    result.different_count += 1
+                    _sample(result.different, key)
+            for key in lakebase_rows.keys() - delta_rows.keys():
+                result.extra_count += 1
+                _sample(result.extra, key)
+
+
+def _sample(keys, key):
+    if len(keys) < MAX_REPORTED_KEYS:
+        keys.append(key)
+
+
+def print_report(results):
+    print(f"\n{'='*60}")
+    width = max([len('table')] + [len(r.table) for r in results])
+    print(f"{'table':<{width}}  {'status':<9} {'delta rows':>12} {'lakebase rows':>14} "
+          f"{'chunks':>7} {'differ':>7} {'hashes':>7}  time")
+    for r in results:
+        print(f"{r.table:<{width}}  {r.status:<9} {r.delta_rows:>12} {r.lakebase_rows:>14} "
+              f"{r.chunks_compared:>7} {r.chunks_differing:>7} {r.hash_rows + r.leaf_rows:>7}  {r.seconds:.1f}s")
+
+    for r in results:
+        if r.error:
+            print(f"\n❌ {r.table}: {r.error}")
+            continue
+        if r.status == 'match' and not r.notes:
+            continue
+        print(f"\n{'❌' if r.status != 'match' else 'ℹ️ '} {r.table}:")
+        for note in r.notes:
+            print(f"   - {note}")
+        for label, count, keys in (('missing in Lakebase', r.missing_count, r.missing),
+                                   ('only in Lakebase', r.extra_count, r.extra),
+                                   ('different', r.different_count, r.different)):
+            if count:
+                more = f" (+{count - len(keys)} more)" if count > len(keys) else ''
+                print(f"   - {count} row(s) {label}: {', '.join(map(str, keys))}{more}")
+        if r.unresolved_ranges:
+            print(f"   - {len(r.unresolved_ranges)} differing key range(s) not compared row by row "
+                  f"(over the row limit), e.g. {r.unresolved_ranges[0][0]}..{r.unresolved_ranges[0][1]}")
+
+
+def check_manifest(manifest, names=None):
+    """Validate the manifest and list what would be compared, without connecting."""
+    try:
+        tables = load_manifest(manifest, names)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ {e}")
+        return False
+    print(f"✅ {len(tables)} table(s) in {manifest}")
+    for table in tables:
+        scope = f"columns {', '.join(table['columns'])}" if table.get('columns') else "all columns"
+        where = f", where {table['filter']}" if table.get('filter') else ''
+        print(f"   {table['name']}: key {table['primary_key']}, {scope}{where}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify that the Lakebase synced tables match their Delta sources")
+    parser.add_argument('workspace_url')
+    parser.add_argument('warehouse_id')
+    parser.add_argument('--tables', nargs='+', help="Tables to verify (default: all in the manifest)")
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST)
+    parser.add_argument('--catalog', help="Delta catalog (default: DATABRICKS_CATALOG or afc-mvp)")
+    parser.add_argument('--schema', help="Delta schema (default: DATABRICKS_SCHEMA or fraud-investigation)")
+    parser.add_argument('--lakebase-host', default=os.environ.get('LAKEBASE_HOST'))
+    parser.add_argument('--lakebase-database', default=os.environ.get('LAKEBASE_DATABASE', 'fraud_detection_db'))
+    parser.add_argument('--lakebase-schema', default=os.environ.get('LAKEBASE_SYNC_SCHEMA', DEFAULT_LAKEBASE_SCHEMA))
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS, help="Rows per first-level range")
+    parser.add_argument('--fanout', type=int, default=DEFAULT_FANOUT, help="Sub-ranges per differing range")
+    parser.add_argument('--leaf-rows', type=int, default=DEFAULT_LEAF_ROWS,
+                        help="Ranges this small are compared row by row")
+    parser.add_argument('--max-diff-rows', type=int, default=DEFAULT_MAX_DIFF_ROWS,
+                        help="Row hashes fetched per table at most")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Queries in flight at once")
+    parser.add_argument('--json', help="Write the results to this file")
+    parser.add_argument('--check', action='store_true', help="Only validate the manifest, without connecting")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check_manifest(args.manifest, args.tables) else 1)
+
+    client_id = os.environ.get("DATABRICKS_CLIENT_ID")
+    client_secret = os.environ.get("DATABRICKS_CLIENT_SECRET")
+    if not all([client_id, client_secret]):
+        print("❌ Error: DATABRICKS_CLIENT_ID and DATABRICKS_CLIENT_SECRET must be set")
+        sys.exit(1)
+    if not args.lakebase_host:
+        print("❌ Error: --lakebase-host or LAKEBASE_HOST must be set")
+        sys.exit(1)
+
+    try:
+        tables = load_manifest(args.manifest, args.tables)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    default_catalog, default_schema = plan_target()
+    catalog, schema = args.catalog or default_catalog, args.schema or default_schema
+    host = normalize_host(args.workspace_url)
+
+    from lakebase_pool import connect_lakebase
+
+    try:
+        token_provider = get_token_provider(host, client_id, client_secret)
+        token_provider.token()
+        lakebase_pool = connect_lakebase(args.lakebase_host, args.lakebase_database, client_id, token_provider,
+                                         max_connections=max(2, args.workers))
+    except Exception as e:
+        print(f"❌ Failed to connect: {e}")
+        sys.exit(1)
+
+    print(f"🔎 Verifying {len(tables)} table(s): `{catalog}`.`{schema}` (Delta) vs "
+          f"{args.lakebase_database}.{args.lakebase_schema} (Lakebase)")
+    verifier = Verifier(
+        DeltaSide(host, token_provider, args.warehouse_id, catalog, schema),
+        LakebaseSide(lakebase_pool, args.lakebase_schema),
+        workers=args.workers, chunk_rows=args.chunk_rows, fanout=args.fanout,
+        leaf_rows=args.leaf_rows, max_diff_rows=args.max_diff_rows
+    )
+    try:
+        # Tables run side by side; their queries share the verifier's pool
+        with ThreadPoolExecutor(max_workers=len(tables)) as executor:
+            results = list(executor.map(verifier.verify, tables))
+    finally:
+        verifier.close()
+        lakebase_pool.close()
+
+    print_report(results)
+    get_client().print_stats()
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'catalog': catalog, 'schema': schema, 'lakebase_schema': args.lakebase_schema,
+                       'tables': [r.as_dict() for r in results]}, f, indent=2)
+        print(f"\n📄 Results written to {args.json}")
+
+    if any(r.status != 'match' for r in results):
+        sys.exit(1)
+    print("\n🎉 Delta and Lakebase are consistent!")
+
+
+if __name__ == "__main__":
+    with span('script.verify_sync_consistency'):
+        main()
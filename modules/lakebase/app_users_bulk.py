@@ -0,0 +1,255 @@
+"""
+Bulk import and export of Lakebase app_users.
+Imports stream a CSV or JSONL file of users through COPY into a staging
+table and upsert them on email, hashing plain-text `password` values into
+`password_hash` in a process pool on the way (bcrypt and argon2 are CPU
+bound, so hashing scales with cores while the database work stays a
+single COPY and merge). Exports stream app_users back out as CSV (COPY TO
+STDOUT) or JSONL (server-side cursor).
+
+Requires bcrypt (or argon2-cffi for APP_USERS_HASH_SCHEME=argon2) when the
+input has plain-text passwords.
+"""
+
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# Callers put modules/app-delta-tables on sys.path for the shared helpers
+from provisioning_trace import span
+
+# Columns an import may set; email is the upsert key
+IMPORT_COLUMNS = ['email', 'username', 'password_hash', 'full_name', 'role', 'department', 'is_active']
+# Columns a user may leave out or blank: existing users keep their value and
+# new ones get the column default (username, which has none, the email)
+OPTIONAL_COLUMNS = {'username': 'email', 'full_name': None, 'role': None, 'department': None, 'is_active': None}
+EXPORT_COLUMNS = ['user_id', 'email', 'username', 'full_name', 'role', 'department', 'is_active',
+                  'last_login', 'created_at', 'updated_at']
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+
+HASH_SCHEMES = ('bcrypt', 'argon2')
+DEFAULT_HASH_SCHEME = 'bcrypt'
+DEFAULT_BCRYPT_ROUNDS = 12
+# Users hashed per task sent to a worker process
+HASH_CHUNK_ROWS = 64
+# Rejected rows echoed before the rest are only counted
+MAX_REPORTED_REJECTS = 10
+
+TRUE_VALUES = ('true', 't', 'yes', 'y', '1', 'on')
+FALSE_VALUES = ('false', 'f', 'no', 'n', '0', 'off')
+
+
+def _require_hasher(scheme):
+    try:
+        if scheme == 'argon2':
+            import argon2  # noqa: F401
+        else:
+            import bcrypt  # noqa: F401
+    except ImportError:
+        package = 'argon2-cffi' if scheme == 'argon2' else 'bcrypt'
+        print(f"❌ Hashing {scheme} passwords requires {package} (pip install {package})")
+        raise
+
+
+def hash_password(password, scheme=DEFAULT_HASH_SCHEME, rounds=DEFAULT_BCRYPT_ROUNDS):
+    """Hash one plain-text password into the string stored in password_hash."""
+    if scheme == 'argon2':
+        from argon2 import PasswordHasher
+        return PasswordHasher().hash(password)
+    import bcrypt
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('ascii')
+
+
+def _hash_chunk(chunk, scheme, rounds):
+    # Runs in a worker process: [(row, password or None, password_hash index)] -> rows with the hash filled in
+    hashed = []
+    for row, password, hash_index in chunk:
+        if password is not None:
+            row = row[:hash_index] + (hash_password(password, scheme, rounds),) + row[hash_index + 1:]
+        hashed.append(row)
+    return hashed
+
+
+def read_users(path):
+    """Yield one dict per user from a CSV (header row) or JSONL file; empty values become None."""
+    if path.lower().endswith(JSONL_EXTENSIONS):
+        with open(path, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError(f"{path}:{line_number}: expected a JSON object per line")
+                yield {key: (None if value == '' else value) for key, value in record.items()}
+    else:
+        with open(path, 'r', newline='') as f:
+            for record in csv.DictReader(f):
+                yield {key: (None if value == '' else value) for key, value in record.items()}
+
+
+def user_row(record, columns=IMPORT_COLUMNS):
+    """(COPY row, plain-text password or None) for one input record; ValueError if unusable.
+
+    Values the record leaves out or blank are None, which the upsert reads
+    as "not given" (see OPTIONAL_COLUMNS).
+    """
+    email = (record.get('email') or '').strip()
+    if not email or '@' not in email:
+        raise ValueError(f"invalid email {record.get('email')!r}")
+    password = record.get('password')
+    if password is None and not record.get('password_hash'):
+        raise ValueError(f"{email}: needs a password or password_hash")
+
+    values = dict(record, email=email)
+    is_active = values.get('is_active')
+    if isinstance(is_active, str):
+        if is_active.strip().lower() in TRUE_VALUES:
+            is_active = True
+        elif is_active.strip().lower() in FALSE_VALUES:
+            is_active = False
+        else:
+            raise ValueError(f"{email}: invalid is_active {is_active!r}")
+    values['is_active'] = is_active
+    if password is not None:
+        values['password_hash'] = None
+    return tuple(values.get(c) for c in columns), password
+
+
+def iter_hashed_rows(rows, columns, scheme, rounds, workers, chunk_rows=HASH_CHUNK_ROWS):
+    """Yield COPY rows in input order, hashing their passwords in `workers` processes.
+
+    `rows` yields (row, password) pairs. Chunks are hashed in parallel and
+    at most `workers * 2` of them are in flight, so memory stays bounded
+    whatever the size of the input.
+    """
+    hash_index = columns.index('password_hash')
+    chunks = _chunked(((row, password, hash_index) for row, password in rows), chunk_rows)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _hash_chunk(chunk, scheme, rounds)
+        return
+
+    in_flight = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk in chunks:
+            in_flight.append(executor.submit(_hash_chunk, chunk, scheme, rounds))
+            while len(in_flight) > workers * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def _chunked(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_users(lakebase_pool, path, scheme=None, workers=None, rounds=None):
+    """Upsert the users in `path` (CSV or JSONL) into app_users on email.
+
+    Returns (inserted, updated, rejected). Rejected rows (no valid email, no
+    password) are reported and skipped; everything else is merged in one
+    transaction, so a database error leaves app_users unchanged.
+    """
+    scheme = scheme or os.environ.get('APP_USERS_HASH_SCHEME', DEFAULT_HASH_SCHEME)
+    if scheme not in HASH_SCHEMES:
+        raise ValueError(f"Unknown hash scheme {scheme!r} (expected one of {', '.join(HASH_SCHEMES)})")
+    workers = workers or int(os.environ.get('APP_USERS_HASH_WORKERS', '0')) or os.cpu_count() or 1
+    rounds = rounds or int(os.environ.get('APP_USERS_BCRYPT_ROUNDS', DEFAULT_BCRYPT_ROUNDS))
+
+    records = read_users(path)
+    first = next(records, None)
+    if first is None:
+        print(f"⚠️  No users in {path}")
+        return 0, 0, 0
+    columns = IMPORT_COLUMNS
+    hashing = 'password' in first
+    if hashing:
+        _require_hasher(scheme)
+
+    rejected = [0]
+
+    def valid_rows():
+        for number, record in enumerate(_prepend(first, records), 1):
+            try:
+                row, password = user_row(record, columns)
+                if password is not None and not hashing:
+                    raise ValueError(f"{row[0]}: 'password' must be present from the first user on")
+                yield row, password
+            except ValueError as e:
+                rejected[0] += 1
+                if rejected[0] <= MAX_REPORTED_REJECTS:
+                    print(f"⚠️  Skipping user #{number}: {e}")
+
+    with span('app_users.import', path=path, scheme=scheme, workers=workers) as trace:
+        rows = valid_rows()
+        if hashing:
+            rows = iter_hashed_rows(rows, columns, scheme, rounds, workers)
+        else:
+            rows = (row for row, _ in rows)
+        inserted, updated = lakebase_pool.upsert_rows(
+            'app_users', columns, rows, ['email'], on_update={'updated_at': 'CURRENT_TIMESTAMP'},
+            fill_missing=OPTIONAL_COLUMNS
+        )
+        trace.set(inserted=inserted, updated=updated, rejected=rejected[0])
+    if rejected[0] > MAX_REPORTED_REJECTS:
+        print(f"⚠️  ... {rejected[0] - MAX_REPORTED_REJECTS} more users skipped")
+    return inserted, updated, rejected[0]
+
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
+
+
+def check_users_file(path):
+    """Validate a users file without connecting; returns (valid, rejected) counts."""
+    records = read_users(path)
+    first = next(records, None)
+    if first is None:
+        return 0, 0
+    valid = rejected = 0
+    for record in _prepend(first, records):
+        try:
+            user_row(record)
+            valid += 1
+        except ValueError as e:
+            rejected += 1
+            if rejected <= MAX_REPORTED_REJECTS:
+                print(f"⚠️  {e}")
+    return valid, rejected
+
+
+def export_users(lakebase_pool, path, include_password_hash=False):
+    """Stream app_users into `path` as CSV or JSONL (by extension); returns the number of users.
+
+    password_hash is only exported when asked for (e.g. to move users
+    between environments).
+    """
+    columns = EXPORT_COLUMNS[:3] + (['password_hash'] if include_password_hash else []) + EXPORT_COLUMNS[3:]
+    query = f"SELECT {', '.join(columns)} FROM app_users ORDER BY user_id"
+    with span('app_users.export', path=path) as trace:
+        if path.lower().endswith(JSONL_EXTENSIONS):
+            count = 0
+            with open(path, 'w') as f:
+                for names, row in lakebase_pool.iter_rows(query):
+                    f.write(json.dumps(dict(zip(names, row)), default=_json_value) + '\n')
+                    count += 1
+        else:
+            with open(path, 'w', newline='') as f:
+                count = lakebase_pool.copy_out(query, f)
+        trace.set(rows=count)
+    return count
+
+
+def _json_value(value):
+    # Timestamps (and anything else json can't encode) as ISO-8601 / text
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
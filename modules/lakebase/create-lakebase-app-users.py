@@ -3,91 +3,62 @@
 """
 Create app_users table in Lakebase PostgreSQL
 Uses Service Principal OAuth authentication
+
+With --import FILE (or APP_USERS_SEED_FILE) users from a CSV or JSONL file
+are upserted on email after the table is created, hashing plain-text
+passwords across all cores (see app_users_bulk.py); --export FILE streams
+app_users out instead. With --check, only the SQL and seed files are
+validated (no psycopg2, token or connection needed).
 """
 
-import requests
-import psycopg2
+import argparse
 import os
 import sys
 
-def get_oauth_token(host, client_id, client_secret):
-    """Get OAuth M2M token for Service Principal"""
-    token_url = f"{host}/oidc/v1/token"
-    response = requests.post(
-        token_url,
-        auth=(client_id, client_secret),
-        data={"grant_type": "client_credentials", "scope": "all-apis"}
-    )
-    response.raise_for_status()
-    return response.json()["access_token"]
+# Shared REST helpers (pooled HTTP client, token cache) live with the Delta scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app-delta-tables'))
+
+from app_users_bulk import check_users_file, export_users, import_users
+from oauth_token_provider import get_token_provider
+from provisioning_trace import span
+
+DEFAULT_LAKEBASE_HOST = "instance-bf1b47b2-e166-4fbd-b6f3-7ba3fe50921a.database.cloud.databricks.com"
+DEFAULT_LAKEBASE_DATABASE = "fraud_detection_db"
+DEFAULT_SQL_FILE = "sql/lakebase_app_users.sql"
 
-def create_app_users_table(lakebase_host, lakebase_db, sp_uuid, oauth_token, sql_file):
-    """Create app_users table in Lakebase using OAuth authentication"""
+def create_app_users_table(lakebase_pool, sql_file):
+    """Create app_users table in Lakebase using a pooled, OAuth-authenticated connection"""
+    import psycopg2
     
-    print(f"🔗 Connecting to Lakebase: {lakebase_host}")
-    print(f"   Database: {lakebase_db}")
-    print(f"   User: {sp_uuid} (Service Principal)")
+    print(f"🔗 Connecting to Lakebase: {lakebase_pool.host}")
+    print(f"   Database: {lakebase_pool.database}")
+    print(f"   User: {lakebase_pool.user} (Service Principal)")
     print()
     
-    # Connect to Lakebase PostgreSQL
-    # Username: Service Principal UUID
-    # Password: OAuth token
     try:
-        conn = psycopg2.connect(
-            host=lakebase_host,
-            port=5432,
-            database=lakebase_db,
-            user=sp_uuid,
-            password=oauth_token,
-            sslmode='require'
-        )
-        
-        print("✅ Connected to Lakebase")
-        
         # Read SQL file
         with open(sql_file, 'r') as f:
             sql_script = f.read()
         
-        # Execute SQL
-        cursor = conn.cursor()
-        
         print("\n📝 Creating app_users table...")
-        cursor.execute(sql_script)
-        conn.commit()
+        lakebase_pool.execute_script(sql_script)
         
         print("✅ app_users table created successfully")
         
-        # Verify table exists
-        cursor.execute("""
-            SELECT table_name, table_schema 
-            FROM information_schema.tables 
-            WHERE table_name = 'app_users'
-        """)
-        
-        result = cursor.fetchone()
-        if result:
-            print(f"\n✅ Verified: app_users table exists in schema '{result[1]}'")
-            
-            # Show table structure
-            cursor.execute("""
-                SELECT column_name, data_type, is_nullable, column_default
-                FROM information_schema.columns
-                WHERE table_name = 'app_users'
-                ORDER BY ordinal_position
-            """)
+        # Verify table exists and show its structure (single catalog query)
+        table = lakebase_pool.describe_table('app_users')
+        if table:
+            print(f"\n✅ Verified: app_users table exists in schema '{table['schema']}'")
             
-            columns = cursor.fetchall()
-            print(f"\n📊 Table structure ({len(columns)} columns):")
-            for col in columns:
-                nullable = "NULL" if col[2] == 'YES' else "NOT NULL"
-                default = f" DEFAULT {col[3]}" if col[3] else ""
-                print(f"   - {col[0]}: {col[1]} {nullable}{default}")
+            columns = table['columns']
+            print(f"\n📊 Table structure ({len(columns)} columns, {table['index_count']} indexes):")
+            for name, data_type, nullable, default in columns:
+                null_label = "NULL" if nullable else "NOT NULL"
+                default_label = f" DEFAULT {default}" if default else ""
+                print(f"   - {name}: {data_type} {null_label}{default_label}")
         else:
             print("\n⚠️  Warning: Could not verify table creation")
         
-        cursor.close()
-        conn.close()
-        
         return True
         
     except psycopg2.Error as e:
@@ -97,15 +68,77 @@ def create_app_users_table(lakebase_host, lakebase_db, sp_uuid, oauth_token, sql
         print(f"\n❌ Error: {e}")
         return False
 
+def seed_app_users(lakebase_pool, seed_file):
+    """Upsert app_users rows from a CSV (header row = column names) or JSONL file on email"""
+    import psycopg2
+    
+    print(f"\n🌱 Seeding app_users from {seed_file}...")
+    try:
+        inserted, updated, rejected = import_users(lakebase_pool, seed_file)
+        print(f"✅ Loaded users: {inserted} new, {updated} updated" + (f", {rejected} skipped" if rejected else ""))
+        return True
+    except psycopg2.Error as e:
+        print(f"\n❌ PostgreSQL Error: {e}")
+        return False
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        return False
+
+def check_app_users(sql_file=DEFAULT_SQL_FILE, seed_file=None):
+    """Validate the inputs of bootstrap_app_users without connecting; True if they look usable"""
+    ok = True
+    if not os.path.isfile(sql_file) or os.path.getsize(sql_file) == 0:
+        print(f"❌ SQL file missing or empty: {sql_file}")
+        ok = False
+    else:
+        print(f"✅ SQL file: {sql_file}")
+    
+    if seed_file:
+        try:
+            valid, rejected = check_users_file(seed_file)
+            if not valid:
+                print(f"❌ No usable users in seed file: {seed_file}")
+                ok = False
+            else:
+                print(f"✅ Seed file: {seed_file} ({valid} users" + (f", {rejected} to skip)" if rejected else ")"))
+        except (OSError, ValueError) as e:
+            print(f"❌ Cannot read seed file: {e}")
+            ok = False
+    return ok
+
+def bootstrap_app_users(lakebase_pool, sql_file=DEFAULT_SQL_FILE, seed_file=None):
+    """Create app_users and, if a seed CSV is given, load it; True on success"""
+    success = create_app_users_table(lakebase_pool, sql_file)
+    
+    # Optional bulk seed of users
+    if success and seed_file:
+        success = seed_app_users(lakebase_pool, seed_file)
+    return success
+
 def main():
+    parser = argparse.ArgumentParser(description="Create (and optionally seed) app_users in Lakebase")
+    parser.add_argument('--import', dest='import_file', default=os.environ.get("APP_USERS_SEED_FILE") or None,
+                        help="CSV or JSONL of users to upsert on email (default: APP_USERS_SEED_FILE)")
+    parser.add_argument('--export', dest='export_file',
+                        help="Stream app_users to this CSV or JSONL file instead of creating the table")
+    parser.add_argument('--include-password-hash', action='store_true', help="Include password_hash in --export")
+    parser.add_argument('--check', action='store_true', help="Only validate the SQL and seed files")
+    args = parser.parse_args()
+    
     # Configuration
     workspace_url = os.environ.get("DATABRICKS_HOST", "https://one-env-som-workspace.cloud.databricks.com")
     client_id = os.environ.get("DATABRICKS_CLIENT_ID")
     client_secret = os.environ.get("DATABRICKS_CLIENT_SECRET")
     
-    lakebase_host = "instance-bf1b47b2-e166-4fbd-b6f3-7ba3fe50921a.database.cloud.databricks.com"
-    lakebase_db = "fraud_detection_db"
-    sql_file = "sql/lakebase_app_users.sql"
+    lakebase_host = os.environ.get("LAKEBASE_HOST", DEFAULT_LAKEBASE_HOST)
+    lakebase_db = os.environ.get("LAKEBASE_DATABASE", DEFAULT_LAKEBASE_DATABASE)
+    sql_file = DEFAULT_SQL_FILE
+    seed_file = args.import_file
+    
+    if args.check:
+        if not all([client_id, client_secret]):
+            print("⚠️  DATABRICKS_CLIENT_ID and DATABRICKS_CLIENT_SECRET are not set (needed for a real run)")
+        sys.exit(0 if check_app_users(sql_file, seed_file) else 1)
     
     if not all([client_id, client_secret]):
         print("❌ Error: DATABRICKS_CLIENT_ID and DATABRICKS_CLIENT_SECRET must be set")
@@ -119,21 +152,41 @@ def main():
     # Get OAuth token
     print("🔐 Getting OAuth token...")
     try:
-        token = get_oauth_token(workspace_url, client_id, client_secret)
+        token_provider = get_token_provider(workspace_url, client_id, client_secret)
+        token_provider.token()
         print("✅ OAuth token obtained")
         print()
     except Exception as e:
         print(f"❌ Failed to get OAuth token: {e}")
         sys.exit(1)
     
-    # Create table
-    success = create_app_users_table(
-        lakebase_host,
-        lakebase_db,
-        client_id,  # SP UUID is the username
-        token,
-        sql_file
-    )
+    import psycopg2
+    from lakebase_pool import connect_lakebase
+    
+    # Username: Service Principal UUID
+    # Password: OAuth token (refreshed for every new pooled connection)
+    try:
+        lakebase_pool = connect_lakebase(lakebase_host, lakebase_db, client_id, token_provider)
+        print("✅ Connected to Lakebase")
+    except psycopg2.Error as e:
+        print(f"❌ PostgreSQL Error: {e}")
+        sys.exit(1)
+    
+    if args.export_file:
+        try:
+            count = export_users(lakebase_pool, args.export_file, args.include_password_hash)
+            print(f"✅ Exported {count} users to {args.export_file}")
+        except (psycopg2.Error, OSError) as e:
+            print(f"❌ Export failed: {e}")
+            sys.exit(1)
+        finally:
+            lakebase_pool.close()
+        return
+    
+    try:
+        success = bootstrap_app_users(lakebase_pool, sql_file, seed_file)
+    finally:
+        lakebase_pool.close()
     
     print()
     print("════════════════════════════════════════════════════════════════")
@@ -150,5 +203,6 @@ def main():
     print("════════════════════════════════════════════════════════════════")
 
 if __name__ == "__main__":
-    main()
+    with span('script.create_lakebase_app_users'):
+        main()
 
@@ -0,0 +1,677 @@
+#!/usr/bin/env python3
+"""
+Index advisor for the Lakebase app_users and synced fraud tables.
+Reads the existing indexes from the catalog (with pg_stat_user_indexes scan
+counts and pg_stats cardinality) and the app's queries from
+pg_stat_statements or a captured query log, then reports:
+
+- redundant indexes (a prefix of another index, e.g. a plain index on a
+  UNIQUE column) and low-selectivity ones (booleans, a handful of values),
+- missing indexes: one B-tree per access pattern, equality columns first,
+  then the range/ORDER BY column, partial on boolean/NULL filters (WHERE
+  is_active) and with INCLUDE columns so the query can be index-only.
+
+With --apply the missing indexes are built with CREATE INDEX CONCURRENTLY
+(invalid leftovers of an earlier failed build are dropped first), and with
+--drop-redundant the redundant ones are then dropped concurrently, so
+writes are never blocked. With --check only the query log is analysed,
+without connecting.
+
+Usage:
+    lakebase_index_advisor.py [--schemas public fraud_management] [--query-log FILE]
+                              [--apply] [--drop-redundant] [--json FILE] [--check]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+
+# Shared helpers (SQL parser, token cache, tracing) live with the Delta scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app-delta-tables'))
+
+from oauth_token_provider import get_token_provider
+from provisioning_trace import span
+from sql_script_parser import parse_sql_file
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+DEFAULT_QUERY_LOG = os.path.join(REPO_ROOT, 'sql', 'lakebase_index_workload.sql')
+DEFAULT_SCHEMAS = ['public', 'fraud_management']
+
+# A single-column index on a column with at most this many distinct values
+# rarely beats a sequential scan but still costs every write
+LOW_DISTINCT_VALUES = 5
+# INCLUDE at most this many non-key columns to make a query index-only
+MAX_INCLUDE_COLUMNS = 4
+MAX_KEY_COLUMNS = 3
+# Statements read from pg_stat_statements, by total execution time
+MAX_WORKLOAD_STATEMENTS = 500
+
+IDENTIFIER = r'"?[A-Za-z_][\w$]*"?'
+TABLE_REFERENCE = re.compile(
+    rf'\b(?:FROM|JOIN|UPDATE|INTO)\s+((?:{IDENTIFIER}\.)?{IDENTIFIER})(?:\s+(?:AS\s+)?({IDENTIFIER}))?',
+    re.IGNORECASE
+)
+COLUMN_REFERENCE = rf'(?:({IDENTIFIER})\.)?({IDENTIFIER})'
+CLAUSE_END = r'\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|\bOFFSET\b|\bFOR\s+UPDATE\b|\bRETURNING\b|\bON\s+CONFLICT\b|$'
+WHERE_CLAUSE = re.compile(rf'\bWHERE\b(.*?)(?={CLAUSE_END})', re.IGNORECASE)
+ON_CLAUSE = re.compile(rf'\bON\b(?!\s+CONFLICT)(.*?)(?=\b(?:LEFT|RIGHT|INNER|FULL|CROSS)?\s*JOIN\b|\bWHERE\b|{CLAUSE_END})',
+                       re.IGNORECASE)
+SQL_KEYWORDS = {
+    'where', 'join', 'left', 'right', 'inner', 'outer', 'full', 'cross', 'on', 'using', 'set',
+    'order', 'group', 'limit', 'offset', 'values', 'select', 'returning', 'for', 'union',
+    'natural', 'lateral', 'default', 'true', 'false', 'null', 'not', 'and', 'or',
+}
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _unquote(name):
+    return name.strip('"').lower() if name else None
+
+
+def _normalize_predicate(text):
+    """Comparable form of an index predicate: no parentheses or quotes, lower case."""
+    if not text:
+        return ''
+    return ' '.join(re.sub(r'[()"]', ' ', text).lower().split())
+
+
+class IndexInfo:
+    """An existing index, as read from the catalog."""
+
+    def __init__(self, schema, table, name, columns, include, predicate, unique, primary,
+                 constraint, valid, method, scans, size_bytes):
+        self.schema = schema
+        self.table = table
+        self.name = name
+        self.columns = list(columns)
+        self.include = list(include)
+        self.predicate = predicate
+        self.unique = unique
+        self.primary = primary
+        self.constraint = constraint
+        self.valid = valid
+        self.method = method
+        self.scans = scans
+        self.size_bytes = size_bytes
+
+    def describe(self):
+        text = f"{self.schema}.{self.name} ({', '.join(self.columns)})"
+        if self.predicate:
+            text += f" WHERE {self.predicate}"
+        return text
+
+
+class IndexCandidate:
+    """An index one or more workload queries would use: key columns, partial predicate, INCLUDE columns."""
+
+    def __init__(self, schema, table, equality, tail, predicate):
+        self.schema = schema
+        self.table = table
+        self.equality = list(equality)
+        self.tail = tail
+        # ((column, 'true' | 'false' | 'null' | 'not null'), ...), sorted by column
+        self.predicate = tuple(sorted(predicate))
+        self.include = set()
+        self.calls = 0
+        self.total_ms = 0.0
+        self.queries = []
+
+    @property
+    def key(self):
+        return (self.schema, self.table, tuple(self.equality), self.tail, self.predicate)
+
+    @property
+    def columns(self):
+        return self.equality + ([self.tail] if self.tail else [])
+
+    def predicate_sql(self, quote=True):
+        q = _quote if quote else (lambda name: name)
+        forms = {'true': '{}', 'false': 'NOT {}', 'null': '{} IS NULL', 'not null': '{} IS NOT NULL'}
+        return ' AND '.join(forms[form].format(q(column)) for column, form in self.predicate)
+
+    def index_name(self):
+        name = f"idx_{self.table}_{'_'.join(self.columns)}"
+        if self.predicate:
+            name += '_where_' + '_'.join(
+                ('not_' if form == 'false' else '') + column + ('_' + form.replace(' ', '_') if 'null' in form else '')
+                for column, form in self.predicate
+            )
+        name = re.sub(r'[^a-z0-9_]', '_', name.lower())
+        if len(name) > 63:
+            name = f"{name[:54]}_{hashlib.sha256(name.encode('utf-8')).hexdigest()[:8]}"
+        return name
+
+    def create_statement(self):
+        include = sorted(self.include - set(self.columns))
+        statement = (
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {_quote(self.index_name())} "
+            f"ON {_quote(self.schema)}.{_quote(self.table)} ({', '.join(_quote(c) for c in self.columns)})"
+        )
+        if include:
+            statement += f" INCLUDE ({', '.join(_quote(c) for c in include)})"
+        if self.predicate:
+            statement += f' WHERE {self.predicate_sql()}'
+        return statement
+
+    def describe(self):
+        text = f"{self.schema}.{self.table} ({', '.join(self.columns)})"
+        include = sorted(self.include - set(self.columns))
+        if include:
+            text += f" INCLUDE ({', '.join(include)})"
+        if self.predicate:
+            text += f" WHERE {self.predicate_sql(quote=False)}"
+        return text
+
+
+def _split_conjuncts(clause):
+    # BETWEEN's AND isn't a conjunction
+    clause = re.sub(r'\bBETWEEN\s+(\S+)\s+AND\s+\S+', r'BETWEEN \1', clause, flags=re.IGNORECASE)
+    return [part.strip().strip('()').strip() for part in re.split(r'\bAND\b', clause, flags=re.IGNORECASE)]
+
+
+def access_patterns(query):
+    """Per-table access pattern of one query.
+
+    Returns {table reference: {'equality', 'range', 'order', 'predicate', 'select'}}
+    where table reference is the (possibly schema-qualified) name as written.
+    Only conjunctions of simple column comparisons are understood; anything
+    else (OR, functions on columns, subqueries) is ignored.
+    """
+    tables = {}
+    aliases = {}
+    for match in TABLE_REFERENCE.finditer(query):
+        reference = '.'.join(_unquote(part) for part in match.group(1).split('.'))
+        alias = _unquote(match.group(2))
+        tables.setdefault(reference, {'equality': [], 'range': [], 'order': [], 'predicate': [], 'select': None})
+        aliases[reference.split('.')[-1]] = reference
+        if alias and alias not in SQL_KEYWORDS:
+            aliases[alias] = reference
+    if not tables:
+        return {}
+
+    def resolve(qualifier, column):
+        if qualifier:
+            return aliases.get(_unquote(qualifier))
+        return next(iter(tables)) if len(tables) == 1 else None
+
+    def add(kind, qualifier, column, value=None):
+        reference = resolve(qualifier, column)
+        if reference is None:
+            return
+        entry = tables[reference][kind]
+        item = (_unquote(column), value) if kind == 'predicate' else _unquote(column)
+        if item not in entry:
+            entry.append(item)
+
+    column = COLUMN_REFERENCE
+    conditions = []
+    for clause in (WHERE_CLAUSE, ON_CLAUSE):
+        for match in clause.finditer(query):
+            conditions.extend(_split_conjuncts(match.group(1)))
+
+    for condition in conditions:
+        if not condition or re.search(r'\bOR\b|\bSELECT\b', condition, re.IGNORECASE):
+            continue
+        join = re.fullmatch(rf'({IDENTIFIER})\.({IDENTIFIER})\s*=\s*({IDENTIFIER})\.({IDENTIFIER})', condition)
+        if join:
+            add('equality', join.group(1), join.group(2))
+            add('equality', join.group(3), join.group(4))
+            continue
+        boolean = re.fullmatch(rf'(NOT\s+)?{column}(?:\s*=\s*(TRUE|FALSE)|\s+IS\s+(NOT\s+)?(TRUE|FALSE|NULL))?',
+                               condition, re.IGNORECASE)
+        if boolean and _unquote(boolean.group(3)) not in SQL_KEYWORDS:
+            negated, qualifier, name, equals, is_not, is_value = boolean.groups()
+            value = (equals or is_value or 'TRUE').lower()
+            if value == 'null':
+                form = 'not null' if is_not else 'null'
+            else:
+                truth = (value == 'true') ^ bool(negated) ^ bool(is_not)
+                form = 'true' if truth else 'false'
+            add('predicate', qualifier, name, form)
+            continue
+        comparison = re.match(rf'{column}\s*(=|\bIN\b|<=|>=|<|>|\bBETWEEN\b|\bLIKE\b)', condition, re.IGNORECASE)
+        if comparison:
+            qualifier, name, operator = comparison.groups()
+            operator = operator.upper()
+            if operator == 'LIKE' and not re.search(r"LIKE\s+'[^%_']+%'", condition, re.IGNORECASE):
+                continue
+            add('equality' if operator in ('=', 'IN') else 'range', qualifier, name)
+
+    order = re.search(r'\bORDER\s+BY\s+(.*?)(?=\bLIMIT\b|\bOFFSET\b|\bFOR\s+UPDATE\b|$)', query, re.IGNORECASE)
+    if order:
+        first = order.group(1).split(',')[0].strip()
+        match = re.fullmatch(rf'{column}(?:\s+(?:ASC|DESC))?(?:\s+NULLS\s+(?:FIRST|LAST))?', first, re.IGNORECASE)
+        if match:
+            add('order', match.group(1), match.group(2))
+
+    select = re.match(r'\s*SELECT\s+(.*?)\s+FROM\b', query, re.IGNORECASE)
+    if select and '*' not in select.group(1) and '(' not in select.group(1):
+        for item in select.group(1).split(','):
+            match = re.fullmatch(rf'{column}(?:\s+(?:AS\s+)?{IDENTIFIER})?', item.strip(), re.IGNORECASE)
+            if not match:
+                continue
+            reference = resolve(match.group(1), match.group(2))
+            if reference is not None:
+                if tables[reference]['select'] is None:
+                    tables[reference]['select'] = []
+                tables[reference]['select'].append(_unquote(match.group(2)))
+    return tables
+
+
+def read_query_log(path):
+    """(query, calls, total_ms) per statement of a captured query log (a SQL file)."""
+    return [(statement.text, 1, 0.0) for statement in parse_sql_file(path)]
+
+
+def read_stat_statements(lakebase_pool):
+    """(query, calls, total_ms) of the heaviest statements in pg_stat_statements, or None if unavailable."""
+    if not lakebase_pool.fetch_all("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'"):
+        return None
+    rows = lakebase_pool.fetch_all(
+        """
+        SELECT query, calls, total_exec_time
+        FROM pg_stat_statements
+        WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+          AND query ~* '\\m(FROM|UPDATE)\\M'
+        ORDER BY total_exec_time DESC
+        LIMIT %s
+        """,
+        (MAX_WORKLOAD_STATEMENTS,)
+    )
+    return [(' '.join(query.split()), calls, total_ms) for query, calls, total_ms in rows]
+
+
+def candidates_from_workload(workload, tables, schemas):
+    """Merge the access patterns of `workload` into IndexCandidates, heaviest first.
+
+    `tables` maps (schema, table) to {column: type}; table names that aren't
+    schema-qualified resolve through `schemas` in order, like a search_path.
+    """
+    candidates = {}
+    for query, calls, total_ms in workload:
+        for reference, pattern in access_patterns(query).items():
+            if '.' in reference:
+                schema, table = reference.split('.', 1)
+            else:
+                table = reference
+                schema = next((s for s in schemas if (s, table) in tables), None)
+            columns = tables.get((schema, table)) if tables else {}
+            if columns is None:
+                continue
+
+            known = (lambda name: name in columns) if columns else (lambda name: True)
+            equality = [c for c in pattern['equality'] if known(c)][:MAX_KEY_COLUMNS]
+            tail = next((c for c in pattern['range'] + pattern['order'] if known(c) and c not in equality), None)
+            predicate = [(c, form) for c, form in pattern['predicate'] if known(c) and c not in equality]
+            if not equality and not tail:
+                continue
+            candidate = IndexCandidate(schema or 'public', table, equality, tail, predicate)
+            candidate = candidates.setdefault(candidate.key, candidate)
+            candidate.calls += calls
+            candidate.total_ms += total_ms
+            candidate.queries.append(query)
+            if pattern['select'] is not None and candidate.include is not None:
+                candidate.include.update(c for c in pattern['select'] if known(c))
+            else:
+                # SELECT * (or an expression) can't be index-only anyway
+                candidate.include = None
+
+    result = list(candidates.values())
+    for candidate in result:
+        extra = (candidate.include or set()) - set(candidate.columns) - {c for c, _ in candidate.predicate}
+        candidate.include = extra if 0 < len(extra) <= MAX_INCLUDE_COLUMNS else set()
+    return sorted(result, key=lambda c: (-c.total_ms, -c.calls, c.key))
+
+
+def fetch_tables(lakebase_pool, schemas):
+    """{(schema, table): {column: type}} for the ordinary tables in `schemas`."""
+    rows = lakebase_pool.fetch_all(
+        """
+        SELECT n.nspname, c.relname, a.attname, format_type(a.atttypid, a.atttypmod)
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+        WHERE c.relkind IN ('r', 'p') AND n.nspname = ANY(%s)
+        ORDER BY n.nspname, c.relname, a.attnum
+        """,
+        (list(schemas),)
+    )
+    tables = {}
+    for schema, table, column, data_type in rows:
+        tables.setdefault((schema, table), {})[column] = data_type
+    return tables
+
+
+def fetch_indexes(lakebase_pool, schemas):
+    """IndexInfo for every index on the tables in `schemas`."""
+    rows = lakebase_pool.fetch_all(
+        """
+        SELECT n.nspname, t.relname, c.relname,
+               ARRAY(SELECT pg_get_indexdef(i.indexrelid, k, true)
+                     FROM generate_series(1, i.indnkeyatts) AS k ORDER BY k),
+               ARRAY(SELECT pg_get_indexdef(i.indexrelid, k, true)
+                     FROM generate_series(i.indnkeyatts + 1, i.indnatts) AS k ORDER BY k),
+               pg_get_expr(i.indpred, i.indrelid),
+               i.indisunique, i.indisprimary,
+               EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = i.indexrelid),
+               i.indisvalid, am.amname,
+               COALESCE(s.idx_scan, 0), pg_relation_size(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        JOIN pg_am am ON am.oid = c.relam
+        LEFT JOIN pg_stat_user_indexes s ON s.indexrelid = i.indexrelid
+        WHERE n.nspname = ANY(%s)
+        ORDER BY n.nspname, t.relname, c.relname
+        """,
+        (list(schemas),)
+    )
+    return [
+        IndexInfo(schema, table, name, [_unquote(c) for c in columns], [_unquote(c) for c in include],
+                  predicate, unique, primary, constraint, valid, method, scans, size_bytes)
+        for (schema, table, name, columns, include, predicate, unique, primary, constraint,
+             valid, method, scans, size_bytes) in rows
+    ]
+
+
+def fetch_distinct_counts(lakebase_pool, schemas):
+    """{(schema, table, column): estimated distinct values} from pg_stats (analysed tables only)."""
+    rows = lakebase_pool.fetch_all(
+        """
+        SELECT s.schemaname, s.tablename, s.attname, s.n_distinct, c.reltuples
+        FROM pg_stats s
+        JOIN pg_namespace n ON n.nspname = s.schemaname
+        JOIN pg_class c ON c.relnamespace = n.oid AND c.relname = s.tablename
+        WHERE s.schemaname = ANY(%s)
+        """,
+        (list(schemas),)
+    )
+    # A negative n_distinct is a fraction of the row count
+    return {
+        (schema, table, column): n_distinct if n_distinct >= 0 else -n_distinct * max(rows_estimate, 0)
+        for schema, table, column, n_distinct, rows_estimate in rows
+    }
+
+
+def find_redundant(indexes):
+    """[(index, index that makes it redundant)]: plain B-tree indexes that are a prefix of another.
+
+    Indexes backing a constraint (primary key, UNIQUE) are never reported;
+    a unique index is only redundant next to an identical one.
+    """
+    redundant = []
+    for index in indexes:
+        if index.constraint or index.primary or not index.valid or index.method != 'btree':
+            continue
+        for other in indexes:
+            if (other is index or not other.valid or other.method != 'btree'
+                    or (other.schema, other.table) != (index.schema, index.table)
+                    or _normalize_predicate(other.predicate) != _normalize_predicate(index.predicate)
+                    or other.columns[:len(index.columns)] != index.columns):
+                continue
+            same = len(other.columns) == len(index.columns)
+            if index.unique and not (same and other.unique):
+                continue
+            # Of two identical plain indexes, keep the one that sorts first
+            if same and not (other.unique or other.constraint) and other.name > index.name:
+                continue
+            redundant.append((index, other))
+            break
+    return redundant
+
+
+def find_low_selectivity(indexes, tables, distinct_counts):
+    """Single-column plain indexes on boolean or near-constant columns."""
+    result = []
+    for index in indexes:
+        if (index.unique or index.predicate or index.method != 'btree' or len(index.columns) != 1
+                or not index.valid):
+            continue
+        column = index.columns[0]
+        data_type = tables.get((index.schema, index.table), {}).get(column, '')
+        distinct = distinct_counts.get((index.schema, index.table, column))
+        if data_type == 'boolean' or (distinct is not None and 0 < distinct <= LOW_DISTINCT_VALUES):
+            result.append(index)
+    return result
+
+
+def covering_index(candidate, indexes):
+    """An existing valid B-tree index that serves `candidate`, or None."""
+    for index in indexes:
+        if ((index.schema, index.table) != (candidate.schema, candidate.table)
+                or not index.valid or index.method != 'btree'):
+            continue
+        # A partial index only serves queries with the same filter
+        if index.predicate and _normalize_predicate(index.predicate) != _normalize_predicate(
+                candidate.predicate_sql(quote=False)):
+            continue
+        count = len(candidate.equality)
+        if set(index.columns[:count]) != set(candidate.equality):
+            continue
+        if index.unique and not index.predicate and len(index.columns) == count:
+            # At most one row per lookup: ordering doesn't matter
+            return index
+        if candidate.tail is None or index.columns[count:count + 1] == [candidate.tail]:
+            return index
+    return None
+
+
+def advise(indexes, tables, distinct_counts, candidates):
+    """Combine the catalog and workload analyses into one report dict."""
+    redundant = find_redundant(indexes)
+    redundant_names = {index.name for index, _ in redundant}
+    low = [index for index in find_low_selectivity(indexes, tables, distinct_counts)
+           if index.name not in redundant_names]
+    missing = []
+    covered = []
+    for candidate in candidates:
+        index = covering_index(candidate, indexes)
+        if index is None:
+            missing.append(candidate)
+        else:
+            covered.append((candidate, index))
+    flagged = redundant_names | {index.name for index in low}
+    return {
+        'redundant': redundant,
+        'low_selectivity': low,
+        'unused': [index for index in indexes
+                   if index.scans == 0 and index.valid and not (index.unique or index.constraint)
+                   and index.name not in flagged],
+        'invalid': [index for index in indexes if not index.valid],
+        'missing': missing,
+        'covered': covered,
+    }
+
+
+def print_report(report):
+    print(f"\n🔁 Redundant indexes: {len(report['redundant'])}")
+    for index, other in report['redundant']:
+        print(f"   - {index.describe()}: covered by {other.name} ({index.size_bytes // 1024} KiB)")
+    print(f"\n📉 Low-selectivity indexes: {len(report['low_selectivity'])}")
+    for index in report['low_selectivity']:
+        print(f"   - {index.describe()}: too few distinct values, use a partial index instead")
+    if report['unused']:
+        print(f"\n💤 Unused since the statistics were reset: {len(report['unused'])}")
+        for index in report['unused']:
+            print(f"   - {index.describe()}")
+    if report['invalid']:
+        print(f"\n⚠️  Invalid (failed concurrent build): {len(report['invalid'])}")
+        for index in report['invalid']:
+            print(f"   - {index.describe()}")
+    print(f"\n➕ Missing indexes: {len(report['missing'])}")
+    for candidate in report['missing']:
+        weight = f"{candidate.calls} calls" + (f", {candidate.total_ms:.0f} ms" if candidate.total_ms else "")
+        print(f"   - {candidate.describe()} ({weight})")
+    for candidate, index in report['covered']:
+        print(f"   ✓ {candidate.describe()}: served by {index.name}")
+
+
+def report_json(report):
+    def index_dict(index):
+        return {'schema': index.schema, 'table': index.table, 'name': index.name,
+                'columns': index.columns, 'predicate': index.predicate, 'scans': index.scans,
+                'size_bytes': index.size_bytes}
+
+    def candidate_dict(candidate):
+        return {'schema': candidate.schema, 'table': candidate.table, 'name': candidate.index_name(),
+                'columns': candidate.columns, 'include': sorted(candidate.include),
+                'predicate': candidate.predicate_sql(quote=False) or None, 'calls': candidate.calls,
+                'total_ms': round(candidate.total_ms, 1), 'statement': candidate.create_statement()}
+
+    return {
+        'redundant': [dict(index_dict(index), covered_by=other.name) for index, other in report['redundant']],
+        'low_selectivity': [index_dict(index) for index in report['low_selectivity']],
+        'unused': [index_dict(index) for index in report['unused']],
+        'invalid': [index_dict(index) for index in report['invalid']],
+        'missing': [candidate_dict(candidate) for candidate in report['missing']],
+        'covered': [dict(candidate_dict(candidate), served_by=index.name)
+                    for candidate, index in report['covered']],
+    }
+
+
+def apply_report(lakebase_pool, report, drop_redundant=False):
+    """Build the missing indexes concurrently, then optionally drop redundant ones; True if all succeeded."""
+    import psycopg2
+
+    ok = True
+
+    def run(label, statement, **attributes):
+        nonlocal ok
+        print(f"   {statement}")
+        with span(label, **attributes) as trace:
+            try:
+                lakebase_pool.execute_autocommit(statement)
+                trace.set(ok=True)
+                return True
+            except psycopg2.Error as e:
+                trace.set(ok=False)
+                print(f"   ❌ {e}")
+                ok = False
+                return False
+
+    # A failed concurrent build leaves an invalid index that IF NOT EXISTS would keep
+    for index in report['invalid']:
+        run('lakebase.drop_index', f'DROP INDEX CONCURRENTLY IF EXISTS "{index.schema}"."{index.name}"',
+            index=index.name)
+
+    for candidate in report['missing']:
+        name = candidate.index_name()
+        print(f"\n🔨 Building {name}")
+        if run('lakebase.create_index', candidate.create_statement(), index=name, table=candidate.table):
+            valid = lakebase_pool.fetch_all(
+                "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)",
+                (f'"{candidate.schema}"."{name}"',)
+            )
+            if not valid or not valid[0][0]:
+                print(f"   ❌ {name} is not valid after the build; dropping it")
+                run('lakebase.drop_index', f'DROP INDEX CONCURRENTLY IF EXISTS "{candidate.schema}"."{name}"',
+                    index=name)
+                ok = False
+
+    if drop_redundant:
+        for index in [index for index, _ in report['redundant']] + report['low_selectivity']:
+            print(f"\n🗑️  Dropping {index.name}")
+            run('lakebase.drop_index', f'DROP INDEX CONCURRENTLY IF EXISTS "{index.schema}"."{index.name}"',
+                index=index.name)
+    return ok
+
+
+def check_query_log(query_log, schemas):
+    """Analyse the query log without connecting; True if it yields any index candidate."""
+    if not os.path.isfile(query_log):
+        print(f"❌ Query log not found: {query_log}")
+        return False
+    workload = read_query_log(query_log)
+    candidates = candidates_from_workload(workload, {}, schemas)
+    print(f"✅ {len(workload)} queries in {query_log}, {len(candidates)} access patterns:")
+    for candidate in candidates:
+        print(f"   - {candidate.describe()}")
+    return bool(candidates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report (and build) the indexes Lakebase app queries need")
+    parser.add_argument('--schemas', nargs='+', default=DEFAULT_SCHEMAS,
+                        help="Schemas to analyse; unqualified table names resolve in this order")
+    parser.add_argument('--query-log', default=None,
+                        help=f"SQL file of app queries (default: pg_stat_statements, else {DEFAULT_QUERY_LOG})")
+    parser.add_argument('--host', default=os.environ.get('LAKEBASE_HOST'))
+    parser.add_argument('--database', default=os.environ.get('LAKEBASE_DATABASE', 'fraud_detection_db'))
+    parser.add_argument('--apply', action='store_true', help="Build missing indexes with CREATE INDEX CONCURRENTLY")
+    parser.add_argument('--drop-redundant', action='store_true',
+                        help="With --apply, also drop redundant and low-selectivity indexes concurrently")
+    parser.add_argument('--json', help="Write the report to this file")
+    parser.add_argument('--check', action='store_true', help="Only analyse the query log, without connecting")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if check_query_log(args.query_log or DEFAULT_QUERY_LOG, args.schemas) else 1)
+
+    workspace_url = os.environ.get("DATABRICKS_HOST", "https://one-env-som-workspace.cloud.databricks.com")
+    client_id = os.environ.get("DATABRICKS_CLIENT_ID")
+    client_secret = os.environ.get("DATABRICKS_CLIENT_SECRET")
+    if not all([client_id, client_secret]):
+        print("❌ Error: DATABRICKS_CLIENT_ID and DATABRICKS_CLIENT_SECRET must be set")
+        sys.exit(1)
+    if not args.host:
+        print("❌ Error: --host or LAKEBASE_HOST must be set")
+        sys.exit(1)
+
+    import psycopg2
+    from lakebase_pool import connect_lakebase
+
+    try:
+        token_provider = get_token_provider(workspace_url, client_id, client_secret)
+        lakebase_pool = connect_lakebase(args.host, args.database, client_id, token_provider)
+        print(f"✅ Connected to Lakebase: {args.host} / {args.database}")
+    except Exception as e:
+        print(f"❌ Failed to connect to Lakebase: {e}")
+        sys.exit(1)
+
+    try:
+        tables = fetch_tables(lakebase_pool, args.schemas)
+        indexes = fetch_indexes(lakebase_pool, args.schemas)
+        distinct_counts = fetch_distinct_counts(lakebase_pool, args.schemas)
+
+        workload = None
+        if args.query_log is None:
+            workload = read_stat_statements(lakebase_pool)
+            if workload:
+                print(f"📊 {len(workload)} statements from pg_stat_statements")
+        if not workload:
+            query_log = args.query_log or DEFAULT_QUERY_LOG
+            workload = read_query_log(query_log)
+            print(f"📄 {len(workload)} queries from {query_log}")
+
+        candidates = candidates_from_workload(workload, tables, args.schemas)
+        report = advise(indexes, tables, distinct_counts, candidates)
+        print_report(report)
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(report_json(report), f, indent=2)
+            print(f"\n📄 Report written to {args.json}")
+
+        ok = True
+        if args.apply:
+            ok = apply_report(lakebase_pool, report, drop_redundant=args.drop_redundant)
+    except psycopg2.Error as e:
+        print(f"\n❌ PostgreSQL Error: {e}")
+        sys.exit(1)
+    finally:
+        lakebase_pool.close()
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    with span('script.lakebase_index_advisor'):
+        main()
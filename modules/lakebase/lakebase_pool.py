@@ -0,0 +1,311 @@
+"""
+Pooled access layer for Lakebase PostgreSQL.
+Connections authenticate with the Service Principal's OAuth token, fetched
+fresh from a callback whenever the pool opens a new connection, and bulk
+loads go through execute_values or COPY instead of per-row INSERTs (with
+an upsert through a staging table), and exports stream out through COPY
+TO STDOUT or a server-side cursor.
+"""
+
+import csv
+import io
+from contextlib import contextmanager
+
+from psycopg2 import pool, sql
+from psycopg2.extras import execute_values
+
+# Callers put modules/app-delta-tables on sys.path for the shared helpers
+from provisioning_trace import span
+
+DEFAULT_MIN_CONNECTIONS = 1
+DEFAULT_MAX_CONNECTIONS = 8
+DEFAULT_PAGE_SIZE = 1000
+# Rows buffered per COPY chunk before it is streamed to the server
+COPY_CHUNK_ROWS = 10000
+
+
+class TokenAuthConnectionPool(pool.ThreadedConnectionPool):
+    """ThreadedConnectionPool that asks for a fresh password for every new connection.
+
+    Lakebase passwords are short-lived OAuth tokens, so a static password in
+    the pool kwargs would stop working once the token expires.
+    """
+
+    def __init__(self, minconn, maxconn, password_callback, *args, **kwargs):
+        self._password_callback = password_callback
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def _connect(self, key=None):
+        with span('lakebase.connect', host=self._kwargs.get('host')):
+            self._kwargs['password'] = self._password_callback()
+            return super()._connect(key)
+
+
+class LakebasePool:
+    """Connection pool plus the batched helpers the provisioning tools build on."""
+
+    def __init__(self, host, database, user, password_callback, port=5432,
+                 min_connections=DEFAULT_MIN_CONNECTIONS,
+                 max_connections=DEFAULT_MAX_CONNECTIONS,
+                 sslmode='require'):
+        self.host = host
+        self.database = database
+        self.user = user
+        self._pool = TokenAuthConnectionPool(
+            min_connections,
+            max_connections,
+            password_callback,
+            host=host,
+            port=port,
+            database=database,
+            user=user,
+            sslmode=sslmode
+        )
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commit on success, roll back on error."""
+        conn = self._pool.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            # Broken connections are discarded instead of being handed out again
+            self._pool.putconn(conn, close=bool(conn.closed))
+
+    def execute_autocommit(self, statement, params=None):
+        """Run one statement outside a transaction block (e.g. CREATE INDEX CONCURRENTLY)."""
+        conn = self._pool.getconn()
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(statement, params)
+        finally:
+            if not conn.closed:
+                conn.autocommit = False
+            self._pool.putconn(conn, close=bool(conn.closed))
+
+    def fetch_all(self, query, params=None):
+        """Run a read-only query and return all rows."""
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+
+    def execute_script(self, sql_script):
+        """Run a multi-statement SQL script in one round-trip and one transaction."""
+        with span('lakebase.execute', bytes=len(sql_script)), self.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql_script)
+
+    def bulk_insert(self, table_name, columns, rows, method='values',
+                    page_size=DEFAULT_PAGE_SIZE, on_conflict=None):
+        """Insert many rows at once; returns the number of rows sent.
+
+        method='values' uses execute_values (one multi-row INSERT per page and
+        supports `on_conflict`, e.g. "ON CONFLICT (email) DO NOTHING");
+        method='copy' streams rows through COPY FROM STDIN in CSV chunks.
+        """
+        if method == 'copy':
+            if on_conflict:
+                raise ValueError("on_conflict is not supported with COPY; use method='values'")
+            with span('lakebase.bulk_insert', table=table_name, method='copy') as trace:
+                count = self._copy_rows(table_name, columns, rows)
+                trace.set(rows=count)
+                return count
+
+        query = sql.SQL("INSERT INTO {} ({}) VALUES %s").format(
+            sql.Identifier(table_name),
+            sql.SQL(', ').join(sql.Identifier(c) for c in columns)
+        )
+        count = 0
+        with span('lakebase.bulk_insert', table=table_name, method='values') as trace, \
+                self.connection() as conn:
+            with conn.cursor() as cursor:
+                statement = query.as_string(conn)
+                if on_conflict:
+                    statement = f"{statement} {on_conflict}"
+                page = []
+                for row in rows:
+                    page.append(row)
+                    if len(page) >= page_size:
+                        execute_values(cursor, statement, page, page_size=page_size)
+                        count += len(page)
+                        page = []
+                if page:
+                    execute_values(cursor, statement, page, page_size=page_size)
+                    count += len(page)
+            trace.set(rows=count)
+        return count
+
+    def _copy_rows(self, table_name, columns, rows):
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                return self._copy_from(cursor, table_name, columns, rows)
+
+    def _copy_from(self, cursor, table_name, columns, rows):
+        """Stream rows through COPY FROM STDIN on `cursor` in CSV chunks; returns the row count."""
+        statement = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+            sql.Identifier(table_name),
+            sql.SQL(', ').join(sql.Identifier(c) for c in columns)
+        ).as_string(cursor.connection)
+        count = 0
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        pending = 0
+        for row in rows:
+            # NULLs go out as unquoted empty fields, which COPY csv reads as NULL
+            writer.writerow(['' if v is None else v for v in row])
+            pending += 1
+            if pending >= COPY_CHUNK_ROWS:
+                buffer.seek(0)
+                cursor.copy_expert(statement, buffer)
+                count += pending
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                pending = 0
+        if pending:
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+            count += pending
+        return count
+
+    def upsert_rows(self, table_name, columns, rows, conflict_columns, on_update=None, fill_missing=None):
+        """COPY rows into a temporary staging table and merge them into `table_name`.
+
+        Everything runs in one transaction. A row whose `conflict_columns`
+        match an existing row updates that row's other `columns` (and sets
+        `on_update`, a {column: SQL expression} mapping such as
+        {'updated_at': 'CURRENT_TIMESTAMP'}). In `fill_missing` columns NULL
+        means "not given": an existing row keeps its value and a new row gets
+        the column's DEFAULT, or, when `fill_missing` is a mapping, the SQL
+        expression given for the column (which may refer to the other
+        columns). When the input repeats a key its last occurrence wins.
+        Returns (inserted, updated).
+        """
+        fill_missing = fill_missing if isinstance(fill_missing, dict) else dict.fromkeys(fill_missing or ())
+        if any(expression is None for expression in fill_missing.values()):
+            described = self.describe_table(table_name) or {'columns': []}
+            defaults = {name: default for name, _, _, default in described['columns']}
+            fill_missing = {c: expression or defaults.get(c) for c, expression in fill_missing.items()}
+
+        staging = f"_staging_{table_name}"
+        column_list = sql.SQL(', ').join(sql.Identifier(c) for c in columns)
+        conflict_list = sql.SQL(', ').join(sql.Identifier(c) for c in conflict_columns)
+        latest = sql.SQL("(SELECT DISTINCT ON ({conflict}) * FROM {staging} ORDER BY {conflict}, _row DESC)").format(
+            conflict=conflict_list, staging=sql.Identifier(staging)
+        )
+        # Existing rows are updated first, from the raw staged values (NULL
+        # still meaning "not given"), then the rest are inserted with defaults
+        assignments = [
+            sql.SQL("{column} = COALESCE(s.{column}, t.{column})" if c in fill_missing
+                    else "{column} = s.{column}").format(column=sql.Identifier(c))
+            for c in columns if c not in conflict_columns
+        ]
+        assignments += [
+            sql.SQL("{} = {}").format(sql.Identifier(c), sql.SQL(expression))
+            for c, expression in (on_update or {}).items()
+        ]
+        update = sql.SQL("UPDATE {table} t SET {assignments} FROM {latest} s WHERE {match}").format(
+            table=sql.Identifier(table_name), assignments=sql.SQL(', ').join(assignments), latest=latest,
+            match=sql.SQL(' AND ').join(
+                sql.SQL("t.{column} = s.{column}").format(column=sql.Identifier(c)) for c in conflict_columns
+            )
+        ) if assignments else None
+        insert = sql.SQL(
+            "INSERT INTO {table} ({columns}) SELECT {select_list} FROM {latest} s "
+            "ON CONFLICT ({conflict}) DO NOTHING"
+        ).format(
+            table=sql.Identifier(table_name), columns=column_list, latest=latest, conflict=conflict_list,
+            select_list=sql.SQL(', ').join(
+                sql.SQL("COALESCE(s.{}, {})").format(sql.Identifier(c), sql.SQL(fill_missing[c]))
+                if fill_missing.get(c) else sql.SQL("s.{}").format(sql.Identifier(c))
+                for c in columns
+            )
+        )
+
+        with span('lakebase.upsert', table=table_name) as trace, self.connection() as conn:
+            with conn.cursor() as cursor:
+                # Only the imported columns: no defaults (sequences) or constraints to pay for
+                cursor.execute(sql.SQL(
+                    "CREATE TEMP TABLE {} ON COMMIT DROP AS SELECT {} FROM {} WITH NO DATA"
+                ).format(sql.Identifier(staging), column_list, sql.Identifier(table_name)))
+                cursor.execute(sql.SQL("ALTER TABLE {} ADD COLUMN _row bigint").format(sql.Identifier(staging)))
+                staged = self._copy_from(
+                    cursor, staging, list(columns) + ['_row'],
+                    (tuple(row) + (ordinal,) for ordinal, row in enumerate(rows))
+                )
+                updated = 0
+                if update is not None:
+                    cursor.execute(update)
+                    updated = cursor.rowcount
+                cursor.execute(insert)
+                inserted = cursor.rowcount
+            trace.set(rows=staged, inserted=inserted, updated=updated)
+        return inserted, updated
+
+    def copy_out(self, query, file, header=True):
+        """Stream the result of `query` into `file` as CSV via COPY TO STDOUT; returns the row count."""
+        statement = f"COPY ({query}) TO STDOUT WITH (FORMAT csv{', HEADER' if header else ''})"
+        with span('lakebase.copy_out') as trace, self.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.copy_expert(statement, file)
+                trace.set(rows=cursor.rowcount)
+                return cursor.rowcount
+
+    def iter_rows(self, query, params=None, itersize=DEFAULT_PAGE_SIZE):
+        """Yield (column names, row) pairs from a server-side cursor, `itersize` rows per round-trip."""
+        with self.connection() as conn:
+            with conn.cursor(name='lakebase_iter_rows') as cursor:
+                cursor.itersize = itersize
+                cursor.execute(query, params)
+                columns = None
+                for row in cursor:
+                    if columns is None:
+                        columns = [d[0] for d in cursor.description]
+                    yield columns, row
+
+    def describe_table(self, table_name, schema=None):
+        """Fetch schema, columns and index count for a table in one catalog query.
+
+        Returns None if the table doesn't exist, otherwise
+        {'schema', 'columns': [(name, type, nullable, default)], 'index_count'}.
+        """
+        query = """
+            SELECT n.nspname,
+                   a.attname,
+                   format_type(a.atttypid, a.atttypmod),
+                   NOT a.attnotnull,
+                   pg_get_expr(d.adbin, d.adrelid),
+                   (SELECT count(*) FROM pg_index i WHERE i.indrelid = c.oid)
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+            LEFT JOIN pg_attrdef d ON d.adrelid = c.oid AND d.adnum = a.attnum
+            WHERE c.relname = %s
+              AND c.relkind IN ('r', 'p')
+              AND ((%s IS NULL AND pg_table_is_visible(c.oid)) OR n.nspname = %s)
+            ORDER BY a.attnum
+        """
+        with span('lakebase.query', table=table_name), self.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, (table_name, schema, schema))
+                rows = cursor.fetchall()
+        if not rows:
+            return None
+        return {
+            'schema': rows[0][0],
+            'columns': [(r[1], r[2], r[3], r[4]) for r in rows],
+            'index_count': rows[0][5],
+        }
+
+    def close(self):
+        self._pool.closeall()
+
+
+def connect_lakebase(host, database, user, token_provider, **kwargs):
+    """LakebasePool whose connections authenticate with a refreshing OAuth token."""
+    return LakebasePool(host, database, user, token_provider.token, **kwargs)
@@ -23,7 +23,10 @@ CREATE TABLE IF NOT EXISTS siu_cases (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP(),
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP()
 ) USING DELTA
-TBLPROPERTIES('delta.feature.allowColumnDefaults' = 'supported')
+TBLPROPERTIES(
+    'delta.feature.allowColumnDefaults' = 'supported',
+    'delta.enableChangeDataFeed' = 'true'
+)
 COMMENT 'SIU case management - operational table for fraud investigations';
 
 -- Transactions Table (Delta)
@@ -37,7 +40,11 @@ CREATE TABLE IF NOT EXISTS transactions (
     risk_score INT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP()
 ) USING DELTA
-TBLPROPERTIES('delta.feature.allowColumnDefaults' = 'supported')
+CLUSTER BY (case_id)
+TBLPROPERTIES(
+    'delta.feature.allowColumnDefaults' = 'supported',
+    'delta.enableChangeDataFeed' = 'true'
+)
 COMMENT 'Transaction records associated with fraud cases';
 
 -- Alerts Table (Delta)
@@ -52,7 +59,11 @@ CREATE TABLE IF NOT EXISTS alerts (
     acknowledged_at TIMESTAMP,
     acknowledged_by STRING
 ) USING DELTA
-TBLPROPERTIES('delta.feature.allowColumnDefaults' = 'supported')
+CLUSTER BY (case_id)
+TBLPROPERTIES(
+    'delta.feature.allowColumnDefaults' = 'supported',
+    'delta.enableChangeDataFeed' = 'true'
+)
 COMMENT 'Fraud alerts and notifications';
 
 -- Claims Table (Delta)
@@ -65,7 +76,10 @@ CREATE TABLE IF NOT EXISTS claims (
     status STRING,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP()
 ) USING DELTA
-TBLPROPERTIES('delta.feature.allowColumnDefaults' = 'supported')
+TBLPROPERTIES(
+    'delta.feature.allowColumnDefaults' = 'supported',
+    'delta.enableChangeDataFeed' = 'true'
+)
 COMMENT 'Insurance claims records';
 
 -- Investigation Activities Table (Delta)
@@ -78,7 +92,11 @@ CREATE TABLE IF NOT EXISTS investigation_activities (
     notes STRING,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP()
 ) USING DELTA
-TBLPROPERTIES('delta.feature.allowColumnDefaults' = 'supported')
+CLUSTER BY (case_id)
+TBLPROPERTIES(
+    'delta.feature.allowColumnDefaults' = 'supported',
+    'delta.enableChangeDataFeed' = 'true'
+)
 COMMENT 'Investigation activity log and audit trail';
 
 -- Fraud Indicators Table (Delta)
@@ -90,6 +108,25 @@ CREATE TABLE IF NOT EXISTS fraud_indicators (
     severity STRING,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP()
 ) USING DELTA
-TBLPROPERTIES('delta.feature.allowColumnDefaults' = 'supported')
+CLUSTER BY (case_id)
+TBLPROPERTIES(
+    'delta.feature.allowColumnDefaults' = 'supported',
+    'delta.enableChangeDataFeed' = 'true'
+)
 COMMENT 'Fraud risk indicators and patterns';
 
+
+-- Tables created before the Change Data Feed and clustering were added keep
+-- their old properties (CREATE TABLE IF NOT EXISTS leaves them alone), so
+-- set both explicitly. Each statement is a no-op when already applied.
+ALTER TABLE siu_cases SET TBLPROPERTIES ('delta.enableChangeDataFeed' = 'true');
+ALTER TABLE transactions SET TBLPROPERTIES ('delta.enableChangeDataFeed' = 'true');
+ALTER TABLE alerts SET TBLPROPERTIES ('delta.enableChangeDataFeed' = 'true');
+ALTER TABLE claims SET TBLPROPERTIES ('delta.enableChangeDataFeed' = 'true');
+ALTER TABLE investigation_activities SET TBLPROPERTIES ('delta.enableChangeDataFeed' = 'true');
+ALTER TABLE fraud_indicators SET TBLPROPERTIES ('delta.enableChangeDataFeed' = 'true');
+
+ALTER TABLE transactions CLUSTER BY (case_id);
+ALTER TABLE alerts CLUSTER BY (case_id);
+ALTER TABLE investigation_activities CLUSTER BY (case_id);
+ALTER TABLE fraud_indicators CLUSTER BY (case_id);
@@ -17,11 +17,21 @@ CREATE TABLE IF NOT EXISTS app_users (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- Create indexes for performance
-CREATE INDEX IF NOT EXISTS idx_app_users_email ON app_users(email);
-CREATE INDEX IF NOT EXISTS idx_app_users_username ON app_users(username);
-CREATE INDEX IF NOT EXISTS idx_app_users_role ON app_users(role);
-CREATE INDEX IF NOT EXISTS idx_app_users_active ON app_users(is_active);
+-- Indexes for performance
+-- email and username lookups use the indexes behind their UNIQUE constraints;
+-- the former single-column copies of those and the low-selectivity role and
+-- is_active indexes only slowed down writes
+DROP INDEX IF EXISTS idx_app_users_email;
+DROP INDEX IF EXISTS idx_app_users_username;
+DROP INDEX IF EXISTS idx_app_users_role;
+DROP INDEX IF EXISTS idx_app_users_active;
+
+-- Active users by role (admin settings), index-only
+CREATE INDEX IF NOT EXISTS idx_app_users_role_full_name_where_is_active
+    ON app_users(role, full_name) INCLUDE (email, user_id) WHERE is_active;
+
+-- Further indexes (also on the synced fraud tables) are reported and built
+-- without blocking writes by modules/lakebase/lakebase_index_advisor.py
 
 -- Table starts empty - users will be created via the application
 -- or can be seeded manually for testing
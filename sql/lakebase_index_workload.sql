@@ -0,0 +1,24 @@
+-- Lakebase: representative app queries
+-- Used by modules/lakebase/lakebase_index_advisor.py as its query log when
+-- pg_stat_statements is not available. Parameters are written as $n.
+-- Synced fraud tables live in the fraud_management schema.
+
+-- Login and session lookup
+SELECT user_id, password_hash, role FROM app_users WHERE email = $1 AND is_active;
+SELECT user_id, email, role FROM app_users WHERE username = $1 AND is_active;
+UPDATE app_users SET last_login = CURRENT_TIMESTAMP WHERE user_id = $1;
+
+-- Admin settings: users by role
+SELECT user_id, email, full_name FROM app_users WHERE role = $1 AND is_active ORDER BY full_name;
+
+-- Case queue and case detail
+SELECT * FROM fraud_management.siu_cases WHERE status = $1 ORDER BY reported_date DESC LIMIT 50;
+SELECT * FROM fraud_management.siu_cases WHERE investigator_id = $1 AND status = $2 ORDER BY reported_date DESC;
+SELECT * FROM fraud_management.siu_cases WHERE claim_id = $1;
+SELECT * FROM fraud_management.claims WHERE claim_id = $1;
+
+-- Case detail tabs
+SELECT * FROM fraud_management.transactions WHERE case_id = $1 ORDER BY transaction_date DESC;
+SELECT * FROM fraud_management.alerts WHERE case_id = $1 AND status = $2 ORDER BY created_at DESC;
+SELECT * FROM fraud_management.investigation_activities WHERE case_id = $1 ORDER BY activity_date DESC;
+SELECT * FROM fraud_management.fraud_indicators WHERE case_id = $1;